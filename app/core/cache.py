@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from typing import Generic, TypeVar
+
+
+# Comentário (pt-BR):
+# Cache em memória, limitado em tamanho (LRU) e com expiração por tempo (TTL).
+# É a estrutura base para os caches por processo do bot (cursores de
+# paginação, estado de conversa, etc.). Cada worker do gunicorn tem o seu,
+# então nada aqui deve ser tratado como fonte da verdade.
+
+
+K = TypeVar("K")
+V = TypeVar("V")
+
+
+class TTLCache(Generic[K, V]):
+    """
+    Bounded LRU cache whose entries also expire after `ttl_seconds`.
+
+    Expired entries are removed lazily on access; when the cache is full the
+    least recently used entry is evicted.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        if max_size <= 0:
+            raise ValueError("max_size deve ser positivo")
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: OrderedDict[K, tuple[float, V]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: K) -> V | None:
+        """Return the cached value, or None if missing or expired."""
+
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: K, value: V) -> None:
+        """Insert or replace a value, restarting its TTL."""
+
+        with self._lock:
+            self._data[key] = (time.monotonic() + self.ttl_seconds, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def pop(self, key: K) -> V | None:
+        """Remove and return a value (None if it was not cached)."""
+
+        with self._lock:
+            entry = self._data.pop(key, None)
+        return None if entry is None else entry[1]
+
+    def discard_where(self, predicate: Callable[[K], bool]) -> int:
+        """Remove every entry whose key satisfies `predicate`; return how many."""
+
+        with self._lock:
+            doomed = [key for key in self._data if predicate(key)]
+            for key in doomed:
+                del self._data[key]
+        return len(doomed)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -16,6 +16,17 @@ from pydantic import BaseModel, ConfigDict
 load_dotenv()
 
 
+def _env_bool(name: str, default: bool) -> bool:
+    """
+    Read a boolean flag from the environment ("1", "true", "yes", "on").
+    """
+
+    raw = os.getenv(name)
+    if raw is None:
+        return default
+    return raw.strip().lower() in {"1", "true", "yes", "on"}
+
+
 class Settings(BaseModel):
     """
     Strongly-typed application settings.
@@ -39,11 +50,156 @@ class Settings(BaseModel):
     # Em desenvolvimento, usamos por padrão um SQLite local.
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite:///./construction.db")
 
+    # Perfil da engine do banco (app.core.database.EngineProfile).
+    # Comentário (pt-BR):
+    # Pool de conexões e statement_timeout valem para o PostgreSQL
+    # (DB_STATEMENT_TIMEOUT_MS=0 desliga o timeout). As opções SQLITE_* viram
+    # PRAGMAs aplicados em cada conexão nova do SQLite: WAL permite leituras
+    # durante uma escrita e synchronous=NORMAL evita um fsync por commit.
+    # Deixe um valor SQLITE_* vazio para manter o padrão do SQLite.
+    DB_POOL_SIZE: int = int(os.getenv("DB_POOL_SIZE", "5"))
+    DB_MAX_OVERFLOW: int = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT_SECONDS: float = float(os.getenv("DB_POOL_TIMEOUT_SECONDS", "30"))
+    DB_POOL_RECYCLE_SECONDS: int = int(os.getenv("DB_POOL_RECYCLE_SECONDS", "1800"))
+    DB_POOL_PRE_PING: bool = _env_bool("DB_POOL_PRE_PING", True)
+    DB_STATEMENT_TIMEOUT_MS: int = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "5000"))
+    SQLITE_JOURNAL_MODE: str = os.getenv("SQLITE_JOURNAL_MODE", "WAL")
+    SQLITE_SYNCHRONOUS: str = os.getenv("SQLITE_SYNCHRONOUS", "NORMAL")
+    SQLITE_MMAP_SIZE: str = os.getenv("SQLITE_MMAP_SIZE", str(256 * 1024 * 1024))
+    SQLITE_CACHE_SIZE: str = os.getenv("SQLITE_CACHE_SIZE", "-65536")
+    SQLITE_BUSY_TIMEOUT_MS: str = os.getenv("SQLITE_BUSY_TIMEOUT_MS", "5000")
+
+    # Aquecimento no startup (app.core.warmup): a primeira conexão do pool
+    # assíncrono antes de o app responder; o resto em segundo plano depois
+    # (demais conexões, índice de vagas e caminho de validação do webhook).
+    # 0 desliga a abertura de conexões.
+    STARTUP_PREWARM_CONNECTIONS: int = int(os.getenv("STARTUP_PREWARM_CONNECTIONS", "2"))
+
+    # Servidor de produção (gunicorn.conf.py).
+    # Comentário (pt-BR):
+    # WEB_CONCURRENCY=0 calcula o número de workers pelos núcleos disponíveis
+    # ao processo (um event loop por núcleo), limitado a WEB_MAX_WORKERS.
+    # Cada worker é reciclado depois de ~WEB_MAX_REQUESTS requisições (com
+    # jitter, para não reiniciarem todos juntos) e tem até
+    # WEB_GRACEFUL_TIMEOUT_SECONDS para terminar o que está fazendo.
+    WEB_CONCURRENCY: int = int(os.getenv("WEB_CONCURRENCY", "0"))
+    WEB_MAX_WORKERS: int = int(os.getenv("WEB_MAX_WORKERS", "8"))
+    WEB_TIMEOUT_SECONDS: int = int(os.getenv("WEB_TIMEOUT_SECONDS", "60"))
+    WEB_GRACEFUL_TIMEOUT_SECONDS: int = int(os.getenv("WEB_GRACEFUL_TIMEOUT_SECONDS", "30"))
+    WEB_KEEPALIVE_SECONDS: int = int(os.getenv("WEB_KEEPALIVE_SECONDS", "5"))
+    WEB_MAX_REQUESTS: int = int(os.getenv("WEB_MAX_REQUESTS", "10000"))
+    WEB_MAX_REQUESTS_JITTER: int = int(os.getenv("WEB_MAX_REQUESTS_JITTER", "1000"))
+
     # Configurações relacionadas ao Twilio
     TWILIO_ACCOUNT_SID: str | None = os.getenv("TWILIO_ACCOUNT_SID")
     TWILIO_AUTH_TOKEN: str | None = os.getenv("TWILIO_AUTH_TOKEN")
     TWILIO_WHATSAPP_NUMBER: str | None = os.getenv("TWILIO_WHATSAPP_NUMBER")
 
+    # Índice espacial em memória das vagas abertas (app.core.geo_index).
+    # Comentário (pt-BR):
+    # Com o índice ligado, a busca de VAGAS não consulta o banco. O índice é
+    # recarregado do banco quando fica mais velho que JOB_INDEX_MAX_AGE_SECONDS,
+    # o que limita o atraso para vagas criadas por outros processos/workers.
+    JOB_INDEX_ENABLED: bool = _env_bool("JOB_INDEX_ENABLED", True)
+    JOB_INDEX_MAX_AGE_SECONDS: float = float(os.getenv("JOB_INDEX_MAX_AGE_SECONDS", "300"))
+
+    # Backend espacial da busca de vagas no banco (app.core.nearby), usado
+    # quando o índice em memória está desligado: "auto" (R*Tree no SQLite,
+    # PostGIS no PostgreSQL), "rtree", "postgis" ou "python".
+    NEARBY_BACKEND: str = os.getenv("NEARBY_BACKEND", "auto")
+
+    # Paginação da resposta de VAGAS (comando MAIS).
+    # Comentário (pt-BR):
+    # Cada resposta mostra no máximo VAGAS_PAGE_SIZE vagas, da mais próxima
+    # para a mais distante. O restante fica num cursor por telefone, em memória.
+    VAGAS_PAGE_SIZE: int = int(os.getenv("VAGAS_PAGE_SIZE", "5"))
+    VAGAS_CURSOR_TTL_SECONDS: float = float(os.getenv("VAGAS_CURSOR_TTL_SECONDS", "600"))
+    VAGAS_CURSOR_MAX_ENTRIES: int = int(os.getenv("VAGAS_CURSOR_MAX_ENTRIES", "10000"))
+
+    # Cache da resposta de VAGAS por célula de localização (app.core.reply_cache).
+    # Comentário (pt-BR):
+    # Usuários na mesma célula (VAGAS_REPLY_CACHE_CELL_DEG graus, ~280 m)
+    # recebem a mesma resposta, com distâncias medidas do centro da célula.
+    # Vagas gravadas neste processo invalidam as células vizinhas na hora;
+    # as de outros processos aparecem depois de VAGAS_REPLY_CACHE_TTL_SECONDS.
+    VAGAS_REPLY_CACHE_ENABLED: bool = _env_bool("VAGAS_REPLY_CACHE_ENABLED", True)
+    VAGAS_REPLY_CACHE_CELL_DEG: float = float(os.getenv("VAGAS_REPLY_CACHE_CELL_DEG", "0.0025"))
+    VAGAS_REPLY_CACHE_TTL_SECONDS: float = float(os.getenv("VAGAS_REPLY_CACHE_TTL_SECONDS", "60"))
+    VAGAS_REPLY_CACHE_MAX_ENTRIES: int = int(os.getenv("VAGAS_REPLY_CACHE_MAX_ENTRIES", "5000"))
+
+    # Busca de TRABALHADORES pelas construtoras: máximo de resultados por
+    # resposta (os mais próximos primeiro).
+    TRABALHADORES_MAX_RESULTS: int = int(os.getenv("TRABALHADORES_MAX_RESULTS", "10"))
+
+    # Cache do estado de conversa por telefone (app.core.state_cache).
+    # Comentário (pt-BR):
+    # O TTL limita por quanto tempo um worker pode usar um estágio antigo
+    # quando a mesma pessoa foi atendida por outro processo.
+    USER_STATE_CACHE_TTL_SECONDS: float = float(os.getenv("USER_STATE_CACHE_TTL_SECONDS", "300"))
+    USER_STATE_CACHE_MAX_ENTRIES: int = int(os.getenv("USER_STATE_CACHE_MAX_ENTRIES", "50000"))
+
+    # Idempotência por MessageSid (reenvios do webhook pelo Twilio).
+    # Comentário (pt-BR):
+    # Em memória por padrão. Com IDEMPOTENCY_DB_ENABLED, as respostas também
+    # são gravadas na tabela processed_messages, o que cobre reenvios que
+    # caem em outro worker/processo (ao custo de uma leitura por mensagem).
+    IDEMPOTENCY_TTL_SECONDS: float = float(os.getenv("IDEMPOTENCY_TTL_SECONDS", "3600"))
+    IDEMPOTENCY_MAX_ENTRIES: int = int(os.getenv("IDEMPOTENCY_MAX_ENTRIES", "100000"))
+    IDEMPOTENCY_DB_ENABLED: bool = _env_bool("IDEMPOTENCY_DB_ENABLED", False)
+
+    # Processamento ordenado por usuário (app.core.locks).
+    # Comentário (pt-BR):
+    # Mensagens do mesmo telefone são processadas uma de cada vez: dentro do
+    # processo, por um conjunto fixo de locks asyncio (USER_LOCK_STRIPES);
+    # entre processos, por um advisory lock do PostgreSQL por telefone
+    # (USER_DB_LOCK_ENABLED; sem efeito no SQLite, que já serializa escritas).
+    USER_LOCK_STRIPES: int = int(os.getenv("USER_LOCK_STRIPES", "1024"))
+    USER_DB_LOCK_ENABLED: bool = _env_bool("USER_DB_LOCK_ENABLED", True)
+
+    # Avisos de vaga nova para trabalhadores próximos (app.core.notifications).
+    # Comentário (pt-BR):
+    # Os envios usam a API REST do Twilio (TWILIO_API_BASE_URL pode apontar
+    # para um servidor falso em testes) fora do request, com no máximo
+    # NOTIFY_CONCURRENCY envios simultâneos e NOTIFY_RATE_PER_SECOND
+    # mensagens por segundo (rajadas de até NOTIFY_BURST).
+    TWILIO_API_BASE_URL: str = os.getenv("TWILIO_API_BASE_URL", "https://api.twilio.com")
+    NOTIFY_ENABLED: bool = _env_bool("NOTIFY_ENABLED", True)
+    NOTIFY_RADIUS_KM: float = float(os.getenv("NOTIFY_RADIUS_KM", "10"))
+    NOTIFY_CONCURRENCY: int = int(os.getenv("NOTIFY_CONCURRENCY", "8"))
+    NOTIFY_RATE_PER_SECOND: float = float(os.getenv("NOTIFY_RATE_PER_SECOND", "10"))
+    NOTIFY_BURST: int = int(os.getenv("NOTIFY_BURST", "10"))
+    NOTIFY_MAX_ATTEMPTS: int = int(os.getenv("NOTIFY_MAX_ATTEMPTS", "4"))
+    NOTIFY_BACKOFF_SECONDS: float = float(os.getenv("NOTIFY_BACKOFF_SECONDS", "1"))
+    NOTIFY_QUEUE_MAX: int = int(os.getenv("NOTIFY_QUEUE_MAX", "10000"))
+
+    # Outbox transacional (app.core.outbox).
+    # Comentário (pt-BR):
+    # Com OUTBOX_CONSUMER_ENABLED, cada processo web roda o consumidor junto
+    # com o app. Para rodar o consumidor à parte (`python -m app.worker`),
+    # desligue-o nos processos web.
+    OUTBOX_CONSUMER_ENABLED: bool = _env_bool("OUTBOX_CONSUMER_ENABLED", True)
+    OUTBOX_BATCH_SIZE: int = int(os.getenv("OUTBOX_BATCH_SIZE", "20"))
+    OUTBOX_POLL_SECONDS: float = float(os.getenv("OUTBOX_POLL_SECONDS", "2"))
+    OUTBOX_LEASE_SECONDS: float = float(os.getenv("OUTBOX_LEASE_SECONDS", "600"))
+    OUTBOX_MAX_ATTEMPTS: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", "5"))
+    OUTBOX_RETRY_SECONDS: float = float(os.getenv("OUTBOX_RETRY_SECONDS", "30"))
+
+    # Sweeper de vagas antigas (app.core.sweeper).
+    # Comentário (pt-BR):
+    # Vagas OPEN com mais de JOB_MAX_AGE_DAYS dias viram CLOSED, e vagas
+    # fora de OPEN vão, em lotes, para a tabela de arquivo. Roda a cada
+    # JOB_SWEEP_INTERVAL_SECONDS no processo web (ou em app.worker).
+    JOB_SWEEPER_ENABLED: bool = _env_bool("JOB_SWEEPER_ENABLED", True)
+    JOB_MAX_AGE_DAYS: float = float(os.getenv("JOB_MAX_AGE_DAYS", "30"))
+    JOB_SWEEP_INTERVAL_SECONDS: float = float(os.getenv("JOB_SWEEP_INTERVAL_SECONDS", "3600"))
+    JOB_SWEEP_BATCH_SIZE: int = int(os.getenv("JOB_SWEEP_BATCH_SIZE", "500"))
+
+    # Métricas Prometheus em /metrics (app.core.metrics).
+    # Comentário (pt-BR):
+    # Com vários workers (gunicorn), defina PROMETHEUS_MULTIPROC_DIR com um
+    # diretório vazio e gravável; cada processo grava ali suas séries e o
+    # /metrics de qualquer worker devolve a soma de todos.
+    METRICS_ENABLED: bool = _env_bool("METRICS_ENABLED", True)
 
 
 def _build_settings() -> Settings:
@@ -1,26 +1,215 @@
-from collections.abc import Generator
+from collections.abc import AsyncGenerator, Generator
+from dataclasses import dataclass
+from typing import Any
 
-from sqlalchemy import create_engine
+from sqlalchemy import Engine, create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, declarative_base, sessionmaker
 
-from app.core.config import get_settings
+from app.core.config import Settings, get_settings
 
 
 # Comentário (pt-BR):
 # Este módulo define a camada básica de acesso a dados usando SQLAlchemy 2.0.
 # Aqui configuramos a engine (conexão com o banco), a fábrica de sessões
 # e a função de dependência get_db para ser usada nos endpoints.
+#
+# Existem dois caminhos:
+# - Síncrono (engine / SessionLocal / get_db): scripts, seeds e testes.
+# - Assíncrono (async_engine / AsyncSessionLocal / get_async_db): rotas
+#   `async def`, para que uma consulta lenta não bloqueie o event loop do
+#   uvicorn enquanto outros webhooks estão em andamento.
+#
+# As duas engines usam o mesmo EngineProfile (pool, timeouts e PRAGMAs do
+# SQLite), montado a partir das configurações DB_* / SQLITE_*.
+
+
+# Drivers assíncronos usados para cada banco suportado.
+# Comentário (pt-BR): aiosqlite em desenvolvimento, asyncpg em produção.
+_ASYNC_DRIVERS: dict[str, str] = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgres": "postgresql+asyncpg",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def async_database_url(url: str) -> str:
+    """
+    Translate a sync DATABASE_URL into its async-driver equivalent.
+
+    Exemplos:
+        sqlite:///./construction.db        -> sqlite+aiosqlite:///./construction.db
+        postgresql://user@host/db          -> postgresql+asyncpg://user@host/db
+        postgresql+psycopg2://user@host/db -> postgresql+asyncpg://user@host/db
+
+    URLs que já usam um driver assíncrono são devolvidas sem alteração.
+    """
+
+    parsed = make_url(url)
+    backend = parsed.drivername.split("+", 1)[0]
+    async_driver = _ASYNC_DRIVERS.get(backend)
+
+    if async_driver is None or parsed.drivername in _ASYNC_DRIVERS.values():
+        return url
+    return parsed.set(drivername=async_driver).render_as_string(hide_password=False)
+
+
+@dataclass(frozen=True, slots=True)
+class EngineProfile:
+    """
+    Connection-pool and per-connection tuning applied to both engines.
+
+    Os campos `sqlite_*` são PRAGMAs (None = não altera o padrão do SQLite);
+    os demais valem para bancos com pool de conexões (PostgreSQL).
+    """
+
+    pool_size: int = 5
+    max_overflow: int = 10
+    pool_timeout_seconds: float = 30.0
+    pool_recycle_seconds: int = 1800
+    pool_pre_ping: bool = True
+    statement_timeout_ms: int = 0
+    sqlite_journal_mode: str | None = "WAL"
+    sqlite_synchronous: str | None = "NORMAL"
+    sqlite_mmap_size: int | None = None
+    sqlite_cache_size: int | None = None
+    sqlite_busy_timeout_ms: int | None = None
+
+    @classmethod
+    def from_settings(cls, settings: Settings) -> "EngineProfile":
+        def optional_int(raw: str) -> int | None:
+            return int(raw) if raw.strip() else None
+
+        return cls(
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout_seconds=settings.DB_POOL_TIMEOUT_SECONDS,
+            pool_recycle_seconds=settings.DB_POOL_RECYCLE_SECONDS,
+            pool_pre_ping=settings.DB_POOL_PRE_PING,
+            statement_timeout_ms=settings.DB_STATEMENT_TIMEOUT_MS,
+            sqlite_journal_mode=settings.SQLITE_JOURNAL_MODE.strip() or None,
+            sqlite_synchronous=settings.SQLITE_SYNCHRONOUS.strip() or None,
+            sqlite_mmap_size=optional_int(settings.SQLITE_MMAP_SIZE),
+            sqlite_cache_size=optional_int(settings.SQLITE_CACHE_SIZE),
+            sqlite_busy_timeout_ms=optional_int(settings.SQLITE_BUSY_TIMEOUT_MS),
+        )
+
+    def sqlite_pragmas(self) -> list[str]:
+        """PRAGMA statements to run on every new SQLite connection."""
+
+        pragmas = {
+            "journal_mode": self.sqlite_journal_mode,
+            "synchronous": self.sqlite_synchronous,
+            "mmap_size": self.sqlite_mmap_size,
+            "cache_size": self.sqlite_cache_size,
+            "busy_timeout": self.sqlite_busy_timeout_ms,
+        }
+        return [f"PRAGMA {name}={value}" for name, value in pragmas.items() if value is not None]
+
+
+def engine_options(url: str, profile: EngineProfile) -> dict[str, Any]:
+    """
+    Keyword arguments for `create_engine` / `create_async_engine` under `profile`.
+
+    Comentário (pt-BR):
+    O SQLite não usa os parâmetros de pool (cada arquivo tem o seu pool
+    próprio do SQLAlchemy); os PRAGMAs dele entram por `install_sqlite_pragmas`.
+    O statement_timeout vai como opção de sessão na conexão, com a chave que
+    cada driver do PostgreSQL espera (psycopg2 ou asyncpg).
+    """
+
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+
+    if backend == "sqlite":
+        return {"connect_args": {"check_same_thread": False}} if parsed.get_driver_name() == "pysqlite" else {}
+
+    options: dict[str, Any] = {
+        "pool_size": profile.pool_size,
+        "max_overflow": profile.max_overflow,
+        "pool_timeout": profile.pool_timeout_seconds,
+        "pool_recycle": profile.pool_recycle_seconds,
+        "pool_pre_ping": profile.pool_pre_ping,
+    }
+    if backend == "postgresql" and profile.statement_timeout_ms > 0:
+        timeout = str(profile.statement_timeout_ms)
+        if parsed.get_driver_name() == "asyncpg":
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def install_sqlite_pragmas(engine: Engine, profile: EngineProfile) -> None:
+    """
+    Run the profile's PRAGMAs on every new connection of a SQLite engine.
+
+    Para engines assíncronas, passe `async_engine.sync_engine`.
+    """
+
+    if engine.dialect.name != "sqlite":
+        return
+    pragmas = profile.sqlite_pragmas()
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+        cursor = dbapi_connection.cursor()
+        try:
+            for pragma in pragmas:
+                cursor.execute(pragma)
+        finally:
+            cursor.close()
 
 
 settings = get_settings()
+engine_profile = EngineProfile.from_settings(settings)
 
 # SQLAlchemy recomenda a criação de engine no nível do módulo.
-# Observação: `connect_args={"check_same_thread": False}` é exclusivo do SQLite.
-connect_args = {"check_same_thread": False} if settings.DATABASE_URL.startswith("sqlite") else {}
-engine = create_engine(settings.DATABASE_URL, connect_args=connect_args)
+engine = create_engine(settings.DATABASE_URL, **engine_options(settings.DATABASE_URL, engine_profile))
+install_sqlite_pragmas(engine, engine_profile)
 
 # SessionLocal é a fábrica de sessões. Cada request deve usar sua própria sessão.
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Comentário (pt-BR):
+# `expire_on_commit=False` evita que cada commit invalide os objetos da
+# sessão e force um SELECT extra (refresh implícito) no próximo acesso.
+SessionLocal = sessionmaker(
+    autocommit=False,
+    autoflush=False,
+    expire_on_commit=False,
+    bind=engine,
+)
+
+# Engine e fábrica de sessões assíncronas, apontando para o mesmo banco.
+# Comentário (pt-BR):
+# `expire_on_commit=False` é obrigatório no modo assíncrono: acessar um
+# atributo expirado dispararia I/O implícito fora de um `await`.
+_async_url = async_database_url(settings.DATABASE_URL)
+async_engine = create_async_engine(_async_url, **engine_options(_async_url, engine_profile))
+install_sqlite_pragmas(async_engine.sync_engine, engine_profile)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
+
+def dispose_inherited_pools() -> None:
+    """
+    Forget the connection pools inherited from a parent process.
+
+    Comentário (pt-BR):
+    Chamado logo depois do fork (hook `post_fork` do gunicorn). Com
+    `close=False`, as conexões herdadas não são fechadas pelo filho: o
+    socket continua sendo do processo pai, e fechá-lo aqui derrubaria a
+    sessão dele. O filho só descarta as referências e abre conexões novas.
+    """
+
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+
 
 # Base é a classe base para modelos declarativos.
 Base = declarative_base()
@@ -36,3 +225,15 @@ def get_db() -> Generator[Session, None, None]:
         yield db
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    Dependência do FastAPI: fornece uma sessão assíncrona por request.
+
+    Comentário (pt-BR):
+    Use nas rotas `async def`. Todas as operações de banco devem ser
+    aguardadas (`await db.execute(...)`, `await db.commit()`).
+    """
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,340 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING
+
+import numpy as np
+from numpy.typing import NDArray
+from sqlalchemy import event, select
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.queries import JOB_ROW_COLUMNS, job_is_open
+from app.core.utils import EARTH_RADIUS_KM, haversine_many
+from app.models.models import JobOpportunity, JobStatus
+
+if TYPE_CHECKING:
+    from scipy.spatial import cKDTree
+    from sqlalchemy.ext.asyncio import AsyncSession
+
+
+# Comentário (pt-BR):
+# Este módulo mantém, em memória, um índice espacial (KD-tree) das vagas
+# com status OPEN. A busca de VAGAS é a consulta mais quente do bot e quase
+# nunca muda entre uma mensagem e outra, então em vez de ir ao banco a cada
+# request respondemos a partir deste índice.
+#
+# Como funciona:
+# - Os pontos (lat/lon) são convertidos para coordenadas xyz na esfera
+#   unitária. Nesse espaço, "distância na superfície <= raio" equivale a
+#   "distância euclidiana (corda) <= 2*sin(raio / 2R)", que a KD-tree responde.
+# - A KD-tree do SciPy é estática; inserções recentes ficam num buffer
+#   pequeno (verificado por força bruta) e remoções viram "tombstones".
+#   Quando o buffer cresce demais, a árvore é reconstruída em memória.
+# - Escritas via ORM (INSERT/UPDATE/DELETE de JobOpportunity) são aplicadas
+#   automaticamente no índice quando a transação faz commit (eventos abaixo).
+# - Escritas feitas por outros processos não passam por aqui; para isso o
+#   índice expira após JOB_INDEX_MAX_AGE_SECONDS e é recarregado do banco.
+#   A recarga é uma só por processo (`refresh`): as requisições que chegam
+#   com o índice vencido esperam por ela em vez de cada uma ler todas as
+#   vagas abertas do banco ao mesmo tempo.
+
+
+# Quantas alterações incrementais acumulamos antes de reconstruir a árvore.
+REBUILD_THRESHOLD: int = 256
+
+# Chave usada em `Session.info` para guardar as alterações pendentes de commit.
+_SESSION_CHANGES_KEY = "open_job_index_changes"
+
+
+@dataclass(frozen=True, slots=True)
+class IndexedJob:
+    """
+    Minimal, immutable copy of an open job kept in the spatial index.
+
+    Only the fields needed to answer and render a VAGAS query are stored.
+    """
+
+    id: int
+    title: str
+    payment_offer: float
+    latitude: float
+    longitude: float
+
+
+def _to_unit_xyz(lats: NDArray[np.float64], lons: NDArray[np.float64]) -> NDArray[np.float64]:
+    """
+    Convert lat/lon arrays (degrees) to points on the unit sphere, shape (N, 3).
+    """
+
+    lat_rad = np.radians(lats)
+    lon_rad = np.radians(lons)
+    cos_lat = np.cos(lat_rad)
+    return np.column_stack((cos_lat * np.cos(lon_rad), cos_lat * np.sin(lon_rad), np.sin(lat_rad)))
+
+
+def _chord_for_radius(radius_km: float) -> float:
+    """
+    Euclidean chord length on the unit sphere for a great-circle radius.
+    """
+
+    angle = min(radius_km / EARTH_RADIUS_KM, math.pi)
+    return 2.0 * math.sin(angle / 2.0)
+
+
+@dataclass(frozen=True, slots=True)
+class _Snapshot:
+    """
+    Immutable state of the index; readers grab one reference and never lock.
+    """
+
+    tree: cKDTree
+    tree_jobs: tuple[IndexedJob, ...]
+    pending: dict[int, IndexedJob]
+    removed: frozenset[int]
+    loaded_at: float
+
+
+def _build_snapshot(jobs: list[IndexedJob], loaded_at: float) -> _Snapshot:
+    lats = np.fromiter((job.latitude for job in jobs), dtype=np.float64, count=len(jobs))
+    lons = np.fromiter((job.longitude for job in jobs), dtype=np.float64, count=len(jobs))
+    # Import tardio: o scipy.spatial custa ~0,3 s de import e só é preciso
+    # quando o índice é carregado (não no boot de cada worker).
+    from scipy.spatial import cKDTree
+
+    tree = cKDTree(_to_unit_xyz(lats, lons) if jobs else np.empty((0, 3)))
+    return _Snapshot(
+        tree=tree,
+        tree_jobs=tuple(jobs),
+        pending={},
+        removed=frozenset(),
+        loaded_at=loaded_at,
+    )
+
+
+class OpenJobIndex:
+    """
+    In-process spatial index of `JobStatus.OPEN` job opportunities.
+
+    The index is loaded lazily from the database on first use (or when it
+    gets older than `max_age_seconds`) and updated incrementally afterwards.
+    """
+
+    def __init__(self, max_age_seconds: float, rebuild_threshold: int = REBUILD_THRESHOLD) -> None:
+        self.max_age_seconds = max_age_seconds
+        self.rebuild_threshold = rebuild_threshold
+        self._snapshot: _Snapshot | None = None
+        self._lock = threading.Lock()
+        # Lock da recarga assíncrona, criado no event loop que o usa.
+        self._reload_lock: asyncio.Lock | None = None
+        self._reload_loop: asyncio.AbstractEventLoop | None = None
+
+    # ------------------------------------------------------------------
+    # Carga / atualização
+    # ------------------------------------------------------------------
+    def is_stale(self) -> bool:
+        """Return True when the index was never loaded or is past its max age."""
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            return True
+        return (time.monotonic() - snapshot.loaded_at) > self.max_age_seconds
+
+    def load(self, session: Session) -> None:
+        """
+        Rebuild the index from the database (full refresh).
+
+        Comentário (pt-BR):
+        Selecionamos apenas as colunas necessárias, sem materializar objetos
+        ORM completos (a descrição pode ter até 2000 caracteres).
+        """
+
+        stmt = select(*JOB_ROW_COLUMNS).where(job_is_open())
+
+        jobs = [IndexedJob(*row) for row in session.execute(stmt)]
+        snapshot = _build_snapshot(jobs, time.monotonic())
+
+        with self._lock:
+            self._snapshot = snapshot
+
+    def ensure_loaded(self, session: Session) -> None:
+        """Load (or refresh) the index if it is missing or stale."""
+
+        if self.is_stale():
+            self.load(session)
+
+    async def refresh(self, db: AsyncSession) -> None:
+        """
+        Reload a stale index, with a single reload in flight per process.
+
+        Comentário (pt-BR):
+        Quem chega durante uma recarga espera por ela e confere de novo o
+        `is_stale()` já com o lock; se outra corrotina acabou de recarregar,
+        não vai ao banco.
+        """
+
+        if not self.is_stale():
+            return
+        async with self._async_reload_lock():
+            if self.is_stale():
+                await db.run_sync(self.load)
+
+    def _async_reload_lock(self) -> asyncio.Lock:
+        loop = asyncio.get_running_loop()
+        if self._reload_lock is None or self._reload_loop is not loop:
+            self._reload_lock = asyncio.Lock()
+            self._reload_loop = loop
+        return self._reload_lock
+
+    def invalidate(self) -> None:
+        """Drop the in-memory state; the next query reloads from the database."""
+
+        with self._lock:
+            self._snapshot = None
+
+    def upsert(self, job: IndexedJob) -> None:
+        """Add (or replace) an open job without touching the database."""
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                # Ainda não carregado: a primeira carga já vai trazer a vaga.
+                return
+            pending = dict(snapshot.pending)
+            pending[job.id] = job
+            self._replace(snapshot, pending, snapshot.removed | {job.id})
+
+    def discard(self, job_id: int) -> None:
+        """Remove a job (closed, filled or deleted) from the index."""
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return
+            pending = dict(snapshot.pending)
+            pending.pop(job_id, None)
+            self._replace(snapshot, pending, snapshot.removed | {job_id})
+
+    def _replace(self, snapshot: _Snapshot, pending: dict[int, IndexedJob], removed: frozenset[int]) -> None:
+        """
+        Swap in a new snapshot, rebuilding the tree if too many deltas piled up.
+
+        Must be called with `self._lock` held.
+        """
+
+        if len(pending) + len(removed) > self.rebuild_threshold:
+            live = [job for job in snapshot.tree_jobs if job.id not in removed]
+            live.extend(pending.values())
+            self._snapshot = _build_snapshot(live, snapshot.loaded_at)
+            return
+
+        self._snapshot = _Snapshot(
+            tree=snapshot.tree,
+            tree_jobs=snapshot.tree_jobs,
+            pending=pending,
+            removed=removed,
+            loaded_at=snapshot.loaded_at,
+        )
+
+    # ------------------------------------------------------------------
+    # Consulta
+    # ------------------------------------------------------------------
+    def query(self, lat: float, lon: float, radius_km: float) -> list[tuple[IndexedJob, float]]:
+        """
+        Return every indexed open job within `radius_km` of (lat, lon).
+
+        Returns:
+            Lista de pares (vaga, distância em km), sem ordem garantida.
+        """
+
+        snapshot = self._snapshot
+        if snapshot is None:
+            raise RuntimeError("OpenJobIndex não carregado; chame ensure_loaded() antes.")
+
+        center = _to_unit_xyz(np.array([lat]), np.array([lon]))[0]
+        positions = snapshot.tree.query_ball_point(center, _chord_for_radius(radius_km))
+
+        candidates = [snapshot.tree_jobs[i] for i in positions]
+        if snapshot.removed:
+            candidates = [job for job in candidates if job.id not in snapshot.removed]
+        candidates.extend(snapshot.pending.values())
+
+        if not candidates:
+            return []
+
+        distances = haversine_many(
+            lat,
+            lon,
+            [job.latitude for job in candidates],
+            [job.longitude for job in candidates],
+        )
+        return [
+            (job, float(distance))
+            for job, distance in zip(candidates, distances)
+            if distance <= radius_km
+        ]
+
+
+open_job_index = OpenJobIndex(max_age_seconds=get_settings().JOB_INDEX_MAX_AGE_SECONDS)
+
+
+def get_open_job_index() -> OpenJobIndex:
+    """Public accessor for the process-wide open job index."""
+
+    return open_job_index
+
+
+# ----------------------------------------------------------------------
+# Sincronização automática com escritas via ORM
+# ----------------------------------------------------------------------
+# Comentário (pt-BR):
+# Durante o flush registramos o que mudou em `session.info`; só aplicamos no
+# índice depois do commit, para que um rollback não deixe vagas "fantasmas".
+
+
+def _record_change(session: Session | None, job: JobOpportunity, deleted: bool = False) -> None:
+    if session is None:
+        return
+    changes: dict[int, IndexedJob | None] = session.info.setdefault(_SESSION_CHANGES_KEY, {})
+    if deleted or job.status != JobStatus.OPEN:
+        changes[job.id] = None
+    else:
+        changes[job.id] = IndexedJob(
+            id=job.id,
+            title=job.title,
+            payment_offer=job.payment_offer,
+            latitude=job.latitude,
+            longitude=job.longitude,
+        )
+
+
+@event.listens_for(JobOpportunity, "after_insert")
+@event.listens_for(JobOpportunity, "after_update")
+def _on_job_written(mapper, connection, target: JobOpportunity) -> None:  # noqa: ANN001
+    _record_change(Session.object_session(target), target)
+
+
+@event.listens_for(JobOpportunity, "after_delete")
+def _on_job_deleted(mapper, connection, target: JobOpportunity) -> None:  # noqa: ANN001
+    _record_change(Session.object_session(target), target, deleted=True)
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes_after_commit(session: Session) -> None:
+    changes: dict[int, IndexedJob | None] | None = session.info.pop(_SESSION_CHANGES_KEY, None)
+    if not changes:
+        return
+    for job_id, job in changes.items():
+        if job is None:
+            open_job_index.discard(job_id)
+        else:
+            open_job_index.upsert(job)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_changes_after_rollback(session: Session, previous_transaction) -> None:  # noqa: ANN001
+    session.info.pop(_SESSION_CHANGES_KEY, None)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.models.models import ProcessedMessage
+
+
+# Comentário (pt-BR):
+# Idempotência do webhook por MessageSid.
+# O Twilio reenvia a mesma mensagem quando nossa resposta demora. Sem esta
+# camada, o reenvio rodaria a máquina de estados de novo (avançando o estágio
+# duas vezes ou criando uma vaga duplicada no modo admin).
+#
+# Três níveis:
+# 1. Respostas já enviadas ficam num cache em memória (TTL + tamanho máximo);
+#    um reenvio devolve os mesmos bytes sem tocar no banco.
+# 2. Reenvios que chegam enquanto a original ainda está sendo processada
+#    aguardam o mesmo Future, em vez de processar em paralelo.
+# 3. Opcionalmente (IDEMPOTENCY_DB_ENABLED), a resposta é gravada na tabela
+#    processed_messages, cobrindo reenvios que caem em outro processo.
+
+
+class IdempotencyStore:
+    """
+    In-process record of handled (and in-flight) Twilio message SIDs.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: float) -> None:
+        self._responses: TTLCache[str, bytes] = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._inflight: dict[str, asyncio.Future[bytes | None]] = {}
+
+    def get(self, message_sid: str) -> bytes | None:
+        """TwiML already returned for this SID, if still cached."""
+
+        return self._responses.get(message_sid)
+
+    def pending(self, message_sid: str) -> asyncio.Future[bytes | None] | None:
+        """
+        Future of a delivery of this SID that is still being processed.
+
+        Resolve com os bytes da resposta, ou None se o processamento falhou.
+        O Future devolvido é protegido por `asyncio.shield`: se a duplicata
+        for cancelada, a original não é afetada.
+        """
+
+        future = self._inflight.get(message_sid)
+        return None if future is None else asyncio.shield(future)
+
+    def begin(self, message_sid: str) -> None:
+        """Mark a SID as being processed by the current request."""
+
+        self._inflight[message_sid] = asyncio.get_running_loop().create_future()
+
+    def finish(self, message_sid: str, body: bytes) -> None:
+        """Record the final response and wake up waiting duplicates."""
+
+        self._responses.set(message_sid, body)
+        future = self._inflight.pop(message_sid, None)
+        if future is not None and not future.done():
+            future.set_result(body)
+
+    def abandon(self, message_sid: str | None) -> None:
+        """
+        Forget an in-flight SID after a failure.
+
+        Comentário (pt-BR):
+        Nada é guardado: a próxima reentrega do Twilio processa de novo.
+        Duplicatas que estavam esperando recebem None (e respondem erro).
+        """
+
+        if message_sid is None:
+            return
+        future = self._inflight.pop(message_sid, None)
+        if future is not None and not future.done():
+            future.set_result(None)
+
+
+_settings = get_settings()
+
+idempotency_store = IdempotencyStore(
+    max_size=_settings.IDEMPOTENCY_MAX_ENTRIES,
+    ttl_seconds=_settings.IDEMPOTENCY_TTL_SECONDS,
+)
+
+
+def get_idempotency_store() -> IdempotencyStore:
+    """Public accessor for the process-wide idempotency store."""
+
+    return idempotency_store
+
+
+async def load_processed_response(db: AsyncSession, message_sid: str) -> bytes | None:
+    """
+    Look up a response stored in processed_messages (optional DB level).
+    """
+
+    record = await db.get(ProcessedMessage, message_sid)
+    return None if record is None else record.response_body
+
+
+async def record_processed_response(db: AsyncSession, message_sid: str, body: bytes) -> None:
+    """
+    Persist the response for a SID; failures are logged, never raised.
+
+    Comentário (pt-BR):
+    A gravação acontece depois do commit da própria mensagem. Se o processo
+    cair entre os dois commits, um reenvio ainda pode ser processado de novo;
+    a camada em memória continua cobrindo o caso comum (mesmo worker).
+    """
+
+    db.add(ProcessedMessage(message_sid=message_sid, response_body=body))
+    try:
+        await db.commit()
+    except IntegrityError:
+        # Outro processo já gravou este SID; a resposta dele vale.
+        await db.rollback()
+    except Exception as exc:  # pragma: no cover - defensive guard
+        await db.rollback()
+        print("Erro ao gravar idempotência do MessageSid:", repr(exc))
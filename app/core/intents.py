@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import re
+import unicodedata
+from collections.abc import Iterable, Mapping
+from functools import lru_cache
+
+
+# Comentário (pt-BR):
+# Reconhecimento de intenções nas mensagens livres do usuário.
+#
+# - `fold_text` normaliza o texto: minúsculas, sem acentos ("contratação"
+#   vira "contratacao") e com espaços colapsados. É memoizado, porque a
+#   maioria das mensagens se repete ("oi", "vagas", "mais"...).
+# - `IntentMatcher` compila, uma única vez, as palavras-chave de um estágio:
+#   * whole_message=True: a mensagem inteira é o comando (dict, O(1));
+#   * caso contrário: uma regex única com as palavras fatoradas em árvore
+#     de prefixos (trie), que casa no início de uma palavra. "contrat" casa
+#     "contratar", "contratação" e "contratante", mas "obra" não casa mais
+#     dentro de "sobrado". O custo não cresce com o número de palavras.
+#
+# Se a mensagem tiver palavras de mais de uma intenção, vence a intenção
+# declarada primeiro.
+
+
+@lru_cache(maxsize=4096)
+def fold_text(text: str) -> str:
+    """
+    Lowercase, strip accents and collapse whitespace (memoized).
+    """
+
+    decomposed = unicodedata.normalize("NFKD", text.casefold())
+    without_marks = "".join(char for char in decomposed if not unicodedata.combining(char))
+    return " ".join(without_marks.split())
+
+
+def _trie_pattern(words: Iterable[str]) -> str:
+    """
+    Regex alternation of `words` factored by common prefix.
+
+    Exemplo: {"vaga", "vagas", "valor"} -> "va(?:ga(?:s)?|lor)".
+    """
+
+    trie: dict[str, dict] = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node: dict[str, dict]) -> str:
+        ends_here = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ""
+        body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        if ends_here:
+            return f"(?:{body})?"
+        return body
+
+    return build(trie)
+
+
+class IntentMatcher:
+    """
+    Precompiled keyword -> intent lookup for one conversation stage.
+    """
+
+    def __init__(self, intents: Mapping[str, Iterable[str]], whole_message: bool = False) -> None:
+        self.whole_message = whole_message
+        self._intent_of: dict[str, str] = {}
+        self._priority: dict[str, int] = {}
+        for priority, (intent, keywords) in enumerate(intents.items()):
+            self._priority[intent] = priority
+            for keyword in keywords:
+                # A primeira intenção que declarar a palavra fica com ela.
+                self._intent_of.setdefault(fold_text(keyword), intent)
+
+        self._pattern: re.Pattern[str] | None = None
+        if not whole_message and self._intent_of:
+            self._pattern = re.compile(r"\b" + _trie_pattern(self._intent_of))
+
+    def match(self, folded: str) -> str | None:
+        """
+        Intent of an already folded message (see `fold_text`), or None.
+        """
+
+        if self._pattern is None:
+            return self._intent_of.get(folded)
+
+        best: str | None = None
+        for found in self._pattern.finditer(folded):
+            intent = self._intent_of[found.group(0)]
+            if best is None or self._priority[intent] < self._priority[best]:
+                best = intent
+        return best
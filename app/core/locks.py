@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import zlib
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+
+
+# Comentário (pt-BR):
+# Serialização das mensagens de um mesmo usuário.
+# Quem manda nome, localização e VAGAS em sequência rápida não pode ter as
+# três mensagens processadas em paralelo: cada uma lê o estágio, altera e faz
+# commit, e uma sobrescreveria a outra. Usuários diferentes continuam
+# totalmente em paralelo.
+#
+# Dois níveis:
+# - No processo: um número fixo de asyncio.Lock ("stripes"); o telefone é
+#   mapeado para um deles. Memória constante, independente do número de
+#   usuários; dois telefones no mesmo stripe só esperam um pelo outro.
+# - Entre processos (PostgreSQL): pg_advisory_xact_lock com uma chave
+#   derivada do telefone, liberado automaticamente no commit/rollback da
+#   transação que grava o estado.
+
+
+class StripedLock:
+    """
+    Fixed pool of asyncio locks addressed by key.
+    """
+
+    def __init__(self, stripes: int) -> None:
+        if stripes <= 0:
+            raise ValueError("stripes deve ser positivo")
+        self._locks = [asyncio.Lock() for _ in range(stripes)]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def lock_for(self, key: str) -> asyncio.Lock:
+        """Lock guarding `key` (stable for the life of the process)."""
+
+        return self._locks[zlib.crc32(key.encode("utf-8")) % len(self._locks)]
+
+
+def advisory_lock_key(phone_number: str) -> int:
+    """
+    Signed 64-bit key for PostgreSQL advisory locks on one phone number.
+    """
+
+    digest = hashlib.blake2b(phone_number.encode("utf-8"), digest_size=8).digest()
+    return int.from_bytes(digest, "big", signed=True)
+
+
+async def lock_user_for_transaction(db: AsyncSession, phone_number: str) -> None:
+    """
+    Take the cross-process lock for `phone_number` in the current transaction.
+
+    Comentário (pt-BR):
+    Deve ser o primeiro statement da transação que lê e grava o estado do
+    usuário. No PostgreSQL bloqueia até que outro processo termine a mensagem
+    do mesmo telefone; o lock é solto no commit ou rollback. Em outros bancos
+    (SQLite) não faz nada.
+    """
+
+    if not get_settings().USER_DB_LOCK_ENABLED or db.bind.dialect.name != "postgresql":
+        return
+    await db.execute(select(func.pg_advisory_xact_lock(advisory_lock_key(phone_number))))
+
+
+_settings = get_settings()
+
+user_locks = StripedLock(stripes=_settings.USER_LOCK_STRIPES)
+
+
+def get_user_locks() -> StripedLock:
+    """Public accessor for the process-wide per-phone striped locks."""
+
+    return user_locks
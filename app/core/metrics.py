@@ -0,0 +1,238 @@
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+)
+from sqlalchemy import Engine, event
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+# Comentário (pt-BR):
+# Instrumentação Prometheus do webhook, exposta em GET /metrics.
+#
+# - Latência total do webhook por ramo da máquina de estados (`branch`, ex.:
+#   "MAIN_MENU:vagas") e status HTTP. O ramo é marcado pelo router com
+#   `set_branch()` numa ContextVar da requisição.
+# - Tempo da validação da assinatura do Twilio (parse + HMAC).
+# - Tempo e número de statements SQL por requisição, medidos pelos eventos
+#   before/after_cursor_execute do SQLAlchemy e somados na mesma ContextVar.
+# - Tempo do filtro geográfico (índice em memória / Haversine).
+# - Acertos/falhas do cache de respostas de VAGAS.
+# - Conexões em uso e overflow do pool.
+#
+# Vários processos (gunicorn): com PROMETHEUS_MULTIPROC_DIR definido, cada
+# worker grava as séries em arquivos nesse diretório e o /metrics de
+# qualquer worker soma todos. O diretório deve começar vazio a cada deploy,
+# e o master do gunicorn deve chamar `mark_process_dead(pid)` quando um
+# worker sai (hook `child_exit`).
+
+
+# Buckets finos para operações de microssegundos a milissegundos.
+FAST_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+WEBHOOK_SECONDS = Histogram(
+    "contech_webhook_seconds",
+    "Webhook latency by state-machine branch.",
+    ["branch", "status"],
+)
+WEBHOOK_DB_SECONDS = Histogram(
+    "contech_webhook_db_seconds",
+    "Time spent executing SQL statements per webhook request.",
+    ["branch"],
+    buckets=FAST_BUCKETS,
+)
+WEBHOOK_DB_STATEMENTS = Histogram(
+    "contech_webhook_db_statements",
+    "SQL statements executed per webhook request.",
+    ["branch"],
+    buckets=(0, 1, 2, 3, 4, 5, 6, 8, 10, 15, 20),
+)
+DB_STATEMENTS_TOTAL = Counter(
+    "contech_db_statements",
+    "SQL statements executed, by the webhook branch that issued them.",
+    ["branch"],
+)
+SIGNATURE_SECONDS = Histogram(
+    "contech_signature_validation_seconds",
+    "Twilio signature validation time (form parsing plus HMAC).",
+    ["outcome"],
+    buckets=FAST_BUCKETS,
+)
+GEO_FILTER_SECONDS = Histogram(
+    "contech_geo_filter_seconds",
+    "Geographic filtering time (spatial index or vectorized Haversine).",
+    ["kind"],
+    buckets=FAST_BUCKETS,
+)
+VAGAS_REPLY_CACHE = Counter(
+    "contech_vagas_reply_cache",
+    "VAGAS reply cache lookups by result.",
+    ["result"],
+)
+DB_POOL_CHECKED_OUT = Gauge(
+    "contech_db_pool_checked_out",
+    "Database connections currently checked out of the pool.",
+    multiprocess_mode="livesum",
+)
+DB_POOL_OVERFLOW = Gauge(
+    "contech_db_pool_overflow",
+    "Connections open beyond the pool size.",
+    multiprocess_mode="livesum",
+)
+
+
+@dataclass(slots=True)
+class RequestMetrics:
+    """
+    Per-request accumulators filled while a webhook request runs.
+    """
+
+    branch: str = "none"
+    db_statements: int = 0
+    db_seconds: float = 0.0
+
+
+_current_request: ContextVar[RequestMetrics | None] = ContextVar("contech_request_metrics", default=None)
+
+
+def set_branch(branch: str) -> None:
+    """Label the current request with the state-machine branch that handled it."""
+
+    current = _current_request.get()
+    if current is not None:
+        current.branch = branch
+
+
+@contextmanager
+def track_request() -> Iterator[RequestMetrics]:
+    """Collect DB timings and the branch label of the code run inside the block."""
+
+    metrics = RequestMetrics()
+    token = _current_request.set(metrics)
+    try:
+        yield metrics
+    finally:
+        _current_request.reset(token)
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware that times requests to `path` and records them.
+
+    Deve ser o middleware mais externo, para que a validação da assinatura
+    entre no tempo total.
+    """
+
+    def __init__(self, app: ASGIApp, path: str = "/webhook") -> None:
+        self.app = app
+        self.path = path
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        started = time.perf_counter()
+        with track_request() as metrics:
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                elapsed = time.perf_counter() - started
+                WEBHOOK_SECONDS.labels(metrics.branch, str(status)).observe(elapsed)
+                WEBHOOK_DB_SECONDS.labels(metrics.branch).observe(metrics.db_seconds)
+                WEBHOOK_DB_STATEMENTS.labels(metrics.branch).observe(metrics.db_statements)
+                DB_STATEMENTS_TOTAL.labels(metrics.branch).inc(metrics.db_statements)
+
+
+def install_db_metrics(engine: Engine) -> None:
+    """
+    Time SQL statements and track pool usage of `engine`.
+
+    Comentário (pt-BR):
+    Para a engine assíncrona, passe `async_engine.sync_engine`. Statements
+    fora de um webhook (outbox, aquecimento) não entram na contagem por
+    requisição.
+    """
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+        conn.info.setdefault("contech_query_start", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany) -> None:  # noqa: ANN001
+        elapsed = time.perf_counter() - conn.info["contech_query_start"].pop()
+        current = _current_request.get()
+        if current is not None:
+            current.db_statements += 1
+            current.db_seconds += elapsed
+
+    @event.listens_for(engine, "handle_error")
+    def _handle_error(context) -> None:  # noqa: ANN001
+        # Statement com erro não passa pelo after_cursor_execute.
+        starts = context.connection.info.get("contech_query_start") if context.connection else None
+        if starts:
+            starts.pop()
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy) -> None:  # noqa: ANN001
+        DB_POOL_CHECKED_OUT.inc()
+        _sample_overflow(engine)
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+        DB_POOL_CHECKED_OUT.dec()
+        _sample_overflow(engine)
+
+
+def _sample_overflow(engine: Engine) -> None:
+    # QueuePool: overflow() começa em -pool_size e cresce a cada conexão
+    # aberta; pools sem limite (StaticPool, NullPool) não têm overflow.
+    overflow = getattr(engine.pool, "overflow", None)
+    if overflow is not None:
+        DB_POOL_OVERFLOW.set(max(overflow(), 0))
+
+
+def render_latest() -> tuple[bytes, str]:
+    """
+    Exposition payload and content type for GET /metrics.
+
+    Em modo multiprocesso, agrega os arquivos de todos os workers a cada coleta.
+    """
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        return generate_latest(registry), CONTENT_TYPE_LATEST
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+
+def mark_process_dead(pid: int) -> None:
+    """Drop the live gauges of a dead worker (gunicorn `child_exit` hook)."""
+
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(pid)
@@ -0,0 +1,323 @@
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+
+from sqlalchemy import Column, Connection, Engine, Float, Integer, MetaData, Row, Select, Table, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.core.config import get_settings
+from app.core.queries import JOB_ROW_COLUMNS, JobRow, job_is_open, open_jobs_near_stmt
+from app.core.utils import bounding_box, find_nearby_indices
+from app.models.models import JobOpportunity
+
+
+# Comentário (pt-BR):
+# Busca de vagas OPEN próximas com backend espacial plugável.
+#
+# Todos os backends seguem o mesmo contrato: o banco faz a poda espacial
+# com um índice de verdade (`candidates_stmt`, sempre um superconjunto do
+# círculo) e o Haversine exato (`exact_matches`) decide quem entra. Como o
+# filtro final é o mesmo, todos devolvem exatamente o mesmo resultado; só
+# muda quanto o banco precisa ler.
+#
+# Os candidatos vêm só com as colunas de `JobRow` (sem objetos ORM): a
+# resposta de VAGAS usa apenas id, título, valor e coordenadas.
+#
+# - python:  portátil; pré-filtro pela grade fixa + bounding box
+#            (app.core.queries.open_jobs_near_stmt) e Haversine em Python.
+# - rtree:   SQLite; tabela virtual R*Tree só com as vagas OPEN, mantida
+#            por triggers (pega também INSERTs em massa, o sweeper e
+#            outros processos).
+# - postgis: PostgreSQL com PostGIS; coluna geography gerada a partir de
+#            latitude/longitude, índice GiST parcial (status = 'OPEN') e
+#            ST_DWithin.
+#
+# O backend é escolhido pelo dialeto de DATABASE_URL (NEARBY_BACKEND=auto).
+# O DDL dele (`install_nearby_search`) roda junto com o do schema, só quando
+# a impressão digital do schema muda (app.core.schema.ensure_schema). No
+# startup de cada worker, `configure_nearby_search` apenas confere se o
+# backend está instalado, sem DDL; se não estiver (extensão indisponível,
+# sem permissão), usa o backend python.
+
+
+CandidatesStmt = Select[tuple[int, str, float, float, float]]
+
+
+class NearbySearch:
+    """
+    Portable backend: grid-cell + bounding-box prefilter, exact Haversine in Python.
+    """
+
+    name = "python"
+
+    def install(self, engine: Engine) -> None:
+        """Create whatever the backend needs in the database (idempotent DDL)."""
+
+    def is_installed(self, conn: Connection) -> bool:
+        """Whether the database already has what the backend needs (no DDL)."""
+
+        return True
+
+    def candidates_stmt(self, lat: float, lon: float, radius_km: float) -> CandidatesStmt:
+        """Open jobs that may lie within `radius_km` (a superset of the circle)."""
+
+        return open_jobs_near_stmt(lat=lat, lon=lon, radius_km=radius_km)
+
+    def search(self, session: Session, lat: float, lon: float, radius_km: float) -> list[tuple[JobRow, float]]:
+        """Open jobs within `radius_km`, as (job, distance in km) pairs."""
+
+        jobs = job_rows(session.execute(self.candidates_stmt(lat, lon, radius_km)))
+        return exact_matches(jobs, lat, lon, radius_km)
+
+
+def job_rows(rows: Iterable[Row[tuple[int, str, float, float, float]]]) -> list[JobRow]:
+    """Copy result rows into plain `JobRow` tuples (no reference to the result)."""
+
+    return list(map(JobRow._make, rows))
+
+
+def exact_matches(
+    jobs: Sequence[JobRow],
+    lat: float,
+    lon: float,
+    radius_km: float,
+) -> list[tuple[JobRow, float]]:
+    """
+    Keep the candidates within `radius_km` (Haversine), in their original order.
+    """
+
+    indices, distances = find_nearby_indices(
+        user_lat=lat,
+        user_lon=lon,
+        lats=[job.latitude for job in jobs],
+        lons=[job.longitude for job in jobs],
+        radius_km=radius_km,
+    )
+    return [(jobs[i], float(distance)) for i, distance in zip(indices, distances)]
+
+
+# Tabela virtual fora de Base.metadata: não entra no create_all nem no hash
+# do schema (app.core.schema); é criada por SqliteRTreeNearbySearch.install.
+_rtree_metadata = MetaData()
+
+job_rtree_table = Table(
+    "job_opportunities_rtree",
+    _rtree_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("min_lat", Float),
+    Column("max_lat", Float),
+    Column("min_lon", Float),
+    Column("max_lon", Float),
+)
+
+_RTREE_DDL = (
+    "CREATE VIRTUAL TABLE IF NOT EXISTS job_opportunities_rtree "
+    "USING rtree(id, min_lat, max_lat, min_lon, max_lon)",
+    "INSERT OR IGNORE INTO job_opportunities_rtree "
+    "SELECT id, latitude, latitude, longitude, longitude FROM job_opportunities WHERE status = 'OPEN'",
+    "CREATE TRIGGER IF NOT EXISTS job_opportunities_rtree_insert "
+    "AFTER INSERT ON job_opportunities WHEN new.status = 'OPEN' BEGIN "
+    "INSERT OR REPLACE INTO job_opportunities_rtree "
+    "VALUES (new.id, new.latitude, new.latitude, new.longitude, new.longitude); END",
+    "CREATE TRIGGER IF NOT EXISTS job_opportunities_rtree_update "
+    "AFTER UPDATE OF status, latitude, longitude ON job_opportunities BEGIN "
+    "DELETE FROM job_opportunities_rtree WHERE id = old.id; "
+    "INSERT INTO job_opportunities_rtree "
+    "SELECT new.id, new.latitude, new.latitude, new.longitude, new.longitude WHERE new.status = 'OPEN'; END",
+    "CREATE TRIGGER IF NOT EXISTS job_opportunities_rtree_delete "
+    "AFTER DELETE ON job_opportunities BEGIN "
+    "DELETE FROM job_opportunities_rtree WHERE id = old.id; END",
+)
+
+
+# Tabela virtual e triggers que precisam existir para o backend rtree.
+_RTREE_OBJECTS = frozenset(
+    {
+        "job_opportunities_rtree",
+        "job_opportunities_rtree_insert",
+        "job_opportunities_rtree_update",
+        "job_opportunities_rtree_delete",
+    }
+)
+
+
+class SqliteRTreeNearbySearch(NearbySearch):
+    """
+    SQLite backend: R*Tree virtual table of open jobs, kept in sync by triggers.
+
+    O R*Tree guarda coordenadas em float32 arredondadas "para fora", então
+    a caixa consultada continua sendo um superconjunto do círculo.
+    """
+
+    name = "rtree"
+
+    def install(self, engine: Engine) -> None:
+        with engine.begin() as conn:
+            exists = conn.exec_driver_sql(
+                "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'job_opportunities_rtree'"
+            ).first()
+            for statement in _RTREE_DDL:
+                # A carga inicial só roda quando a tabela virtual acabou de nascer.
+                if exists and statement.startswith("INSERT"):
+                    continue
+                conn.exec_driver_sql(statement)
+
+    def is_installed(self, conn: Connection) -> bool:
+        names = set(
+            conn.exec_driver_sql(
+                "SELECT name FROM sqlite_master WHERE name LIKE 'job_opportunities_rtree%'"
+            ).scalars()
+        )
+        return _RTREE_OBJECTS <= names
+
+    def candidates_stmt(self, lat: float, lon: float, radius_km: float) -> CandidatesStmt:
+        min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+        rtree = job_rtree_table.c
+        return (
+            select(*JOB_ROW_COLUMNS)
+            .join(job_rtree_table, rtree.id == JobOpportunity.id)
+            .where(
+                rtree.max_lat >= min_lat,
+                rtree.min_lat <= max_lat,
+                rtree.max_lon >= min_lon,
+                rtree.min_lon <= max_lon,
+                job_is_open(),
+            )
+        )
+
+
+_POSTGIS_DDL = (
+    "ALTER TABLE job_opportunities ADD COLUMN IF NOT EXISTS geog geography(Point, 4326) "
+    "GENERATED ALWAYS AS (ST_SetSRID(ST_MakePoint(longitude, latitude), 4326)::geography) STORED",
+    "CREATE INDEX IF NOT EXISTS ix_job_opportunities_open_geog "
+    "ON job_opportunities USING GIST (geog) WHERE status = 'OPEN'",
+)
+
+# Folga relativa do raio no ST_DWithin. A esfera do PostGIS (raio médio
+# 6371008,8 m) e a do nosso Haversine (EARTH_RADIUS_KM) diferem um pouco;
+# com a folga, a poda nunca corta alguém que o Haversine aceitaria.
+_POSTGIS_RADIUS_SLACK = 1.01
+
+
+class PostgisNearbySearch(NearbySearch):
+    """
+    PostgreSQL backend: generated geography column, partial GiST index, ST_DWithin.
+    """
+
+    name = "postgis"
+
+    def install(self, engine: Engine) -> None:
+        with engine.begin() as conn:
+            installed = conn.exec_driver_sql("SELECT 1 FROM pg_extension WHERE extname = 'postgis'").first()
+            if not installed:
+                conn.exec_driver_sql("CREATE EXTENSION IF NOT EXISTS postgis")
+            for statement in _POSTGIS_DDL:
+                conn.exec_driver_sql(statement)
+
+    def is_installed(self, conn: Connection) -> bool:
+        column = conn.exec_driver_sql(
+            "SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = 'job_opportunities' AND column_name = 'geog'"
+        ).first()
+        index = conn.exec_driver_sql(
+            "SELECT 1 FROM pg_indexes "
+            "WHERE schemaname = current_schema() AND indexname = 'ix_job_opportunities_open_geog'"
+        ).first()
+        return column is not None and index is not None
+
+    def candidates_stmt(self, lat: float, lon: float, radius_km: float) -> CandidatesStmt:
+        within = text(
+            "ST_DWithin(job_opportunities.geog, "
+            "ST_SetSRID(ST_MakePoint(:nearby_lon, :nearby_lat), 4326)::geography, "
+            ":nearby_meters, false)"
+        ).bindparams(
+            nearby_lon=lon,
+            nearby_lat=lat,
+            nearby_meters=radius_km * 1000.0 * _POSTGIS_RADIUS_SLACK,
+        )
+        return select(*JOB_ROW_COLUMNS).where(job_is_open(), within)
+
+
+_BACKENDS: dict[str, type[NearbySearch]] = {
+    NearbySearch.name: NearbySearch,
+    SqliteRTreeNearbySearch.name: SqliteRTreeNearbySearch,
+    PostgisNearbySearch.name: PostgisNearbySearch,
+}
+
+# Backend preferido por dialeto quando NEARBY_BACKEND=auto.
+_AUTO_BACKENDS: dict[str, str] = {
+    "sqlite": SqliteRTreeNearbySearch.name,
+    "postgresql": PostgisNearbySearch.name,
+}
+
+
+def nearby_backend_name(dialect_name: str, preference: str = "auto") -> str:
+    """
+    Resolve NEARBY_BACKEND ("auto" or a backend name) for a database dialect.
+    """
+
+    name = _AUTO_BACKENDS.get(dialect_name, NearbySearch.name) if preference == "auto" else preference
+    if name not in _BACKENDS:
+        raise ValueError(f"NEARBY_BACKEND desconhecido: {preference!r}")
+    return name
+
+
+def install_nearby_search(engine: Engine, name: str) -> bool:
+    """
+    Run the DDL of backend `name`; called by `ensure_schema` only.
+
+    Comentário (pt-BR):
+    Retorna False se a instalação falhar (SQLite sem R*Tree, PostGIS
+    ausente ou sem permissão para criar a extensão); nesse caso os workers
+    vão usar o backend python.
+    """
+
+    try:
+        _BACKENDS[name]().install(engine)
+    except DBAPIError as exc:
+        print(f"Backend espacial {name!r} indisponível; usando o backend python:", repr(exc.orig))
+        return False
+    return True
+
+
+def select_nearby_search(engine: Engine, preference: str = "auto") -> NearbySearch:
+    """
+    Pick the spatial backend for `engine` without running any DDL.
+
+    Comentário (pt-BR):
+    `preference` é "auto" (pelo dialeto) ou o nome de um backend. Se o
+    banco não tiver o que o backend precisa (ensure_schema não conseguiu
+    instalar, ou o banco foi criado sem ele), usa o backend python.
+    """
+
+    name = nearby_backend_name(engine.dialect.name, preference)
+    backend = _BACKENDS[name]()
+    try:
+        with engine.connect() as conn:
+            installed = backend.is_installed(conn)
+    except DBAPIError as exc:
+        print(f"Não foi possível conferir o backend espacial {name!r}:", repr(exc.orig))
+        installed = False
+    if not installed:
+        if name != NearbySearch.name:
+            print(f"Backend espacial {name!r} não instalado; usando o backend python.")
+        backend = NearbySearch()
+    return backend
+
+
+nearby_search: NearbySearch = NearbySearch()
+
+
+def configure_nearby_search(engine: Engine) -> NearbySearch:
+    """Make the backend chosen by NEARBY_BACKEND the process-wide one (no DDL)."""
+
+    global nearby_search
+    nearby_search = select_nearby_search(engine, get_settings().NEARBY_BACKEND)
+    return nearby_search
+
+
+def get_nearby_search() -> NearbySearch:
+    """Public accessor for the process-wide nearby-search backend."""
+
+    return nearby_search
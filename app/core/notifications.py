@@ -0,0 +1,388 @@
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import replies
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.core.outbox import outbox_handler
+from app.core.queries import workers_near_stmt
+from app.core.rate_limit import TokenBucket
+from app.core.utils import find_nearby_indices
+from app.models.models import User
+
+if TYPE_CHECKING:
+    import httpx
+
+    from app.core.twilio_rest import TwilioMessagingClient
+
+
+# Comentário (pt-BR):
+# Avisos ativos de vaga nova para os trabalhadores próximos.
+# Quando o admin cadastra uma vaga, a resposta do webhook sai na hora; o
+# evento "job_created" vai para o outbox (app.core.outbox) na mesma transação
+# e o consumidor chama o handler abaixo, em segundo plano:
+#
+#   fan_out() -> consulta os WORKERs no raio
+#             -> fila limitada de entregas
+#             -> NOTIFY_CONCURRENCY workers
+#             -> token bucket -> API REST do Twilio
+#
+# Erros temporários (429, 5xx, rede) são repetidos com backoff exponencial
+# e jitter; o restante conta como falha. O progresso de cada vaga (total,
+# enviados, falhas) fica disponível em `progress(job_id)`.
+#
+# O mesmo notifier repassa os pedidos de contato das construtoras (evento
+# "worker_contact", comando CONTATAR): um envio avulso, com o mesmo token
+# bucket e as mesmas novas tentativas.
+#
+# Entrega "pelo menos uma vez": se o processo cair no meio de um fan-out, o
+# evento do outbox volta a ficar disponível e a vaga é avisada de novo
+# (alguns trabalhadores podem receber o aviso duas vezes).
+
+
+@dataclass(frozen=True, slots=True)
+class JobAlert:
+    """
+    What the fan-out needs to know about a newly created job.
+    """
+
+    job_id: int
+    title: str
+    payment_offer: float
+    latitude: float
+    longitude: float
+
+
+@dataclass(slots=True)
+class FanoutProgress:
+    """
+    Delivery counters of one job's notification fan-out.
+
+    `total` is only final once `planned` is True (the worker lookup finished).
+    """
+
+    job_id: int
+    total: int = 0
+    sent: int = 0
+    failed: int = 0
+    planned: bool = False
+    started_at: float = field(default_factory=time.monotonic)
+    finished_at: float | None = None
+    finished: asyncio.Event = field(default_factory=asyncio.Event, repr=False, compare=False)
+
+    @property
+    def done(self) -> bool:
+        return self.planned and self.sent + self.failed >= self.total
+
+    def record(self, ok: bool) -> None:
+        if ok:
+            self.sent += 1
+        else:
+            self.failed += 1
+        self._check_done()
+
+    def _check_done(self) -> None:
+        if self.done and self.finished_at is None:
+            self.finished_at = time.monotonic()
+            self.finished.set()
+
+
+@dataclass(frozen=True, slots=True)
+class _Delivery:
+    job_id: int | None
+    to: str
+    body: str
+
+
+class JobNotifier:
+    """
+    Background pool that notifies nearby WORKER users about new jobs.
+    """
+
+    def __init__(
+        self,
+        radius_km: float,
+        concurrency: int,
+        rate_per_second: float,
+        burst: int,
+        max_attempts: int,
+        backoff_seconds: float,
+        queue_max: int,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.radius_km = radius_km
+        self.concurrency = concurrency
+        self.rate_per_second = rate_per_second
+        self.burst = burst
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.queue_max = queue_max
+        self._session_factory = session_factory
+
+        self._client: TwilioMessagingClient | None = None
+        self._owned_http: httpx.AsyncClient | None = None
+        self._bucket: TokenBucket | None = None
+        self._queue: asyncio.Queue[_Delivery] | None = None
+        self._workers: list[asyncio.Task[None]] = []
+        self._progress: TTLCache[int, FanoutProgress] = TTLCache(max_size=1000, ttl_seconds=86400)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._workers)
+
+    async def start(self, client: TwilioMessagingClient | None = None) -> None:
+        """
+        Start the worker pool on the running event loop.
+
+        Comentário (pt-BR):
+        Sem `client`, monta um cliente a partir das configurações do Twilio.
+        Se NOTIFY_ENABLED estiver desligado ou faltar SID/token/número, o
+        notifier fica parado: com NOTIFY_ENABLED=0 os avisos são descartados;
+        sem credenciais, ficam no outbox para um processo que as tenha.
+        """
+
+        if self.running:
+            return
+
+        if client is None:
+            settings = get_settings()
+            if not (
+                settings.NOTIFY_ENABLED
+                and settings.TWILIO_ACCOUNT_SID
+                and settings.TWILIO_AUTH_TOKEN
+                and settings.TWILIO_WHATSAPP_NUMBER
+            ):
+                return
+
+            # Import tardio: httpx só é carregado quando o notifier é usado.
+            import httpx
+
+            from app.core.twilio_rest import TwilioMessagingClient
+
+            self._owned_http = httpx.AsyncClient(timeout=10.0)
+            client = TwilioMessagingClient(
+                self._owned_http,
+                account_sid=settings.TWILIO_ACCOUNT_SID,
+                auth_token=settings.TWILIO_AUTH_TOKEN,
+                from_number=settings.TWILIO_WHATSAPP_NUMBER,
+                base_url=settings.TWILIO_API_BASE_URL,
+            )
+
+        self._client = client
+        self._bucket = TokenBucket(rate=self.rate_per_second, capacity=self.burst)
+        self._queue = asyncio.Queue(maxsize=self.queue_max)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Wait up to `timeout` seconds for pending sends, then shut down."""
+
+        if not self.running:
+            return
+        try:
+            await asyncio.wait_for(self.join(), timeout)
+        except asyncio.TimeoutError:
+            print("Avisos de vaga pendentes descartados no desligamento.")
+
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+        if self._owned_http is not None:
+            await self._owned_http.aclose()
+            self._owned_http = None
+        self._client = None
+
+    async def join(self) -> None:
+        """Wait until every queued delivery has been attempted."""
+
+        if self._queue is not None:
+            await self._queue.join()
+
+    async def fan_out(self, alert: JobAlert) -> FanoutProgress:
+        """
+        Notify every WORKER within the radius of a job and wait for the sends.
+
+        Comentário (pt-BR):
+        Erros ao consultar o banco são propagados (o outbox tenta de novo);
+        falhas de envio para um número já foram repetidas em `_deliver` e
+        ficam só contadas em `failed`.
+        """
+
+        if not self.running:
+            raise RuntimeError("JobNotifier não iniciado; chame start() antes.")
+        progress = await self._plan(alert)
+        await progress.finished.wait()
+        return progress
+
+    async def relay(self, to: str, body: str) -> bool:
+        """
+        Send one message outside any fan-out (same rate limit and retries).
+
+        Returns:
+            True se o Twilio aceitou a mensagem.
+        """
+
+        if not self.running:
+            raise RuntimeError("JobNotifier não iniciado; chame start() antes.")
+        return await self._deliver(_Delivery(None, to, body))
+
+    def progress(self, job_id: int) -> FanoutProgress | None:
+        """Delivery counters of a job's fan-out (kept for one day)."""
+
+        return self._progress.get(job_id)
+
+    async def _plan(self, alert: JobAlert) -> FanoutProgress:
+        async with self._session_factory() as db:
+            rows = (
+                await db.execute(workers_near_stmt(alert.latitude, alert.longitude, self.radius_km))
+            ).all()
+
+        progress = FanoutProgress(job_id=alert.job_id)
+        self._progress.set(alert.job_id, progress)
+
+        indices, distances = find_nearby_indices(
+            user_lat=alert.latitude,
+            user_lon=alert.longitude,
+            lats=[row.latitude for row in rows],
+            lons=[row.longitude for row in rows],
+            radius_km=self.radius_km,
+        )
+        progress.total = len(indices)
+        progress.planned = True
+        progress._check_done()
+
+        assert self._queue is not None
+        for i, distance in zip(indices, distances):
+            body = replies.JOB_ALERT.format(
+                title=alert.title,
+                payment_offer=alert.payment_offer,
+                distance_km=float(distance),
+            )
+            # Fila cheia: o fan-out espera aqui (nunca o webhook).
+            await self._queue.put(_Delivery(alert.job_id, rows[i].phone_number, body))
+        return progress
+
+    async def _worker(self) -> None:
+        assert self._queue is not None
+        while True:
+            delivery = await self._queue.get()
+            try:
+                ok = await self._deliver(delivery)
+            except Exception as exc:  # pragma: no cover - defensive guard
+                ok = False
+                print("Erro inesperado ao enviar aviso de vaga:", repr(exc))
+            finally:
+                self._queue.task_done()
+
+            progress = self._progress.get(delivery.job_id)
+            if progress is not None:
+                progress.record(ok)
+
+    async def _deliver(self, delivery: _Delivery) -> bool:
+        from app.core.twilio_rest import TwilioSendError
+
+        assert self._client is not None and self._bucket is not None
+        for attempt in range(1, self.max_attempts + 1):
+            await self._bucket.acquire()
+            try:
+                await self._client.send_whatsapp(delivery.to, delivery.body)
+                return True
+            except TwilioSendError as exc:
+                if not exc.retryable or attempt == self.max_attempts:
+                    what = f"Aviso da vaga {delivery.job_id}" if delivery.job_id is not None else "Mensagem"
+                    print(f"{what} para {delivery.to} falhou:", exc)
+                    return False
+                delay = self.backoff_seconds * 2 ** (attempt - 1) * random.uniform(1.0, 1.5)
+                await asyncio.sleep(max(delay, exc.retry_after or 0.0))
+        return False
+
+
+_settings = get_settings()
+
+job_notifier = JobNotifier(
+    radius_km=_settings.NOTIFY_RADIUS_KM,
+    concurrency=_settings.NOTIFY_CONCURRENCY,
+    rate_per_second=_settings.NOTIFY_RATE_PER_SECOND,
+    burst=_settings.NOTIFY_BURST,
+    max_attempts=_settings.NOTIFY_MAX_ATTEMPTS,
+    backoff_seconds=_settings.NOTIFY_BACKOFF_SECONDS,
+    queue_max=_settings.NOTIFY_QUEUE_MAX,
+)
+
+
+def get_job_notifier() -> JobNotifier:
+    """Public accessor for the process-wide job notifier."""
+
+    return job_notifier
+
+
+def _notifier_ready() -> bool:
+    # Com NOTIFY_ENABLED desligado de propósito, os eventos são consumidos
+    # (e descartados) normalmente; caso contrário, só com o notifier de pé.
+    return job_notifier.running or not get_settings().NOTIFY_ENABLED
+
+
+@outbox_handler("job_created", ready=_notifier_ready)
+async def handle_job_created(payload: dict) -> None:
+    """
+    Outbox handler: avisa os trabalhadores próximos de uma vaga nova.
+
+    Comentário (pt-BR):
+    Processos sem notifier (ex.: sem TWILIO_WHATSAPP_NUMBER) não pegam
+    estes eventos (`_notifier_ready`); eles esperam por um processo que
+    consiga enviar. Se o notifier parar entre a coleta e a execução, o
+    erro devolve o evento para nova tentativa. Só com NOTIFY_ENABLED=0 o
+    evento é descartado.
+    """
+
+    notifier = get_job_notifier()
+    if not notifier.running:
+        if not get_settings().NOTIFY_ENABLED:
+            return
+        raise RuntimeError("JobNotifier parado; o aviso da vaga fica para depois.")
+    await notifier.fan_out(JobAlert(**payload))
+
+
+@outbox_handler("worker_contact", ready=_notifier_ready)
+async def handle_worker_contact(payload: dict) -> None:
+    """
+    Outbox handler: repassa a um trabalhador o contato de uma construtora.
+
+    Comentário (pt-BR):
+    É o CONTATAR da lista de TRABALHADORES: a construtora nunca vê o
+    telefone do trabalhador; ele recebe o nome e o número dela e decide se
+    responde. Mesmas regras do aviso de vaga quando o notifier está parado.
+    """
+
+    notifier = get_job_notifier()
+    if not notifier.running:
+        if not get_settings().NOTIFY_ENABLED:
+            return
+        raise RuntimeError("JobNotifier parado; o pedido de contato fica para depois.")
+
+    async with AsyncSessionLocal() as db:
+        contractor = (
+            await db.execute(
+                select(User.full_name, User.phone_number).where(User.id == payload["contractor_id"])
+            )
+        ).first()
+    if contractor is None:
+        return  # construtora apagada depois do pedido
+
+    body = replies.WORKER_CONTACT_REQUEST.format(
+        name=contractor.full_name,
+        phone=contractor.phone_number.removeprefix("whatsapp:"),
+    )
+    if not await notifier.relay(payload["worker_phone"], body):
+        raise RuntimeError("Pedido de contato não entregue; fica para nova tentativa.")
@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Awaitable, Callable
+from datetime import datetime, timedelta
+from typing import Any
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.models.models import OutboxEvent, OutboxStatus
+
+
+# Comentário (pt-BR):
+# Outbox transacional: efeitos colaterais lentos (avisos, métricas,
+# geocodificação...) não rodam dentro do webhook.
+#
+# - O webhook grava um OutboxEvent na MESMA transação da mudança de estado
+#   (`enqueue_event`). Se o commit falhar, o evento também não existe; se der
+#   certo, o evento com certeza será executado.
+# - Um consumidor em segundo plano pega eventos em lotes e chama o handler
+#   registrado para o tópico (`@outbox_handler("topico")`).
+# - Pegar um evento = gravar `claimed_until` (concessão). No PostgreSQL a
+#   seleção usa `FOR UPDATE SKIP LOCKED`, então vários consumidores dividem
+#   os lotes sem esperar um pelo outro; no SQLite (sem SKIP LOCKED) o UPDATE
+#   condicional garante que só um consumidor leva cada evento.
+# - Enquanto o handler roda, a concessão é renovada a cada terço de
+#   OUTBOX_LEASE_SECONDS: um fan-out longo (milhares de avisos a
+#   NOTIFY_RATE_PER_SECOND) não é pego de novo por outro consumidor.
+# - Cada evento roda na sua própria tarefa, com no máximo `batch_size` ao
+#   mesmo tempo; assim que um termina, o consumidor pega outro. Um evento
+#   lento não segura os demais atrás dele.
+# - Entrega "pelo menos uma vez": se o consumidor morrer no meio, a
+#   concessão expira e o evento roda de novo. Handlers devem tolerar repetição.
+# - Falhas são repetidas com backoff exponencial até OUTBOX_MAX_ATTEMPTS;
+#   depois disso o evento fica como FAILED (com o último erro) para análise.
+
+
+OutboxHandler = Callable[[dict[str, Any]], Awaitable[None]]
+
+_HANDLERS: dict[str, OutboxHandler] = {}
+_READY_CHECKS: dict[str, Callable[[], bool]] = {}
+
+
+def outbox_handler(
+    topic: str,
+    ready: Callable[[], bool] | None = None,
+) -> Callable[[OutboxHandler], OutboxHandler]:
+    """
+    Register the coroutine that runs the events of `topic`.
+
+    Comentário (pt-BR):
+    `ready`, se informado, diz se este processo consegue rodar o tópico
+    agora (ex.: o notifier está de pé). Enquanto for False, o consumidor
+    não pega eventos do tópico: eles ficam pendentes para outro processo
+    ou para quando o handler ficar pronto.
+    """
+
+    def register(handler: OutboxHandler) -> OutboxHandler:
+        _HANDLERS[topic] = handler
+        if ready is None:
+            _READY_CHECKS.pop(topic, None)
+        else:
+            _READY_CHECKS[topic] = ready
+        return handler
+
+    return register
+
+
+def _unready_topics() -> list[str]:
+    return [topic for topic, ready in _READY_CHECKS.items() if not ready()]
+
+
+def enqueue_event(db: AsyncSession, topic: str, payload: dict[str, Any]) -> OutboxEvent:
+    """
+    Add an outbox event to the caller's session (committed with its transaction).
+
+    O payload precisa ser serializável em JSON.
+    """
+
+    event = OutboxEvent(topic=topic, payload=payload, status=OutboxStatus.PENDING)
+    db.add(event)
+    return event
+
+
+class OutboxConsumer:
+    """
+    Background loop that claims pending outbox events and runs their handlers.
+    """
+
+    def __init__(
+        self,
+        batch_size: int,
+        poll_seconds: float,
+        lease_seconds: float,
+        max_attempts: int,
+        retry_seconds: float,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.batch_size = batch_size
+        self.poll_seconds = poll_seconds
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_seconds = retry_seconds
+        self._session_factory = session_factory
+
+        self._task: asyncio.Task[None] | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._stopping = False
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """Start the consumer loop on the running event loop."""
+
+        if self.running:
+            return
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """
+        Let the running events finish (up to `timeout` seconds), then stop.
+
+        Comentário (pt-BR):
+        Eventos interrompidos continuam com a concessão; rodam de novo quando
+        ela expirar.
+        """
+
+        if self._task is None:
+            return
+        self._stopping = True
+        self.wake()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    def wake(self) -> None:
+        """Skip the rest of the polling interval (e.g. right after a commit)."""
+
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def run(self) -> None:
+        """Claim and process events until `stop()` is called."""
+
+        if self._wakeup is None:
+            self._wakeup = asyncio.Event()
+        inflight: set[asyncio.Task[None]] = set()
+
+        def on_done(task: asyncio.Task[None]) -> None:
+            inflight.discard(task)
+            self.wake()  # vaga livre: pega o próximo evento
+
+        try:
+            while not self._stopping:
+                free = self.batch_size - len(inflight)
+                claimed: list[Any] = []
+                if free > 0:
+                    try:
+                        claimed = await self._claim(limit=free)
+                    except Exception as exc:  # pragma: no cover - defensive guard
+                        print("Erro no consumidor do outbox:", repr(exc))
+                    for row in claimed:
+                        task = asyncio.create_task(self._process(*row))
+                        inflight.add(task)
+                        task.add_done_callback(on_done)
+
+                # Todas as vagas preenchidas: provavelmente há mais eventos.
+                if claimed and len(claimed) == free:
+                    continue
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.poll_seconds)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+        finally:
+            # Desligando: os eventos em andamento terminam (ou são cancelados
+            # junto com esta tarefa pelo timeout de `stop`).
+            if inflight:
+                await asyncio.gather(*inflight, return_exceptions=True)
+
+    async def run_once(self) -> int:
+        """Claim one batch, run it concurrently and return how many events ran."""
+
+        claimed = await self._claim()
+        if claimed:
+            await asyncio.gather(*(self._process(*row) for row in claimed))
+        return len(claimed)
+
+    async def _claim(self, limit: int | None = None) -> list[Any]:
+        now = datetime.utcnow()
+        available = (
+            OutboxEvent.status == OutboxStatus.PENDING,
+            OutboxEvent.available_at <= now,
+            or_(OutboxEvent.claimed_until.is_(None), OutboxEvent.claimed_until < now),
+        )
+        unready = _unready_topics()
+        if unready:
+            available = (*available, OutboxEvent.topic.not_in(unready))
+
+        async with self._session_factory() as db:
+            ids = (
+                await db.scalars(
+                    select(OutboxEvent.id)
+                    .where(*available)
+                    .order_by(OutboxEvent.id)
+                    .limit(limit or self.batch_size)
+                    .with_for_update(skip_locked=True)
+                )
+            ).all()
+            if not ids:
+                return []
+
+            rows = (
+                await db.execute(
+                    update(OutboxEvent)
+                    .where(OutboxEvent.id.in_(ids), *available)
+                    .values(
+                        claimed_until=now + timedelta(seconds=self.lease_seconds),
+                        attempts=OutboxEvent.attempts + 1,
+                    )
+                    .returning(
+                        OutboxEvent.id,
+                        OutboxEvent.topic,
+                        OutboxEvent.payload,
+                        OutboxEvent.attempts,
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+            ).all()
+            await db.commit()
+        return rows
+
+    async def _process(self, event_id: int, topic: str, payload: dict[str, Any], attempts: int) -> None:
+        handler = _HANDLERS.get(topic)
+        renewal = asyncio.create_task(self._renew_lease(event_id))
+        error: Exception | None = None
+        try:
+            if handler is None:
+                raise LookupError(f"Nenhum handler registrado para o tópico {topic!r}")
+            await handler(payload)
+        except Exception as exc:
+            error = exc
+        finally:
+            renewal.cancel()
+            await asyncio.gather(renewal, return_exceptions=True)
+
+        if error is not None:
+            print(f"Evento {event_id} ({topic}) do outbox falhou:", repr(error))
+        await self._finish(event_id, error=error, attempts=attempts)
+
+    async def _renew_lease(self, event_id: int) -> None:
+        """Extend the claim of a running event every third of the lease."""
+
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            try:
+                async with self._session_factory() as db:
+                    await db.execute(
+                        update(OutboxEvent)
+                        .where(OutboxEvent.id == event_id, OutboxEvent.status == OutboxStatus.PENDING)
+                        .values(claimed_until=datetime.utcnow() + timedelta(seconds=self.lease_seconds))
+                        .execution_options(synchronize_session=False)
+                    )
+                    await db.commit()
+            except Exception as exc:  # pragma: no cover - defensive guard
+                print(f"Erro ao renovar a concessão do evento {event_id} do outbox:", repr(exc))
+
+    async def _finish(self, event_id: int, error: Exception | None = None, attempts: int = 0) -> None:
+        if error is None:
+            values: dict[str, Any] = {"status": OutboxStatus.DONE, "last_error": None}
+        elif attempts >= self.max_attempts:
+            values = {"status": OutboxStatus.FAILED, "last_error": repr(error)[:2000]}
+        else:
+            delay = self.retry_seconds * 2 ** (attempts - 1)
+            values = {
+                "available_at": datetime.utcnow() + timedelta(seconds=delay),
+                "claimed_until": None,
+                "last_error": repr(error)[:2000],
+            }
+
+        async with self._session_factory() as db:
+            await db.execute(
+                update(OutboxEvent)
+                .where(OutboxEvent.id == event_id)
+                .values(**values)
+                .execution_options(synchronize_session=False)
+            )
+            await db.commit()
+
+
+_settings = get_settings()
+
+outbox_consumer = OutboxConsumer(
+    batch_size=_settings.OUTBOX_BATCH_SIZE,
+    poll_seconds=_settings.OUTBOX_POLL_SECONDS,
+    lease_seconds=_settings.OUTBOX_LEASE_SECONDS,
+    max_attempts=_settings.OUTBOX_MAX_ATTEMPTS,
+    retry_seconds=_settings.OUTBOX_RETRY_SECONDS,
+)
+
+
+def get_outbox_consumer() -> OutboxConsumer:
+    """Public accessor for the process-wide outbox consumer."""
+
+    return outbox_consumer
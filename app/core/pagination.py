@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import heapq
+from collections.abc import Iterable
+from typing import Generic, TypeVar
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+
+
+# Comentário (pt-BR):
+# Paginação das vagas mais próximas ("VAGAS" e depois "MAIS").
+# Em vez de ordenar todos os candidatos, montamos um heap (O(n)) e retiramos
+# apenas K itens por página (O(K log n)). O heap restante fica guardado por
+# telefone em um cache com TTL, então o "MAIS" não refaz a busca.
+
+
+T = TypeVar("T")
+
+
+class NearestCursor(Generic[T]):
+    """
+    Min-heap of (distance, item) pairs consumed one page at a time.
+    """
+
+    __slots__ = ("_heap",)
+
+    def __init__(self, matches: Iterable[tuple[T, float]]) -> None:
+        # O índice `i` desempata distâncias iguais sem comparar os itens.
+        self._heap: list[tuple[float, int, T]] = [
+            (distance, i, item) for i, (item, distance) in enumerate(matches)
+        ]
+        heapq.heapify(self._heap)
+
+    @classmethod
+    def restore(cls, snapshot: tuple[tuple[float, int, T], ...]) -> "NearestCursor[T]":
+        """Rebuild a cursor from `snapshot()` without re-heapifying."""
+
+        cursor = cls.__new__(cls)
+        cursor._heap = list(snapshot)
+        return cursor
+
+    def snapshot(self) -> tuple[tuple[float, int, T], ...]:
+        """Immutable copy of the remaining items (already in heap order)."""
+
+        return tuple(self._heap)
+
+    @property
+    def remaining(self) -> int:
+        """How many items have not been returned yet."""
+
+        return len(self._heap)
+
+    def next_page(self, size: int) -> list[tuple[T, float]]:
+        """Pop the next `size` nearest items as (item, distance) pairs."""
+
+        heap = self._heap
+        return [
+            (item, distance)
+            for distance, _i, item in (heapq.heappop(heap) for _ in range(min(size, len(heap))))
+        ]
+
+
+_settings = get_settings()
+
+# Cursores de "MAIS" por telefone (por processo).
+vagas_cursors: TTLCache[str, NearestCursor] = TTLCache(
+    max_size=_settings.VAGAS_CURSOR_MAX_ENTRIES,
+    ttl_seconds=_settings.VAGAS_CURSOR_TTL_SECONDS,
+)
+
+
+def get_vagas_cursors() -> TTLCache[str, NearestCursor]:
+    """Public accessor for the per-phone VAGAS cursor cache."""
+
+    return vagas_cursors
@@ -0,0 +1,143 @@
+import math
+from typing import NamedTuple
+
+from sqlalchemy import ColumnElement, Select, literal_column, select
+
+from app.core.utils import bounding_box, grid_cells_covering
+from app.models.models import JobOpportunity, JobStatus, User, UserType
+
+
+# Comentário (pt-BR):
+# Este módulo reúne as consultas SQL "geográficas" usadas pelo bot.
+# As funções aqui apenas montam os statements (SQLAlchemy 2.0 `select()`);
+# quem executa é o chamador, com a sessão que ele já possui.
+
+
+# Acima deste número de células (raios enormes ou regiões polares) o filtro
+# por IN deixa de compensar e usamos apenas a bounding box.
+MAX_GRID_CELLS_PER_QUERY: int = 64
+
+
+class JobRow(NamedTuple):
+    """
+    Column-projected open job: only what a VAGAS reply needs.
+
+    Comentário (pt-BR):
+    Sem identity map, sem rastreamento de mudanças e sem a descrição (até
+    2000 caracteres): uma tupla com 5 campos. É o que a busca no banco
+    devolve e o que fica guardado nos cursores do MAIS.
+    """
+
+    id: int
+    title: str
+    payment_offer: float
+    latitude: float
+    longitude: float
+
+
+# Colunas de JobRow, na mesma ordem dos campos.
+JOB_ROW_COLUMNS = (
+    JobOpportunity.id,
+    JobOpportunity.title,
+    JobOpportunity.payment_offer,
+    JobOpportunity.latitude,
+    JobOpportunity.longitude,
+)
+
+
+def job_is_open() -> ColumnElement[bool]:
+    """
+    `status = 'OPEN'` with the value inlined, matching the partial indexes.
+
+    Comentário (pt-BR):
+    PostgreSQL (com planos genéricos de prepared statements) e SQLite só
+    usam um índice parcial quando a consulta repete a condição dele; com o
+    valor vindo como parâmetro, o índice parcial é ignorado.
+    """
+
+    return JobOpportunity.status == literal_column(f"'{JobStatus.OPEN.value}'")
+
+
+def open_jobs_near_stmt(
+    lat: float,
+    lon: float,
+    radius_km: float,
+) -> Select[tuple[int, str, float, float, float]]:
+    """
+    Build the prefiltered query for open jobs around a point.
+
+    Args:
+        lat: Latitude do usuário.
+        lon: Longitude do usuário.
+        radius_km: Raio de busca, em quilômetros.
+
+    Returns:
+        Statement que retorna as colunas de `JobRow` das vagas OPEN das
+        células/bounding box que cobrem o raio. O resultado ainda precisa do
+        filtro exato (`find_nearby_jobs`), pois a caixa é maior que o círculo.
+    """
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+
+    stmt = select(*JOB_ROW_COLUMNS).where(
+        job_is_open(),
+        JobOpportunity.latitude.between(min_lat, max_lat),
+        JobOpportunity.longitude.between(min_lon, max_lon),
+    )
+
+    cells = grid_cells_covering(lat, lon, radius_km)
+    if len(cells) <= MAX_GRID_CELLS_PER_QUERY:
+        stmt = stmt.where(JobOpportunity.grid_cell.in_(cells))
+
+    return stmt
+
+
+def workers_near_stmt(
+    lat: float,
+    lon: float,
+    radius_km: float,
+    limit: int | None = None,
+) -> Select[tuple[str, str, float, float]]:
+    """
+    Build the prefiltered query for registered WORKER users around a point.
+
+    Args:
+        lat: Latitude de referência (vaga ou construtora).
+        lon: Longitude de referência.
+        radius_km: Raio de busca, em quilômetros.
+        limit: Se informado, retorna só os `limit` candidatos mais próximos
+            (pela distância aproximada calculada no próprio banco).
+
+    Returns:
+        Statement com (phone_number, full_name, latitude, longitude) dos
+        trabalhadores com cadastro concluído (MAIN_MENU e nome preenchido)
+        dentro da bounding box do raio. Como em `open_jobs_near_stmt`, o
+        filtro exato por distância fica com o chamador.
+
+    Comentário (pt-BR):
+    A tabela de usuários é bem maior que a de vagas, então a consulta é
+    desenhada para o índice ix_users_user_type_lat_lon (user_type + faixa de
+    latitude/longitude). Com `limit`, a ordenação usa a aproximação
+    equiretangular (graus² com a longitude escalada por cos(lat)), que em
+    raios de poucos km ordena praticamente igual ao Haversine.
+    """
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+
+    stmt = select(User.phone_number, User.full_name, User.latitude, User.longitude).where(
+        User.user_type == UserType.WORKER,
+        User.latitude.between(min_lat, max_lat),
+        User.longitude.between(min_lon, max_lon),
+        # Cadastro pela metade (ainda escolhendo o tipo ou digitando o nome)
+        # não aparece para construtoras nem recebe avisos de vaga.
+        User.conversation_stage == "MAIN_MENU",
+        User.full_name != "",
+    )
+
+    if limit is not None:
+        lon_scale = math.cos(math.radians(lat))
+        d_lat = User.latitude - lat
+        d_lon = (User.longitude - lon) * lon_scale
+        stmt = stmt.order_by(d_lat * d_lat + d_lon * d_lon).limit(limit)
+
+    return stmt
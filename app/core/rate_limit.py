@@ -0,0 +1,55 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import Callable
+
+
+# Comentário (pt-BR):
+# Limitador de taxa "token bucket" para chamadas de saída (API do Twilio).
+# O balde enche a `rate` fichas por segundo até `capacity`; cada envio gasta
+# uma ficha. Assim permitimos rajadas curtas (até `capacity`) sem passar da
+# taxa média contratada com o Twilio.
+
+
+class TokenBucket:
+    """
+    Async token-bucket rate limiter.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        if rate <= 0 or capacity < 1:
+            raise ValueError("rate deve ser positivo e capacity >= 1")
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated_at = clock()
+        # Quem está esperando ficha espera em fila (ordem de chegada).
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated_at) * self.rate)
+        self._updated_at = now
+
+    def try_acquire(self) -> bool:
+        """Take one token if available, without waiting."""
+
+        self._refill()
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+    async def acquire(self) -> None:
+        """Wait until one token is available and take it."""
+
+        async with self._lock:
+            while not self.try_acquire():
+                await asyncio.sleep((1 - self._tokens) / self.rate)
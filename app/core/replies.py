@@ -0,0 +1,178 @@
+from __future__ import annotations
+
+from string import Formatter
+from xml.sax.saxutils import escape
+
+
+# Comentário (pt-BR):
+# Catálogo central das respostas do bot (textos em pt-BR) e renderização
+# do TwiML enviado de volta ao Twilio.
+#
+# A maioria das respostas é fixa; o XML delas é gerado uma única vez, no
+# import do módulo, e reaproveitado como bytes em todos os requests.
+# Respostas dinâmicas (lista de vagas, confirmação de vaga criada) usam um
+# template com o texto já escapado, escapando apenas os valores inseridos.
+#
+# O formato é idêntico ao de `twilio.twiml.messaging_response.MessagingResponse`
+# com uma única <Message>.
+
+
+_TWIML_PREFIX = '<?xml version="1.0" encoding="UTF-8"?><Response><Message>'
+_TWIML_SUFFIX = "</Message></Response>"
+
+
+def render_twiml(message: str) -> bytes:
+    """
+    Render a single-message TwiML document as UTF-8 bytes.
+
+    Comentário (pt-BR):
+    Escapa &, < e > no texto, como o ElementTree usado pelo MessagingResponse.
+    """
+
+    return f"{_TWIML_PREFIX}{escape(message)}{_TWIML_SUFFIX}".encode("utf-8")
+
+
+class ReplyTemplate:
+    """
+    One bot reply, pre-rendered to TwiML when it has no placeholders.
+
+    Static replies expose the final bytes in `body`; templates with
+    `{placeholders}` are rendered per request with `render(**values)`.
+    """
+
+    __slots__ = ("text", "body", "_escaped_template")
+
+    def __init__(self, text: str) -> None:
+        self.text = text
+        has_fields = any(field is not None for _, field, _, _ in Formatter().parse(text))
+        self._escaped_template = f"{_TWIML_PREFIX}{escape(text)}{_TWIML_SUFFIX}"
+        self.body: bytes | None = None if has_fields else self._escaped_template.encode("utf-8")
+
+    def render(self, **values: object) -> bytes:
+        """Return the TwiML bytes, escaping only the substituted values."""
+
+        if self.body is not None:
+            return self.body
+        escaped = {name: escape(str(value)) for name, value in values.items()}
+        return self._escaped_template.format(**escaped).encode("utf-8")
+
+
+# ----------------------------------------------------------------------
+# Cadastro
+# ----------------------------------------------------------------------
+WELCOME = ReplyTemplate(
+    "Olá! Bem-vindo ao Contech Bot. "
+    "Você busca OPORTUNIDADES ou quer CONTRATAR?"
+)
+WELCOME_BACK = ReplyTemplate("Olá novamente! Você busca OPORTUNIDADES ou quer CONTRATAR?")
+ASK_WORKER_NAME = ReplyTemplate("Perfeito! Qual seu nome completo?")
+ASK_CONTRACTOR_NAME = ReplyTemplate("Ótimo! Qual o nome completo do responsável pela contratação?")
+CHOOSING_TYPE_NOT_UNDERSTOOD = ReplyTemplate(
+    "Não entendi. Responda OPORTUNIDADES se você busca trabalho "
+    "ou CONTRATAR se você quer encontrar profissionais."
+)
+NAME_REQUIRED = ReplyTemplate("Por favor, envie seu nome completo para continuar o cadastro.")
+REGISTRATION_DONE = ReplyTemplate("Cadastro concluído! Digite VAGAS para ver obras próximas.")
+CONTRACTOR_REGISTRATION_DONE = ReplyTemplate(
+    "Cadastro concluído! Envie sua Localização e digite TRABALHADORES "
+    "para ver profissionais próximos."
+)
+STAGE_RESET = ReplyTemplate(
+    "Houve um problema ao entender seu estágio de conversa. "
+    "Vamos recomeçar. Você busca OPORTUNIDADES ou quer CONTRATAR?"
+)
+
+# ----------------------------------------------------------------------
+# Localização e VAGAS
+# ----------------------------------------------------------------------
+LOCATION_RECEIVED = ReplyTemplate(
+    "Localização recebida! Agora digite VAGAS para ver obras ao seu redor."
+)
+LOCATION_REQUIRED = ReplyTemplate(
+    "Para encontrar obras próximas, preciso saber onde você está. "
+    "Por favor, clique no clipe (anexo) e me envie sua Localização."
+)
+NO_JOBS_NEARBY = ReplyTemplate(
+    "Não encontramos vagas próximas no momento. "
+    "Tente novamente mais tarde."
+)
+NO_MORE_JOBS = ReplyTemplate(
+    "Não há mais vagas para mostrar. "
+    "Digite VAGAS para buscar novamente."
+)
+MAIN_MENU_UNKNOWN = ReplyTemplate(
+    "Opção não reconhecida. No momento, você pode digitar VAGAS "
+    "para ver oportunidades próximas."
+)
+
+# Partes do texto da lista de vagas (montada por página).
+VAGAS_HEADER = "Encontrei as seguintes vagas próximas a você:"
+VAGAS_MORE_HEADER = "Mais vagas próximas a você:"
+VAGAS_LINE = "- {title} (R$ {payment_offer:.2f}) - {distance_km:.1f} km"
+VAGAS_FOOTER = "Digite MAIS para ver outras {remaining} vaga(s)."
+
+# ----------------------------------------------------------------------
+# TRABALHADORES (construtoras)
+# ----------------------------------------------------------------------
+CONTRACTOR_LOCATION_RECEIVED = ReplyTemplate(
+    "Localização recebida! Agora digite TRABALHADORES para ver profissionais próximos."
+)
+WORKERS_LOCATION_REQUIRED = ReplyTemplate(
+    "Para encontrar profissionais próximos, preciso saber onde fica a obra. "
+    "Por favor, clique no clipe (anexo) e me envie a Localização."
+)
+NO_WORKERS_NEARBY = ReplyTemplate(
+    "Não encontramos trabalhadores próximos no momento. "
+    "Tente novamente mais tarde."
+)
+CONTRACTOR_MENU_UNKNOWN = ReplyTemplate(
+    "Opção não reconhecida. No momento, você pode digitar TRABALHADORES "
+    "para ver profissionais próximos."
+)
+WORKER_CONTACT_SENT = ReplyTemplate(
+    "Pronto! Passei o seu contato para {name}. "
+    "Se tiver interesse, o profissional vai te chamar aqui no WhatsApp."
+)
+WORKER_CONTACT_UNAVAILABLE = ReplyTemplate(
+    "No momento não consigo repassar contatos. "
+    "Tente novamente mais tarde."
+)
+WORKER_CONTACT_UNKNOWN = ReplyTemplate(
+    "Não encontrei esse número na lista. "
+    "Digite TRABALHADORES para ver a lista de novo."
+)
+
+# Partes do texto da lista de trabalhadores. O telefone do trabalhador
+# nunca aparece: a construtora pede o contato e o bot repassa (CONTATAR).
+WORKERS_HEADER = "Trabalhadores próximos à sua obra:"
+WORKERS_LINE = "{position}. {name} - {distance_km:.1f} km"
+WORKERS_FOOTER = (
+    "Para falar com um deles, digite CONTATAR e o número da lista (ex.: CONTATAR 1). "
+    "Eu passo o seu contato para o profissional."
+)
+
+# ----------------------------------------------------------------------
+# Modo admin
+# ----------------------------------------------------------------------
+ADMIN_MODE = ReplyTemplate(
+    "🛠️ Modo Admin: Para criar uma nova vaga, digite o Cargo e o Valor "
+    "separados por vírgula. Ex: Encanador, 150.00"
+)
+ADMIN_INVALID_FORMAT = ReplyTemplate("Formato inválido. Tente novamente: Cargo, Valor")
+JOB_CREATED = ReplyTemplate(
+    "✅ Vaga de {title} cadastrada com sucesso! "
+    "Ela já aparece para os trabalhadores próximos."
+)
+
+# ----------------------------------------------------------------------
+# Mensagens ativas (enviadas pela API REST do Twilio, fora do webhook)
+# ----------------------------------------------------------------------
+# Texto puro, sem TwiML.
+JOB_ALERT = (
+    "📢 Nova vaga perto de você: {title} (R$ {payment_offer:.2f}) - {distance_km:.1f} km. "
+    "Digite VAGAS para ver as oportunidades."
+)
+WORKER_CONTACT_REQUEST = (
+    "👷 A construtora {name} ({phone}) viu o seu cadastro e quer falar com você "
+    "sobre um trabalho perto daqui. Se tiver interesse, é só chamar nesse número."
+)
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import math
+import threading
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.core.metrics import VAGAS_REPLY_CACHE
+from app.core.utils import haversine
+from app.models.models import JobOpportunity
+
+
+# Comentário (pt-BR):
+# Cache das respostas de VAGAS por célula de localização.
+# Trabalhadores da mesma obra (ou do mesmo bairro) pedem VAGAS com poucos
+# minutos de diferença. A localização é quantizada numa célula fixa de
+# `cell_deg` graus; a busca roda a partir do centro da célula e a resposta
+# (TwiML já pronto + o restante do cursor do MAIS) fica guardada por
+# (célula, raio). Um acerto é uma consulta de dict: sem banco e sem conta
+# geográfica.
+#
+# Preço: as distâncias mostradas são medidas do centro da célula, com erro
+# de no máximo meia diagonal da célula (~200 m no padrão).
+#
+# Invalidação: qualquer INSERT/UPDATE/DELETE de JobOpportunity via ORM
+# (vaga nova no fluxo admin, vaga que sai de OPEN) remove, após o commit,
+# as células cujo raio alcança a posição da vaga. UPDATEs em massa (Core)
+# não disparam os eventos: quem faz isso chama `invalidate_near` ou
+# `clear`. Escritas de outros processos só aparecem após o TTL.
+
+
+CellKey = tuple[int, int, float]
+
+
+@dataclass(frozen=True, slots=True)
+class VagasReply:
+    """
+    A rendered first VAGAS page plus the rest of its cursor (heap order).
+    """
+
+    body: bytes
+    remaining: tuple[tuple[float, int, Any], ...]
+
+
+class VagasReplyCache:
+    """
+    Per-process cache of VAGAS replies keyed by a quantized location cell.
+    """
+
+    def __init__(self, cell_deg: float, max_size: int, ttl_seconds: float) -> None:
+        self.cell_deg = cell_deg
+        self._entries: TTLCache[CellKey, VagasReply] = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+        self._lock = threading.Lock()
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def generation(self) -> int:
+        """Bumped on every invalidation; see `set`."""
+
+        return self._generation
+
+    def key_for(self, lat: float, lon: float, radius_km: float) -> CellKey:
+        """Cell containing (lat, lon) for a search of `radius_km`."""
+
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg), radius_km)
+
+    def center_of(self, key: CellKey) -> tuple[float, float]:
+        """Coordinates the search of a cell is run from."""
+
+        row, col, _radius = key
+        return ((row + 0.5) * self.cell_deg, (col + 0.5) * self.cell_deg)
+
+    def get(self, key: CellKey) -> VagasReply | None:
+        reply = self._entries.get(key)
+        if reply is None:
+            self.misses += 1
+            VAGAS_REPLY_CACHE.labels("miss").inc()
+        else:
+            self.hits += 1
+            VAGAS_REPLY_CACHE.labels("hit").inc()
+        return reply
+
+    def set(self, key: CellKey, reply: VagasReply, generation: int) -> None:
+        """
+        Store a reply computed while `generation` was current.
+
+        Comentário (pt-BR):
+        Se uma vaga foi gravada enquanto a busca rodava, a resposta pode já
+        estar velha; nesse caso ela simplesmente não é guardada.
+        """
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries.set(key, reply)
+
+    def invalidate_near(self, lat: float, lon: float) -> int:
+        """Drop every cell whose search radius reaches (lat, lon)."""
+
+        # Meia diagonal da célula, em km (no pior caso, perto do equador).
+        slack_km = self.cell_deg * 111.32 * math.sqrt(2) / 2
+
+        def reaches(key: CellKey) -> bool:
+            center_lat, center_lon = self.center_of(key)
+            return haversine(center_lat, center_lon, lat, lon) <= key[2] + slack_km
+
+        with self._lock:
+            self._generation += 1
+            return self._entries.discard_where(reaches)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._generation += 1
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+_settings = get_settings()
+
+vagas_reply_cache = VagasReplyCache(
+    cell_deg=_settings.VAGAS_REPLY_CACHE_CELL_DEG,
+    max_size=_settings.VAGAS_REPLY_CACHE_MAX_ENTRIES,
+    ttl_seconds=_settings.VAGAS_REPLY_CACHE_TTL_SECONDS,
+)
+
+
+def get_vagas_reply_cache() -> VagasReplyCache:
+    """Public accessor for the process-wide VAGAS reply cache."""
+
+    return vagas_reply_cache
+
+
+# ----------------------------------------------------------------------
+# Invalidação automática com escritas via ORM
+# ----------------------------------------------------------------------
+# Comentário (pt-BR):
+# Mesmo esquema do índice de vagas (app.core.geo_index): as posições
+# afetadas são anotadas em `session.info` durante o flush e aplicadas só
+# depois do commit.
+
+_SESSION_POINTS_KEY = "vagas_reply_cache_points"
+
+
+def _record_points(session: Session | None, target: JobOpportunity) -> None:
+    if session is None:
+        return
+    points: set[tuple[float, float]] = session.info.setdefault(_SESSION_POINTS_KEY, set())
+    points.add((target.latitude, target.longitude))
+
+    # Vaga que mudou de lugar: a posição antiga também é afetada.
+    state = inspect(target)
+    old_lat = state.attrs.latitude.history.deleted
+    old_lon = state.attrs.longitude.history.deleted
+    if old_lat or old_lon:
+        points.add(
+            (
+                old_lat[0] if old_lat else target.latitude,
+                old_lon[0] if old_lon else target.longitude,
+            )
+        )
+
+
+@event.listens_for(JobOpportunity, "after_insert")
+@event.listens_for(JobOpportunity, "after_update")
+@event.listens_for(JobOpportunity, "after_delete")
+def _on_job_written(mapper, connection, target: JobOpportunity) -> None:  # noqa: ANN001
+    _record_points(Session.object_session(target), target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_after_commit(session: Session) -> None:
+    points: set[tuple[float, float]] | None = session.info.pop(_SESSION_POINTS_KEY, None)
+    for lat, lon in points or ():
+        vagas_reply_cache.invalidate_near(lat, lon)
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_points_after_rollback(session: Session, previous_transaction) -> None:  # noqa: ANN001
+    session.info.pop(_SESSION_POINTS_KEY, None)
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Engine, Integer, MetaData, String, Table, select
+from sqlalchemy.engine import Dialect
+from sqlalchemy.exc import OperationalError, ProgrammingError
+from sqlalchemy.schema import CreateIndex, CreateTable
+
+from app.core.config import get_settings
+from app.core.database import Base
+from app.core.nearby import install_nearby_search, nearby_backend_name
+from app.models import models as _models  # noqa: F401  # Import registers ORM models
+
+
+# Comentário (pt-BR):
+# Versão do schema gravada no próprio banco, para pular o DDL no boot.
+# `create_all` faz uma consulta de reflexão por tabela em todo startup de
+# worker; com o autoscaling isso vira tempo de cold start. Aqui calculamos
+# uma impressão digital (hash) do DDL dos modelos e guardamos na tabela
+# schema_version. Se o banco já tem a mesma impressão, nada é executado.
+#
+# Limitações (as mesmas do create_all): só cria tabelas/índices que faltam,
+# não altera colunas existentes. Uma tabela apagada à mão com a impressão
+# intacta não é recriada; apague também a linha de schema_version.
+#
+# O DDL do backend espacial da busca de vagas (app.core.nearby) também
+# roda aqui, e o nome do backend entra na impressão digital: trocar
+# NEARBY_BACKEND reinstala uma vez, e o startup dos workers não repete o
+# DDL (no PostgreSQL, o ALTER TABLE pega um lock exclusivo na tabela).
+
+
+# Tabela fora de Base.metadata: não entra no hash nem no create_all dos modelos.
+_version_metadata = MetaData()
+
+schema_version_table = Table(
+    "schema_version",
+    _version_metadata,
+    Column("id", Integer, primary_key=True),
+    Column("fingerprint", String(64), nullable=False),
+    Column("applied_at", DateTime(timezone=True), nullable=False),
+)
+
+
+def schema_fingerprint(dialect: Dialect, nearby_backend: str = "") -> str:
+    """
+    SHA-256 of the CREATE TABLE / CREATE INDEX statements of every model.
+    """
+
+    digest = hashlib.sha256(f"nearby:{nearby_backend}".encode("utf-8"))
+    for table in Base.metadata.sorted_tables:
+        digest.update(str(CreateTable(table).compile(dialect=dialect)).encode("utf-8"))
+        for index in sorted(table.indexes, key=lambda index: index.name or ""):
+            digest.update(str(CreateIndex(index).compile(dialect=dialect)).encode("utf-8"))
+    return digest.hexdigest()
+
+
+def ensure_schema(engine: Engine) -> bool:
+    """
+    Create missing tables unless the database already has this schema version.
+
+    Returns:
+        True se o DDL foi executado, False se o schema já estava em dia
+        (apenas um SELECT).
+    """
+
+    nearby_backend = nearby_backend_name(engine.dialect.name, get_settings().NEARBY_BACKEND)
+    fingerprint = schema_fingerprint(engine.dialect, nearby_backend)
+
+    with engine.connect() as conn:
+        try:
+            current = conn.execute(
+                select(schema_version_table.c.fingerprint).where(schema_version_table.c.id == 1)
+            ).scalar()
+        except (OperationalError, ProgrammingError):
+            # Banco novo: a tabela schema_version ainda não existe.
+            conn.rollback()
+            current = None
+
+    if current == fingerprint:
+        return False
+
+    Base.metadata.create_all(bind=engine)
+    _version_metadata.create_all(bind=engine)
+    install_nearby_search(engine, nearby_backend)
+    with engine.begin() as conn:
+        conn.execute(schema_version_table.delete())
+        conn.execute(
+            schema_version_table.insert().values(
+                id=1,
+                fingerprint=fingerprint,
+                applied_at=datetime.utcnow(),
+            )
+        )
+    return True
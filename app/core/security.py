@@ -0,0 +1,205 @@
+from __future__ import annotations
+
+import base64
+import hashlib
+import hmac
+import json
+import time
+from urllib.parse import parse_qs, urlsplit, urlunsplit
+
+from starlette.datastructures import URL
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import get_settings
+from app.core.metrics import SIGNATURE_SECONDS
+
+
+# Comentário (pt-BR):
+# Validação da assinatura do Twilio (X-Twilio-Signature) como middleware ASGI
+# "puro", executado antes do roteamento, da injeção de dependências e da
+# criação de sessão de banco. Uma requisição forjada custa só a leitura do
+# corpo e um HMAC, em vez de um request completo do FastAPI.
+#
+# O algoritmo é o mesmo de `twilio.request_validator.RequestValidator`:
+#   assinatura = base64(HMAC-SHA1(auth_token, url + chave1 + valor1 + ...))
+# com as chaves (e valores repetidos) em ordem alfabética, aceitando a URL
+# com e sem a porta padrão explícita.
+#
+# O corpo é lido uma única vez; o form já parseado segue para a rota em
+# `request.state.twilio_form` e o corpo original é reentregue ao app.
+
+
+# Limite de tamanho do corpo do webhook. O Twilio envia poucos KB; qualquer
+# coisa muito maior é lixo e é rejeitada sem ser lida inteira.
+MAX_BODY_BYTES: int = 64 * 1024
+
+# Chave em `scope["state"]` onde o form validado é entregue à rota.
+TWILIO_FORM_STATE_KEY = "twilio_form"
+
+
+class TwilioSignatureVerifier:
+    """
+    Computes and checks Twilio request signatures with a pre-keyed HMAC.
+    """
+
+    def __init__(self, auth_token: str) -> None:
+        # O HMAC com a chave já processada é criado uma vez e copiado a cada uso.
+        self._keyed_mac = hmac.new(auth_token.encode("utf-8"), digestmod=hashlib.sha1)
+
+    def compute_signature(self, url: str, params: dict[str, list[str]]) -> str:
+        """Return the base64 signature Twilio would send for `url` + `params`."""
+
+        mac = self._keyed_mac.copy()
+        mac.update(url.encode("utf-8"))
+        for name in sorted(params):
+            encoded_name = name.encode("utf-8")
+            for value in sorted(set(params[name])):
+                mac.update(encoded_name)
+                mac.update(value.encode("utf-8"))
+        return base64.b64encode(mac.digest()).decode("ascii")
+
+    def is_valid(self, url: str, params: dict[str, list[str]], signature: str) -> bool:
+        """Check `signature` against the URL with and without its default port."""
+
+        for candidate_url in _url_variants(url):
+            expected = self.compute_signature(candidate_url, params)
+            if hmac.compare_digest(expected.encode("ascii"), signature.encode("utf-8", "replace")):
+                return True
+        return False
+
+
+def _url_variants(url: str) -> tuple[str, ...]:
+    """
+    The URL as received plus its with/without default-port twin.
+
+    Comentário (pt-BR):
+    O Twilio às vezes assina a URL com a porta explícita (":443") e às vezes
+    sem; a biblioteca oficial aceita as duas formas, e nós também.
+    """
+
+    parts = urlsplit(url)
+    if parts.port is None:
+        default_port = 443 if parts.scheme == "https" else 80
+        other = parts._replace(netloc=f"{parts.netloc}:{default_port}")
+    else:
+        other = parts._replace(netloc=parts.netloc.rsplit(":", 1)[0])
+    return url, urlunsplit(other)
+
+
+class TwilioSignatureMiddleware:
+    """
+    Pure ASGI middleware that rejects unsigned/forged Twilio webhook calls.
+
+    Only `POST` requests to `path` are checked; everything else passes
+    straight through.
+    """
+
+    def __init__(self, app: ASGIApp, path: str = "/webhook") -> None:
+        self.app = app
+        self.path = path
+
+        settings = get_settings()
+        configured = bool(settings.TWILIO_ACCOUNT_SID and settings.TWILIO_AUTH_TOKEN)
+        self._verifier = TwilioSignatureVerifier(settings.TWILIO_AUTH_TOKEN) if configured else None
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] != self.path:
+            await self.app(scope, receive, send)
+            return
+
+        if self._verifier is None:
+            await _send_json(
+                send,
+                500,
+                "Configuração do Twilio ausente. Verifique as variáveis de ambiente.",
+            )
+            return
+
+        signature = _header(scope, b"x-twilio-signature")
+        if not signature:
+            await _send_json(send, 403, "Forbidden")
+            return
+
+        body = await _read_body(receive)
+        if body is None:
+            await _send_json(send, 413, "Payload Too Large")
+            return
+
+        started = time.perf_counter()
+        try:
+            params = parse_qs(body.decode("utf-8"), keep_blank_values=True, strict_parsing=False)
+        except UnicodeDecodeError:
+            params = None
+
+        # Mesmo cálculo de URL que `request.url` faria (host, esquema, query).
+        valid = params is not None and self._verifier.is_valid(
+            str(URL(scope=scope)), params, signature.decode("latin-1")
+        )
+        SIGNATURE_SECONDS.labels("valid" if valid else "invalid").observe(time.perf_counter() - started)
+        if not valid:
+            await _send_json(send, 403, "Forbidden")
+            return
+
+        # Importante: os valores seguem como strings, exatamente como assinados.
+        scope.setdefault("state", {})[TWILIO_FORM_STATE_KEY] = {
+            name: values[0] for name, values in params.items()
+        }
+        await self.app(scope, _replay_body(body, receive), send)
+
+
+def _header(scope: Scope, name: bytes) -> bytes | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+async def _read_body(receive: Receive) -> bytes | None:
+    """Read the whole request body, or None if it exceeds MAX_BODY_BYTES."""
+
+    chunks: list[bytes] = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            break
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            return None
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    """Hand the already-read body to the downstream app exactly once."""
+
+    delivered = False
+
+    async def replay() -> Message:
+        nonlocal delivered
+        if not delivered:
+            delivered = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        return await receive()
+
+    return replay
+
+
+async def _send_json(send: Send, status_code: int, detail: str) -> None:
+    """Same JSON shape FastAPI uses for HTTPException (`{"detail": ...}`)."""
+
+    payload = json.dumps({"detail": detail}, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+    await send(
+        {
+            "type": "http.response.start",
+            "status": status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(payload)).encode("ascii")),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": payload})
@@ -0,0 +1,158 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, fields, replace
+from typing import Any
+
+from sqlalchemy import Insert, Select, Update, insert, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+
+from app.core.cache import TTLCache
+from app.core.config import get_settings
+from app.models.models import User, UserType
+
+
+# Comentário (pt-BR):
+# Cache do estado de conversa por telefone.
+# A busca do usuário pelo número é o único custo fixo em 100% das mensagens
+# do webhook. Guardamos aqui apenas o necessário para a máquina de estados
+# (id, tipo, estágio e localização); o nome e o resto continuam só no banco.
+#
+# Regras de consistência:
+# - Write-through: quem grava no banco atualiza o cache depois do commit.
+# - Se o commit falhar, a entrada é removida (a próxima mensagem relê).
+# - Cada worker tem o seu cache; o TTL limita por quanto tempo um worker
+#   pode enxergar um estágio antigo escrito por outro processo.
+# - Toda gravação é um compare-and-set do estágio (ver update_user_state_stmt):
+#   se outro processo já mudou o estágio, o UPDATE não afeta nenhuma linha e
+#   a mensagem é reprocessada com o estado relido do banco.
+
+
+@dataclass(frozen=True, slots=True)
+class UserState:
+    """
+    Conversation state of one WhatsApp user, as cached per phone number.
+
+    The field order matches `user_state_stmt`, so a result row can be
+    unpacked directly: `UserState(*row)`.
+    """
+
+    id: int
+    phone_number: str
+    user_type: UserType
+    conversation_stage: str
+    latitude: float | None
+    longitude: float | None
+
+    def evolve(self, **values: Any) -> UserState:
+        """
+        Return a copy with the given column values applied.
+
+        Valores de colunas que não fazem parte do estado (ex.: `full_name`)
+        são ignorados, para que o mesmo dicionário do UPDATE possa ser usado.
+        """
+
+        return replace(self, **{k: v for k, v in values.items() if k in _STATE_FIELDS})
+
+
+class StaleUserStateError(Exception):
+    """
+    Raised when a state write finds the stored stage changed underneath it.
+
+    Comentário (pt-BR):
+    Significa que o estado usado (normalmente vindo do cache) estava velho;
+    o chamador deve descartar o cache do telefone e reprocessar a mensagem.
+    """
+
+
+_STATE_FIELDS: frozenset[str] = frozenset(f.name for f in fields(UserState))
+
+
+# Colunas de `users` na mesma ordem dos campos de UserState.
+_STATE_COLUMNS = (
+    User.id,
+    User.phone_number,
+    User.user_type,
+    User.conversation_stage,
+    User.latitude,
+    User.longitude,
+)
+
+# Estágio inicial de quem manda a primeira mensagem (já recebe o menu de tipo).
+FIRST_CONTACT_STAGE: str = "CHOOSING_TYPE"
+
+
+def user_state_stmt(phone_number: str) -> Select[Any]:
+    """
+    SELECT of only the columns in `UserState` for one phone number.
+    """
+
+    return select(*_STATE_COLUMNS).where(User.phone_number == phone_number)
+
+
+def insert_user_state_stmt(dialect_name: str, phone_number: str) -> Insert:
+    """
+    INSERT of a first-contact user that returns the new `UserState` row.
+
+    Comentário (pt-BR):
+    No SQLite e no PostgreSQL usamos `INSERT ... ON CONFLICT (phone_number)
+    DO NOTHING RETURNING ...`: se duas primeiras mensagens do mesmo número
+    chegarem juntas, só uma cria o usuário e a outra recebe zero linhas (em
+    vez de estourar a constraint UNIQUE). Em outros bancos cai num INSERT
+    comum, e o chamador deve tratar IntegrityError.
+    """
+
+    values = {
+        "phone_number": phone_number,
+        "user_type": UserType.WORKER,
+        "full_name": "",
+        "conversation_stage": FIRST_CONTACT_STAGE,
+    }
+
+    if dialect_name == "postgresql":
+        stmt = postgresql.insert(User).values(**values).on_conflict_do_nothing(
+            index_elements=[User.phone_number]
+        )
+    elif dialect_name == "sqlite":
+        stmt = sqlite.insert(User).values(**values).on_conflict_do_nothing(
+            index_elements=[User.phone_number]
+        )
+    else:
+        stmt = insert(User).values(**values)
+
+    return stmt.returning(*_STATE_COLUMNS)
+
+
+def update_user_state_stmt(state: UserState, **values: Any) -> Update:
+    """
+    Compare-and-set UPDATE of one user that returns the new `UserState` row.
+
+    Comentário (pt-BR):
+    Só altera a linha se o estágio no banco ainda for o estágio que a
+    máquina de estados leu (`state.conversation_stage`). Zero linhas de
+    retorno significa estado velho (ver StaleUserStateError). O RETURNING
+    devolve o estado gravado, que vai direto para o cache.
+    """
+
+    return (
+        update(User)
+        .where(
+            User.id == state.id,
+            User.conversation_stage.is_not_distinct_from(state.conversation_stage),
+        )
+        .values(**values)
+        .returning(*_STATE_COLUMNS)
+    )
+
+
+_settings = get_settings()
+
+user_state_cache: TTLCache[str, UserState] = TTLCache(
+    max_size=_settings.USER_STATE_CACHE_MAX_ENTRIES,
+    ttl_seconds=_settings.USER_STATE_CACHE_TTL_SECONDS,
+)
+
+
+def get_user_state_cache() -> TTLCache[str, UserState]:
+    """Public accessor for the per-phone conversation state cache."""
+
+    return user_state_cache
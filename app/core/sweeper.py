@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+from sqlalchemy import DateTime, delete, insert, literal, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal
+from app.core.geo_index import get_open_job_index
+from app.core.queries import job_is_open
+from app.core.reply_cache import get_vagas_reply_cache
+from app.models.models import ArchivedJobOpportunity, JobOpportunity, JobStatus
+
+
+# Comentário (pt-BR):
+# Sweeper de vagas antigas: mantém pequena a tabela de vagas vivas.
+#
+# 1) Vagas OPEN criadas há mais de `max_age_days` dias viram CLOSED.
+# 2) Vagas fora de OPEN (CLOSED/FILLED) são copiadas para
+#    job_opportunities_archive e apagadas da tabela principal.
+#
+# Tudo em lotes de `batch_size`, cada lote na sua própria transação, para
+# não segurar locks por muito tempo. No PostgreSQL a seleção usa
+# `FOR UPDATE SKIP LOCKED`, então vários processos podem rodar o sweeper
+# ao mesmo tempo sem pegar as mesmas linhas.
+#
+# Os UPDATEs são em massa (Core), sem passar pelos eventos do ORM; por isso,
+# depois de fechar vagas, o índice de vagas e o cache de respostas de VAGAS
+# deste processo são descartados. Os outros processos se atualizam pelo TTL.
+#
+# Uso avulso (ex.: cron), uma passada só:
+#   python -m app.core.sweeper
+
+
+@dataclass(frozen=True, slots=True)
+class SweepResult:
+    """How many jobs one sweep closed and archived."""
+
+    closed: int
+    archived: int
+
+
+class JobSweeper:
+    """
+    Periodically closes stale open jobs and archives non-open ones.
+    """
+
+    def __init__(
+        self,
+        max_age_days: float,
+        interval_seconds: float,
+        batch_size: int,
+        session_factory: Callable[[], AsyncSession] = AsyncSessionLocal,
+    ) -> None:
+        self.max_age_days = max_age_days
+        self.interval_seconds = interval_seconds
+        self.batch_size = batch_size
+        self._session_factory = session_factory
+
+        self._task: asyncio.Task[None] | None = None
+        self._stopping: asyncio.Event | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self) -> None:
+        """Start the periodic sweep on the running event loop."""
+
+        if self.running:
+            return
+        self._stopping = asyncio.Event()
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self, timeout: float = 10.0) -> None:
+        """Let the current batch finish (up to `timeout` seconds), then stop."""
+
+        if self._task is None:
+            return
+        assert self._stopping is not None
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(asyncio.shield(self._task), timeout)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+
+    async def run(self) -> None:
+        """Sweep every `interval_seconds` until `stop()` is called."""
+
+        if self._stopping is None:
+            self._stopping = asyncio.Event()
+        while not self._stopping.is_set():
+            try:
+                result = await self.run_once()
+                if result.closed or result.archived:
+                    print(f"Sweeper: {result.closed} vaga(s) encerrada(s), {result.archived} arquivada(s).")
+            except Exception as exc:  # pragma: no cover - defensive guard
+                print("Erro no sweeper de vagas:", repr(exc))
+
+            try:
+                await asyncio.wait_for(self._stopping.wait(), self.interval_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_once(self, now: datetime | None = None) -> SweepResult:
+        """Close stale jobs, then archive every non-open job."""
+
+        now = now or datetime.utcnow()
+        closed = await self.close_stale(now)
+        archived = await self.archive_closed(now)
+        return SweepResult(closed=closed, archived=archived)
+
+    async def close_stale(self, now: datetime) -> int:
+        """Mark open jobs created before the age cutoff as CLOSED."""
+
+        cutoff = now - timedelta(days=self.max_age_days)
+        closed = 0
+        while not self._should_stop():
+            async with self._session_factory() as db:
+                ids = (
+                    await db.scalars(
+                        select(JobOpportunity.id)
+                        .where(job_is_open(), JobOpportunity.created_at < cutoff)
+                        .order_by(JobOpportunity.created_at)
+                        .limit(self.batch_size)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).all()
+                if not ids:
+                    break
+
+                result = await db.execute(
+                    update(JobOpportunity)
+                    .where(JobOpportunity.id.in_(ids), job_is_open())
+                    .values(status=JobStatus.CLOSED)
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+
+            closed += result.rowcount
+            if len(ids) < self.batch_size:
+                break
+
+        if closed:
+            # As vagas encerradas ainda estão no índice e nas respostas em cache.
+            get_open_job_index().invalidate()
+            get_vagas_reply_cache().clear()
+        return closed
+
+    async def archive_closed(self, now: datetime) -> int:
+        """Move non-open jobs to the archive table, one batch per transaction."""
+
+        columns = [
+            "id",
+            "title",
+            "description",
+            "payment_offer",
+            "latitude",
+            "longitude",
+            "grid_cell",
+            "contractor_id",
+            "status",
+            "created_at",
+        ]
+        archived = 0
+        while not self._should_stop():
+            async with self._session_factory() as db:
+                ids = (
+                    await db.scalars(
+                        select(JobOpportunity.id)
+                        .where(~job_is_open())
+                        .order_by(JobOpportunity.id)
+                        .limit(self.batch_size)
+                        .with_for_update(skip_locked=True)
+                    )
+                ).all()
+                if not ids:
+                    break
+
+                await db.execute(
+                    insert(ArchivedJobOpportunity).from_select(
+                        [*columns, "archived_at"],
+                        select(
+                            *(getattr(JobOpportunity, name) for name in columns),
+                            literal(now, DateTime(timezone=True)),
+                        ).where(JobOpportunity.id.in_(ids)),
+                    )
+                )
+                await db.execute(
+                    delete(JobOpportunity)
+                    .where(JobOpportunity.id.in_(ids))
+                    .execution_options(synchronize_session=False)
+                )
+                await db.commit()
+
+            archived += len(ids)
+            if len(ids) < self.batch_size:
+                break
+        return archived
+
+    def _should_stop(self) -> bool:
+        return self._stopping is not None and self._stopping.is_set()
+
+
+_settings = get_settings()
+
+job_sweeper = JobSweeper(
+    max_age_days=_settings.JOB_MAX_AGE_DAYS,
+    interval_seconds=_settings.JOB_SWEEP_INTERVAL_SECONDS,
+    batch_size=_settings.JOB_SWEEP_BATCH_SIZE,
+)
+
+
+def get_job_sweeper() -> JobSweeper:
+    """Public accessor for the process-wide job sweeper."""
+
+    return job_sweeper
+
+
+async def _sweep_once() -> None:
+    from app.core.database import engine
+    from app.core.schema import ensure_schema
+
+    ensure_schema(engine)
+    result = await get_job_sweeper().run_once()
+    print(f"{result.closed} vaga(s) encerrada(s), {result.archived} arquivada(s).")
+
+
+if __name__ == "__main__":
+    asyncio.run(_sweep_once())
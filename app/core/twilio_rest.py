@@ -0,0 +1,98 @@
+from __future__ import annotations
+
+import httpx
+
+
+# Comentário (pt-BR):
+# Cliente mínimo e assíncrono da API REST de mensagens do Twilio.
+# Usamos httpx direto (em vez do SDK `twilio`, que é síncrono) para que os
+# envios rodem no event loop sem ocupar threads. Só o que o bot precisa:
+# enviar uma mensagem de WhatsApp e classificar o erro como temporário ou não.
+
+
+# Status HTTP que valem nova tentativa (limite de taxa e falhas do Twilio).
+RETRYABLE_STATUS: frozenset[int] = frozenset({429, 500, 502, 503, 504})
+
+
+class TwilioSendError(Exception):
+    """
+    A message could not be sent through the Twilio REST API.
+
+    `retryable` tells whether trying again later may succeed; `retry_after`
+    carries the server's Retry-After hint, in seconds, when it sent one.
+    """
+
+    def __init__(
+        self,
+        message: str,
+        status_code: int | None = None,
+        retryable: bool = False,
+        retry_after: float | None = None,
+    ) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def whatsapp_address(number: str) -> str:
+    """Prefix a phone number with `whatsapp:` unless it already has it."""
+
+    return number if number.startswith("whatsapp:") else f"whatsapp:{number}"
+
+
+class TwilioMessagingClient:
+    """
+    Sends WhatsApp messages through `POST /2010-04-01/Accounts/{sid}/Messages.json`.
+
+    The caller owns `http` (an `httpx.AsyncClient`) and closes it; tests pass
+    one wired to a fake Twilio ASGI app.
+    """
+
+    def __init__(
+        self,
+        http: httpx.AsyncClient,
+        account_sid: str,
+        auth_token: str,
+        from_number: str,
+        base_url: str = "https://api.twilio.com",
+    ) -> None:
+        self._http = http
+        self._auth = httpx.BasicAuth(account_sid, auth_token)
+        self._from = whatsapp_address(from_number)
+        self._url = f"{base_url.rstrip('/')}/2010-04-01/Accounts/{account_sid}/Messages.json"
+
+    async def send_whatsapp(self, to: str, body: str) -> str:
+        """
+        Send one message and return its Twilio SID.
+
+        Raises:
+            TwilioSendError: resposta de erro do Twilio ou falha de rede.
+        """
+
+        try:
+            response = await self._http.post(
+                self._url,
+                data={"From": self._from, "To": whatsapp_address(to), "Body": body},
+                auth=self._auth,
+            )
+        except httpx.TransportError as exc:
+            raise TwilioSendError(f"Falha de rede: {exc!r}", retryable=True) from exc
+
+        if response.status_code >= 400:
+            raise TwilioSendError(
+                f"Twilio respondeu {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+                retryable=response.status_code in RETRYABLE_STATUS,
+                retry_after=_retry_after(response),
+            )
+
+        return str(response.json().get("sid", ""))
+
+
+def _retry_after(response: httpx.Response) -> float | None:
+    raw = response.headers.get("Retry-After")
+    try:
+        return None if raw is None else max(0.0, float(raw))
+    except ValueError:
+        return None
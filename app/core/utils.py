@@ -1,18 +1,40 @@
+from __future__ import annotations
+
 import math
 from collections.abc import Iterable
-from typing import List
+from typing import TYPE_CHECKING, TypeVar
+
+import numpy as np
+from numpy.typing import ArrayLike, NDArray
 
-from app.models.models import JobOpportunity
+if TYPE_CHECKING:
+    from app.core.queries import JobRow
+    from app.models.models import JobOpportunity
 
 
 # Comentário (pt-BR):
 # Este módulo concentra utilitários de geolocalização, incluindo:
 # - Cálculo de distância entre dois pontos (Haversine)
 # - Filtro de oportunidades de trabalho próximas a um usuário
+# - Versões vetorizadas (NumPy) do Haversine e do filtro, para lotes grandes
+# - Grade fixa (grid cells) e bounding box para pré-filtrar buscas no banco
+#
+# Os imports de JobOpportunity/JobRow são feitos apenas para type hints, pois
+# o módulo de modelos importa as funções de grade daqui (evita import circular).
 
 
 EARTH_RADIUS_KM: float = 6371.0
 
+# Tamanho (em graus) de cada célula da grade fixa usada para indexar vagas.
+# 0.1° equivale a ~11 km de latitude, então um raio de 10 km cobre no máximo
+# uma vizinhança 3x3 de células na maior parte do Brasil.
+GRID_CELL_DEG: float = 0.1
+GRID_ROWS: int = int(round(180.0 / GRID_CELL_DEG))
+GRID_COLS: int = int(round(360.0 / GRID_CELL_DEG))
+
+# Objetos ORM completos ou linhas projetadas (app.core.queries.JobRow).
+JobLike = TypeVar("JobLike", "JobOpportunity", "JobRow")
+
 
 def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
     """
@@ -61,20 +83,20 @@ def haversine(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
 def find_nearby_jobs(
     user_lat: float,
     user_lon: float,
-    jobs: Iterable[JobOpportunity],
+    jobs: Iterable[JobLike],
     radius_km: float = 10.0,
-) -> list[JobOpportunity]:
+) -> list[JobLike]:
     """
     Filter job opportunities that are within a given radius (in kilometers).
 
     Args:
         user_lat: Latitude do usuário.
         user_lon: Longitude do usuário.
-        jobs: Iterable de objetos JobOpportunity (normalmente vindos do banco).
+        jobs: Iterable de JobOpportunity ou de JobRow (normalmente vindos do banco).
         radius_km: Raio máximo de busca, em quilômetros.
 
     Returns:
-        Lista de JobOpportunity que estão dentro do raio especificado.
+        Lista, do mesmo tipo da entrada, com as vagas dentro do raio especificado.
 
     Comentário (pt-BR):
     Esta função não faz acesso ao banco diretamente; ela apenas recebe
@@ -82,7 +104,7 @@ def find_nearby_jobs(
     o filtro em memória. Isso facilita o teste unitário e a reutilização.
     """
 
-    nearby: list[JobOpportunity] = []
+    nearby: list[JobLike] = []
 
     for job in jobs:
         # Por segurança, ignoramos registros sem coordenadas válidas.
@@ -96,3 +118,149 @@ def find_nearby_jobs(
 
     return nearby
 
+
+def haversine_many(
+    lat: float,
+    lon: float,
+    lats: ArrayLike,
+    lons: ArrayLike,
+) -> NDArray[np.float64]:
+    """
+    Vectorized Haversine: distance (km) from one point to many points at once.
+
+    Args:
+        lat: Latitude do ponto de origem (graus decimais).
+        lon: Longitude do ponto de origem (graus decimais).
+        lats: Array (ou sequência) de latitudes de destino.
+        lons: Array (ou sequência) de longitudes de destino, mesmo tamanho.
+
+    Returns:
+        Array float64 com a distância em km para cada destino.
+
+    Comentário (pt-BR):
+    É a mesma fórmula de `haversine`, mas aplicada em um único passe NumPy
+    sobre todos os pontos, sem laço Python por linha.
+    """
+
+    lat1_rad = math.radians(lat)
+    lon1_rad = math.radians(lon)
+    lat2_rad = np.radians(np.asarray(lats, dtype=np.float64))
+    lon2_rad = np.radians(np.asarray(lons, dtype=np.float64))
+
+    a = (
+        np.sin((lat2_rad - lat1_rad) / 2) ** 2
+        + math.cos(lat1_rad) * np.cos(lat2_rad) * np.sin((lon2_rad - lon1_rad) / 2) ** 2
+    )
+    # `minimum` protege o arcsin de valores ligeiramente > 1 por arredondamento.
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.minimum(a, 1.0)))
+
+
+def find_nearby_indices(
+    user_lat: float,
+    user_lon: float,
+    lats: ArrayLike,
+    lons: ArrayLike,
+    radius_km: float = 10.0,
+) -> tuple[NDArray[np.intp], NDArray[np.float64]]:
+    """
+    Array-based variant of `find_nearby_jobs`.
+
+    Args:
+        user_lat: Latitude do usuário.
+        user_lon: Longitude do usuário.
+        lats: Latitudes dos candidatos.
+        lons: Longitudes dos candidatos.
+        radius_km: Raio máximo de busca, em quilômetros.
+
+    Returns:
+        Tupla (índices, distâncias): posições dos candidatos dentro do raio,
+        na ordem original, e a distância em km de cada um deles.
+
+    Comentário (pt-BR):
+    Coordenadas ausentes devem vir como NaN; elas nunca passam no filtro,
+    assim como os registros sem coordenadas em `find_nearby_jobs`.
+    """
+
+    distances = haversine_many(user_lat, user_lon, lats, lons)
+    indices = np.flatnonzero(distances <= radius_km)
+    return indices, distances[indices]
+
+
+def grid_cell(lat: float, lon: float) -> int:
+    """
+    Map a coordinate to the integer id of its fixed-size grid cell.
+
+    Args:
+        lat: Latitude em graus decimais.
+        lon: Longitude em graus decimais.
+
+    Returns:
+        Identificador inteiro da célula (linha * GRID_COLS + coluna).
+
+    Comentário (pt-BR):
+    A grade é fixa e global, então o mesmo ponto sempre cai na mesma célula.
+    Isso permite guardar o id da célula numa coluna indexada e buscar por
+    igualdade (IN) em vez de varrer a tabela inteira.
+    """
+
+    row = min(int(math.floor((lat + 90.0) / GRID_CELL_DEG)), GRID_ROWS - 1)
+    col = int(math.floor((lon + 180.0) / GRID_CELL_DEG)) % GRID_COLS
+    return row * GRID_COLS + col
+
+
+def bounding_box(
+    lat: float,
+    lon: float,
+    radius_km: float,
+) -> tuple[float, float, float, float]:
+    """
+    Compute a lat/lon bounding box that fully contains a circle of `radius_km`.
+
+    Returns:
+        Tupla (min_lat, max_lat, min_lon, max_lon) em graus decimais.
+
+    Comentário (pt-BR):
+    A caixa é uma aproximação "para fora": todo ponto dentro do raio está
+    dentro da caixa, mas o contrário não é verdade. Por isso, depois do
+    pré-filtro no banco, ainda aplicamos o Haversine exato.
+    Perto dos polos (ou quando o raio passa do antimeridiano) a faixa de
+    longitude é expandida para o globo inteiro, por segurança.
+    """
+
+    delta_lat = math.degrees(radius_km / EARTH_RADIUS_KM)
+    min_lat = max(lat - delta_lat, -90.0)
+    max_lat = min(lat + delta_lat, 90.0)
+
+    cos_lat = math.cos(math.radians(max(abs(min_lat), abs(max_lat))))
+    if cos_lat <= 1e-12:
+        return min_lat, max_lat, -180.0, 180.0
+
+    delta_lon = math.degrees(radius_km / (EARTH_RADIUS_KM * cos_lat))
+    min_lon = lon - delta_lon
+    max_lon = lon + delta_lon
+    if delta_lon >= 180.0 or min_lon < -180.0 or max_lon > 180.0:
+        return min_lat, max_lat, -180.0, 180.0
+
+    return min_lat, max_lat, min_lon, max_lon
+
+
+def grid_cells_covering(lat: float, lon: float, radius_km: float) -> list[int]:
+    """
+    List every grid cell that intersects the bounding box of the search circle.
+
+    Returns:
+        Lista de ids de células (ver `grid_cell`) que cobrem o raio informado.
+    """
+
+    min_lat, max_lat, min_lon, max_lon = bounding_box(lat, lon, radius_km)
+
+    first_row = int(math.floor((min_lat + 90.0) / GRID_CELL_DEG))
+    last_row = min(int(math.floor((max_lat + 90.0) / GRID_CELL_DEG)), GRID_ROWS - 1)
+    first_col = int(math.floor((min_lon + 180.0) / GRID_CELL_DEG))
+    last_col = min(int(math.floor((max_lon + 180.0) / GRID_CELL_DEG)), GRID_COLS - 1)
+
+    return [
+        row * GRID_COLS + col
+        for row in range(first_row, last_row + 1)
+        for col in range(first_col, last_col + 1)
+    ]
@@ -0,0 +1,77 @@
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import text
+
+from app.core.config import get_settings
+from app.core.database import AsyncSessionLocal, async_engine
+from app.core.geo_index import get_open_job_index
+from app.core.security import TwilioSignatureVerifier
+from app.schemas.whatsapp import TwilioWebhookForm
+
+
+# Comentário (pt-BR):
+# Aquecimento de um worker recém-iniciado.
+# A primeira conexão do pool assíncrono (o pool das rotas) é aberta no
+# lifespan, antes de o worker aceitar requisições (`open_first_connection`).
+# O resto roda como tarefa em segundo plano: o worker já responde ao
+# /health (e entra no balanceador) enquanto isto prepara o que a primeira
+# mensagem do webhook usaria a frio:
+# - as demais conexões do pool assíncrono (handshake TCP/TLS/autenticação
+#   do Postgres);
+# - índice espacial de vagas (carga do banco + import do scipy);
+# - validação do form e cálculo de assinatura do Twilio.
+
+
+async def _open_connections(count: int) -> None:
+    async def ping() -> None:
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # Conexões abertas ao mesmo tempo ficam todas no pool quando devolvidas.
+    await asyncio.gather(*(ping() for _ in range(count)))
+
+
+def _warm_request_path() -> None:
+    sample = {"From": "whatsapp:+5500000000000", "Body": "oi", "MessageSid": "SMwarmup"}
+    TwilioWebhookForm.model_validate(sample)
+    TwilioSignatureVerifier("warmup").compute_signature(
+        "https://example.com/webhook",
+        {name: [value] for name, value in sample.items()},
+    )
+
+
+async def open_first_connection() -> None:
+    """
+    Open one async-pool connection before the worker accepts requests.
+
+    Falhas são apenas registradas: o aquecimento nunca derruba o worker.
+    """
+
+    if get_settings().STARTUP_PREWARM_CONNECTIONS <= 0:
+        return
+    try:
+        await _open_connections(1)
+    except Exception as exc:  # pragma: no cover - defensive guard
+        print("Primeira conexão do worker falhou:", repr(exc))
+
+
+async def warm_up() -> None:
+    """
+    Pre-warm the pool, the open-job index and the webhook request path.
+
+    Falhas são apenas registradas: o aquecimento nunca derruba o worker.
+    """
+
+    settings = get_settings()
+    try:
+        _warm_request_path()
+        if settings.STARTUP_PREWARM_CONNECTIONS > 0:
+            await _open_connections(settings.STARTUP_PREWARM_CONNECTIONS)
+        if settings.JOB_INDEX_ENABLED:
+            job_index = get_open_job_index()
+            async with AsyncSessionLocal() as db:
+                await job_index.refresh(db)
+    except Exception as exc:  # pragma: no cover - defensive guard
+        print("Aquecimento do worker falhou:", repr(exc))
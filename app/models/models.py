@@ -8,12 +8,18 @@ from sqlalchemy import (
     Enum,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    JSON,
+    LargeBinary,
     String,
+    event,
+    text,
 )
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.core.database import Base
+from app.core.utils import grid_cell
 
 
 # Comentário (pt-BR):
@@ -21,6 +27,9 @@ from app.core.database import Base
 # As classes abaixo representam as tabelas principais do sistema:
 # - User: usuários do bot (trabalhadores e construtoras)
 # - JobOpportunity: oportunidades de trabalho criadas por construtoras
+# - ProcessedMessage: respostas já enviadas por MessageSid (idempotência)
+# - OutboxEvent: efeitos colaterais a executar depois do commit (outbox)
+# - ArchivedJobOpportunity: vagas encerradas retiradas da tabela principal
 
 
 class UserType(str, PyEnum):
@@ -38,6 +47,18 @@ class JobStatus(str, PyEnum):
     FILLED = "FILLED"
 
 
+class OutboxStatus(str, PyEnum):
+    """Lifecycle of an outbox event."""
+
+    PENDING = "PENDING"
+    DONE = "DONE"
+    FAILED = "FAILED"
+
+
+# Condição SQL das vagas vivas, usada nos índices parciais e nas consultas.
+OPEN_JOB_CONDITION = "status = 'OPEN'"
+
+
 class User(Base):
     """
     User table.
@@ -48,6 +69,13 @@ class User(Base):
 
     __tablename__ = "users"
 
+    # Índice composto usado pela busca de TRABALHADORES (e pelos avisos de
+    # vaga nova): igualdade em user_type + faixa de latitude da bounding box,
+    # com a longitude filtrada direto no índice.
+    __table_args__ = (
+        Index("ix_users_user_type_lat_lon", "user_type", "latitude", "longitude"),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
     phone_number: Mapped[str] = mapped_column(
@@ -101,6 +129,26 @@ class JobOpportunity(Base):
 
     __tablename__ = "job_opportunities"
 
+    # Índices parciais, só com as vagas OPEN: a busca de VAGAS (células da
+    # grade que cobrem o raio) e o sweeper (vagas antigas) tocam apenas o
+    # conjunto vivo, por maior que seja o histórico. Para o banco usar esses
+    # índices, a consulta precisa repetir a condição literal (ver
+    # app.core.queries.job_is_open), não um parâmetro `status = ?`.
+    __table_args__ = (
+        Index(
+            "ix_job_opportunities_open_grid_cell",
+            "grid_cell",
+            postgresql_where=text(OPEN_JOB_CONDITION),
+            sqlite_where=text(OPEN_JOB_CONDITION),
+        ),
+        Index(
+            "ix_job_opportunities_open_created_at",
+            "created_at",
+            postgresql_where=text(OPEN_JOB_CONDITION),
+            sqlite_where=text(OPEN_JOB_CONDITION),
+        ),
+    )
+
     id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
 
     title: Mapped[str] = mapped_column(
@@ -128,6 +176,13 @@ class JobOpportunity(Base):
         nullable=False,
     )
 
+    # Célula da grade fixa (ver app.core.utils.grid_cell) que contém o ponto.
+    # Preenchida automaticamente antes de INSERT/UPDATE pelos eventos abaixo.
+    grid_cell: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+    )
+
     contractor_id: Mapped[int] = mapped_column(
         ForeignKey("users.id", ondelete="CASCADE"),
         nullable=False,
@@ -150,3 +205,153 @@ class JobOpportunity(Base):
         back_populates="job_opportunities",
     )
 
+
+class ProcessedMessage(Base):
+    """
+    ProcessedMessage table.
+
+    Stores the TwiML already returned for a Twilio `MessageSid`, so webhook
+    retries are answered with the original reply (see app.core.idempotency).
+    Only used when IDEMPOTENCY_DB_ENABLED is set.
+    """
+
+    __tablename__ = "processed_messages"
+
+    message_sid: Mapped[str] = mapped_column(
+        String(64),
+        primary_key=True,
+    )
+
+    response_body: Mapped[bytes] = mapped_column(
+        LargeBinary,
+        nullable=False,
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=datetime.utcnow,
+        index=True,
+    )
+
+
+class ArchivedJobOpportunity(Base):
+    """
+    ArchivedJobOpportunity table.
+
+    Closed or filled jobs moved out of `job_opportunities` by the stale-job
+    sweeper (see app.core.sweeper), so the live table only holds open jobs.
+    Rows keep their original id; there is no foreign key to `users`, so the
+    history survives account removal.
+    """
+
+    __tablename__ = "job_opportunities_archive"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, autoincrement=False)
+
+    title: Mapped[str] = mapped_column(String(255), nullable=False)
+
+    description: Mapped[str] = mapped_column(String(2000), nullable=False)
+
+    payment_offer: Mapped[float] = mapped_column(Float, nullable=False)
+
+    latitude: Mapped[float] = mapped_column(Float, nullable=False)
+
+    longitude: Mapped[float] = mapped_column(Float, nullable=False)
+
+    grid_cell: Mapped[int] = mapped_column(Integer, nullable=False)
+
+    contractor_id: Mapped[int] = mapped_column(Integer, nullable=False, index=True)
+
+    status: Mapped[JobStatus] = mapped_column(
+        Enum(JobStatus, name="job_status_enum"),
+        nullable=False,
+    )
+
+    created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    archived_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=datetime.utcnow,
+    )
+
+
+class OutboxEvent(Base):
+    """
+    OutboxEvent table (transactional outbox).
+
+    Side-effects of a webhook message (e.g. notifying workers about a new job)
+    are written here in the same transaction as the state change and run
+    later by the outbox consumer (see app.core.outbox).
+    """
+
+    __tablename__ = "outbox_events"
+
+    # Índice usado pelo consumidor para achar eventos pendentes e disponíveis.
+    __table_args__ = (
+        Index("ix_outbox_events_status_available_at", "status", "available_at"),
+    )
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True)
+
+    topic: Mapped[str] = mapped_column(
+        String(64),
+        nullable=False,
+    )
+
+    payload: Mapped[dict] = mapped_column(
+        JSON,
+        nullable=False,
+    )
+
+    status: Mapped[OutboxStatus] = mapped_column(
+        Enum(OutboxStatus, name="outbox_status_enum"),
+        nullable=False,
+        default=OutboxStatus.PENDING,
+    )
+
+    attempts: Mapped[int] = mapped_column(
+        Integer,
+        nullable=False,
+        default=0,
+    )
+
+    # Próximo momento em que o evento pode ser executado (backoff entre tentativas).
+    available_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=datetime.utcnow,
+    )
+
+    # Fim da "concessão" de quem pegou o evento. Se o consumidor morrer no
+    # meio, o evento volta a ficar disponível depois deste instante.
+    claimed_until: Mapped[datetime | None] = mapped_column(
+        DateTime(timezone=True),
+        nullable=True,
+    )
+
+    last_error: Mapped[str | None] = mapped_column(
+        String(2000),
+        nullable=True,
+    )
+
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=datetime.utcnow,
+    )
+
+
+@event.listens_for(JobOpportunity, "before_insert")
+@event.listens_for(JobOpportunity, "before_update")
+def _assign_grid_cell(mapper, connection, target: JobOpportunity) -> None:  # noqa: ANN001
+    """
+    Keep `grid_cell` in sync with the job coordinates on every ORM write.
+
+    Comentário (pt-BR):
+    Inserções em massa com `insert()` (fora do ORM) não disparam este evento;
+    nesses casos quem insere deve calcular `grid_cell` explicitamente.
+    """
+
+    target.grid_cell = grid_cell(target.latitude, target.longitude)
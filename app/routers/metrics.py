@@ -0,0 +1,23 @@
+from fastapi import APIRouter, Response
+
+from app.core.metrics import render_latest
+
+
+# Comentário (pt-BR):
+# Endpoint de coleta do Prometheus. Fica fora do schema OpenAPI e não passa
+# pela validação de assinatura do Twilio (só o POST /webhook passa).
+
+router = APIRouter(tags=["metrics"])
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    """
+    Prometheus exposition endpoint.
+
+    Returns:
+        As métricas no formato texto do Prometheus (somando todos os
+        workers quando PROMETHEUS_MULTIPROC_DIR está definido).
+    """
+    payload, content_type = render_latest()
+    return Response(content=payload, media_type=content_type)
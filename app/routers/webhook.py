@@ -1,15 +1,42 @@
+from collections.abc import Awaitable, Callable
 from typing import Any
 
-from fastapi import APIRouter, Depends, Form, HTTPException, Request, Response
-from sqlalchemy import select
-from sqlalchemy.orm import Session
-from twilio.security import RequestValidator
-from twilio.twiml.messaging_response import MessagingResponse
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from pydantic import ValidationError
+from sqlalchemy import Row
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core import replies
 from app.core.config import get_settings
-from app.core.database import get_db
-from app.core.utils import find_nearby_jobs
-from app.models.models import JobOpportunity, JobStatus, User, UserType
+from app.core.database import get_async_db
+from app.core.geo_index import get_open_job_index
+from app.core.idempotency import (
+    get_idempotency_store,
+    load_processed_response,
+    record_processed_response,
+)
+from app.core.intents import IntentMatcher, fold_text
+from app.core.locks import get_user_locks, lock_user_for_transaction
+from app.core.metrics import GEO_FILTER_SECONDS, set_branch
+from app.core.nearby import exact_matches, get_nearby_search, job_rows
+from app.core.outbox import enqueue_event, get_outbox_consumer
+from app.core.pagination import NearestCursor, get_vagas_cursors
+from app.core.queries import workers_near_stmt
+from app.core.replies import render_twiml
+from app.core.reply_cache import VagasReply, get_vagas_reply_cache
+from app.core.security import TWILIO_FORM_STATE_KEY
+from app.core.state_cache import (
+    StaleUserStateError,
+    UserState,
+    get_user_state_cache,
+    insert_user_state_stmt,
+    update_user_state_stmt,
+    user_state_stmt,
+)
+from app.core.utils import find_nearby_indices
+from app.models.models import JobOpportunity, JobStatus, UserType
+from app.schemas.whatsapp import TwilioWebhookForm
 
 
 # Comentário (pt-BR):
@@ -21,309 +48,672 @@ from app.models.models import JobOpportunity, JobStatus, User, UserType
 # TEMP: coloque aqui o seu número exato (formato Twilio), ex: "whatsapp:+5512999999999"
 ADMIN_NUMBER = "whatsapp:+55129XXXXXXXXX"
 
+# Raio (em km) usado na busca de vagas próximas ao trabalhador.
+VAGAS_RADIUS_KM: float = 10.0
+
+# Raio (em km) usado na busca de trabalhadores próximos à construtora.
+TRABALHADORES_RADIUS_KM: float = 10.0
+
+# Quantas vezes uma mensagem é reprocessada quando o estado em cache estava
+# velho (outro processo mudou o estágio do mesmo usuário).
+MAX_STATE_ATTEMPTS: int = 3
+
+# Palavras-chave compiladas uma vez no import (ver app.core.intents).
+# Radicais casam no início de qualquer palavra: "contrat" cobre "contratar",
+# "contratação" e "contratante". Havendo as duas, vale a primeira intenção.
+_USER_TYPE_INTENTS = IntentMatcher(
+    {
+        "worker": ("oportunidade", "trabalhar", "vaga"),
+        "contractor": ("contrat", "obra"),
+    }
+)
+
+# Comandos do menu principal: a mensagem inteira é o comando.
+_MENU_INTENTS = IntentMatcher(
+    {
+        "vagas": ("vagas", "vaga"),
+        "mais": ("mais",),
+        "trabalhadores": ("trabalhadores",),
+    },
+    whole_message=True,
+)
+
+# Comandos do menu com argumento: a primeira palavra é o comando e o resto
+# vai para o handler ("contatar 2").
+_MENU_ARGUMENT_INTENTS = IntentMatcher(
+    {
+        "contatar": ("contatar", "contato"),
+    },
+    whole_message=True,
+)
+
+# Handler de um estágio (ou comando do menu): recebe a sessão, o estado do
+# usuário, o form e o texto já normalizado por `fold_text`.
+StageHandler = Callable[[AsyncSession, UserState, TwilioWebhookForm, str], Awaitable[bytes]]
+
+_STAGE_HANDLERS: dict[str, StageHandler] = {}
+_MENU_COMMANDS: dict[str, StageHandler] = {}
+
+
+def _stage_handler(stage: str) -> Callable[[StageHandler], StageHandler]:
+    """
+    Register the handler of a `conversation_stage` in the dispatch table.
+    """
+
+    def register(handler: StageHandler) -> StageHandler:
+        _STAGE_HANDLERS[stage] = handler
+        return handler
+
+    return register
+
+
+def _menu_command(intent: str) -> Callable[[StageHandler], StageHandler]:
+    """
+    Register the handler of a MAIN_MENU command (an intent of `_MENU_INTENTS`).
+    """
+
+    def register(handler: StageHandler) -> StageHandler:
+        _MENU_COMMANDS[intent] = handler
+        return handler
+
+    return register
+
 
 router = APIRouter(tags=["whatsapp"])
 
 
-def _normalize_text(text: str) -> str:
+def _twiml_response(body: bytes) -> Response:
     """
-    Helper para normalizar texto livre do usuário.
+    Envolve o TwiML já renderizado (bytes) numa resposta HTTP para o Twilio.
 
     Comentário (pt-BR):
-    Transformamos em minúsculas e removemos espaços extras para facilitar
-    a comparação de comandos simples como "vagas", "oportunidade", etc.
+    O XML vem pronto do catálogo em app.core.replies (pré-renderizado no
+    import para respostas fixas), então nada é montado aqui por request.
     """
-    return text.strip().lower()
+    return Response(content=body, media_type="application/xml")
 
 
-def _build_twilio_response(message: str) -> str:
+def _render_vagas_page(phone_number: str, cursor: NearestCursor, header: str) -> bytes:
     """
-    Cria um XML de resposta para o Twilio usando MessagingResponse.
+    Consome a próxima página do cursor e renderiza o TwiML da resposta de VAGAS.
+
+    Comentário (pt-BR):
+    Se ainda sobrarem vagas, o cursor fica guardado para o próximo "MAIS";
+    caso contrário, é descartado.
     """
-    resp = MessagingResponse()
-    resp.message(message)
-    return str(resp)
+    settings = get_settings()
+    cursors = get_vagas_cursors()
+
+    lines: list[str] = [header]
+    for job, distance in cursor.next_page(settings.VAGAS_PAGE_SIZE):
+        lines.append(
+            replies.VAGAS_LINE.format(
+                title=job.title,
+                payment_offer=job.payment_offer,
+                distance_km=distance,
+            )
+        )
 
+    if cursor.remaining:
+        cursors.set(phone_number, cursor)
+        lines.append(replies.VAGAS_FOOTER.format(remaining=cursor.remaining))
+    else:
+        cursors.pop(phone_number)
 
-@router.post("/webhook")
-async def whatsapp_webhook(
-    request: Request,
-    From: str = Form(...),  # noqa: N803 - nome vem do Twilio
-    Body: str | None = Form(None),  # noqa: N803 - nome vem do Twilio
-    Latitude: float | None = Form(None),  # noqa: N803 - nome vem do Twilio
-    Longitude: float | None = Form(None),  # noqa: N803 - nome vem do Twilio
-    db: Session = Depends(get_db),
-) -> Response:
+    return render_twiml("\n".join(lines))
+
+
+async def _nearest_workers(db: AsyncSession, lat: float, lon: float) -> list[tuple[Row[Any], float]]:
     """
-    WhatsApp webhook endpoint (Twilio).
+    Trabalhadores mais próximos do ponto, do mais perto ao mais longe.
 
-    Args:
-        request: Request do FastAPI (necessário para validar assinatura do Twilio).
-        From: Número do remetente (WhatsApp do usuário) enviado pelo Twilio.
-        Body: Corpo da mensagem de texto enviada pelo usuário.
-        db: Sessão de banco de dados injetada pelo FastAPI.
+    Comentário (pt-BR):
+    O banco devolve no máximo o dobro do limite de candidatos, já ordenados
+    pela distância aproximada (índice + bounding box); aqui aplicamos o
+    Haversine exato, descartamos quem está fora do raio e cortamos no limite.
+    A ordem é estável: o "CONTATAR 2" refaz a busca e acha a mesma pessoa.
+    """
+    max_results = get_settings().TRABALHADORES_MAX_RESULTS
+    stmt = workers_near_stmt(lat, lon, TRABALHADORES_RADIUS_KM, limit=2 * max_results)
+    rows = (await db.execute(stmt)).all()
+
+    with GEO_FILTER_SECONDS.labels("workers").time():
+        indices, distances = find_nearby_indices(
+            user_lat=lat,
+            user_lon=lon,
+            lats=[row.latitude for row in rows],
+            lons=[row.longitude for row in rows],
+            radius_km=TRABALHADORES_RADIUS_KM,
+        )
+
+    order = distances.argsort(kind="stable")[:max_results]
+    return [(rows[indices[position]], float(distances[position])) for position in order]
+
+
+async def _render_nearby_workers(db: AsyncSession, lat: float, lon: float) -> bytes:
+    """
+    Busca os trabalhadores mais próximos do ponto e renderiza a resposta.
+
+    Comentário (pt-BR):
+    Só nome e distância: o telefone fica com o bot, que repassa o contato
+    da construtora quando ela digita CONTATAR. Com NOTIFY_ENABLED
+    desligado não há como repassar, então o CONTATAR não é oferecido.
+    """
+    workers = await _nearest_workers(db, lat, lon)
+    if not workers:
+        return replies.NO_WORKERS_NEARBY.body
+
+    lines: list[str] = [replies.WORKERS_HEADER]
+    for position, (row, distance) in enumerate(workers, start=1):
+        lines.append(replies.WORKERS_LINE.format(position=position, name=row.full_name, distance_km=distance))
+    if get_settings().NOTIFY_ENABLED:
+        lines.append(replies.WORKERS_FOOTER)
+
+    return render_twiml("\n".join(lines))
+
+
+async def _save_user_state(db: AsyncSession, state: UserState, **values: Any) -> UserState:
+    """
+    Persiste alterações do usuário com um único UPDATE e atualiza o cache.
+
+    Comentário (pt-BR):
+    Write-through: o cache só recebe o novo estado depois que o commit deu
+    certo. Se o commit falhar, a entrada do telefone é removida do cache
+    (a próxima mensagem relê do banco) e o erro é propagado.
+    Objetos pendentes na sessão (ex.: uma vaga nova) entram no mesmo commit.
+
+    O UPDATE é um compare-and-set do estágio: se o banco já tiver outro
+    estágio (estado velho no cache), nada é gravado e StaleUserStateError
+    é lançada para que a mensagem seja reprocessada.
+    """
+    try:
+        row = (await db.execute(update_user_state_stmt(state, **values))).first()
+        if row is None:
+            raise StaleUserStateError(state.phone_number)
+        await db.commit()
+    except Exception:
+        get_user_state_cache().pop(state.phone_number)
+        await db.rollback()
+        raise
+
+    new_state = UserState(*row)
+    get_user_state_cache().set(state.phone_number, new_state)
+    return new_state
+
+
+async def _insert_first_contact(db: AsyncSession, phone_number: str) -> Row[Any] | None:
+    """
+    Cria o usuário do primeiro contato num único statement e faz commit.
 
     Returns:
-        XML com a resposta para o usuário, no formato esperado pelo Twilio.
+        A linha com as colunas de UserState, ou None se outro request criou o
+        mesmo número ao mesmo tempo (conflito na constraint UNIQUE).
     """
-    settings = get_settings()
+    stmt = insert_user_state_stmt(db.bind.dialect.name, phone_number)
+    try:
+        row = (await db.execute(stmt)).first()
+        await db.commit()
+    except IntegrityError:
+        # Bancos sem ON CONFLICT: a corrida aparece como IntegrityError.
+        await db.rollback()
+        return None
+    return row
 
-    if not settings.TWILIO_ACCOUNT_SID or not settings.TWILIO_AUTH_TOKEN:
-        raise HTTPException(
-            status_code=500,
-            detail="Configuração do Twilio ausente. Verifique as variáveis de ambiente.",
+
+async def _process_message(db: AsyncSession, form: TwilioWebhookForm) -> bytes:
+    """
+    Processa uma mensagem com exclusividade sobre o telefone de origem.
+
+    Comentário (pt-BR):
+    Mensagens do mesmo número rodam uma de cada vez (lock asyncio no processo
+    e advisory lock no PostgreSQL entre processos); números diferentes seguem
+    em paralelo. Se o estado em cache estava velho, a mensagem é refeita com
+    o estado relido do banco, já sob o lock.
+    """
+    async with get_user_locks().lock_for(form.from_number):
+        attempt = 1
+        while True:
+            await lock_user_for_transaction(db, form.from_number)
+            try:
+                body = await _handle_message(db, form)
+            except StaleUserStateError:
+                # _save_user_state já removeu o cache e fez rollback.
+                if attempt >= MAX_STATE_ATTEMPTS:
+                    raise
+                attempt += 1
+                continue
+
+            # Respostas só de leitura (ex.: VAGAS) não fazem commit; encerra a
+            # transação aqui para soltar o advisory lock. Commit em vez de
+            # rollback: não expira os objetos guardados no cursor do MAIS.
+            if db.in_transaction():
+                await db.commit()
+            return body
+
+
+async def _handle_message(db: AsyncSession, form: TwilioWebhookForm) -> bytes:
+    """
+    Máquina de estados da conversa: processa uma mensagem e devolve o TwiML.
+
+    Args:
+        db: Sessão assíncrona de banco de dados.
+        form: Campos do webhook do Twilio já validados.
+
+    Returns:
+        Bytes do TwiML de resposta (ver app.core.replies).
+    """
+    from_number = form.from_number
+    incoming_text = form.body or ""
+
+    # 1) Carrega (ou cria) o usuário a partir do número de telefone.
+    # Comentário (pt-BR):
+    # O estado de conversa vem do cache por telefone; o SELECT só roda
+    # quando o número não está em cache (primeira mensagem, TTL expirado
+    # ou outro worker).
+    state_cache = get_user_state_cache()
+    state = state_cache.get(from_number)
+
+    if state is None:
+        row = (await db.execute(user_state_stmt(from_number))).first()
+        if row is None:
+            # Primeiro contato: INSERT ... ON CONFLICT DO NOTHING RETURNING.
+            row = await _insert_first_contact(db, from_number)
+            if row is not None:
+                set_branch("first_contact")
+                state_cache.set(from_number, UserState(*row))
+                return replies.WELCOME.body
+
+            # Outra mensagem do mesmo número criou o usuário ao mesmo
+            # tempo; seguimos como usuário existente.
+            row = (await db.execute(user_state_stmt(from_number))).one()
+
+        state = UserState(*row)
+        state_cache.set(from_number, state)
+
+    # 2) Atualização de geolocalização (se vier Latitude/Longitude do WhatsApp).
+    if form.latitude is not None and form.longitude is not None:
+        set_branch("location")
+        await _save_user_state(
+            db,
+            state,
+            latitude=form.latitude,
+            longitude=form.longitude,
         )
 
+        if state.user_type == UserType.CONTRACTOR:
+            return replies.CONTRACTOR_LOCATION_RECEIVED.body
+        return replies.LOCATION_RECEIVED.body
+
     # ------------------------------------------------------------------
-    # Proteção contra Spoofing: validação da assinatura do Twilio
+    # Backdoor blindado: só ativa se for /admin E número for o ADMIN_NUMBER
     # ------------------------------------------------------------------
-    twilio_signature = request.headers.get("X-Twilio-Signature")
-    if not twilio_signature:
-        raise HTTPException(status_code=403, detail="Forbidden")
+    if incoming_text.strip() == "/admin" and from_number == ADMIN_NUMBER:
+        set_branch("admin_mode")
+        await _save_user_state(
+            db,
+            state,
+            user_type=UserType.CONTRACTOR,
+            conversation_stage="ADMIN_ADDING_JOB",
+        )
 
-    # Importante: usar os parâmetros do form exatamente como recebidos.
-    # (Não monte dict com floats/normalizações, pois muda o payload e quebra a assinatura.)
-    form = await request.form()
-    form_dict = {k: str(v) for k, v in form.items()}
+        return replies.ADMIN_MODE.body
 
-    validator = RequestValidator(settings.TWILIO_AUTH_TOKEN)
-    url = str(request.url)
+    # 3) Máquina de estados: tabela estágio -> handler (uma consulta de dict,
+    # não importa quantos estágios existam).
+    stage = (state.conversation_stage or "NEW").strip()
+    handler = _STAGE_HANDLERS.get(stage)
 
-    if not validator.validate(url, form_dict, twilio_signature):
-        raise HTTPException(status_code=403, detail="Forbidden")
+    if handler is None:
+        # Fallback para estágios desconhecidos.
+        set_branch("reset")
+        await _save_user_state(db, state, conversation_stage="CHOOSING_TYPE")
+        return replies.STAGE_RESET.body
+
+    set_branch(stage)
+    return await handler(db, state, form, fold_text(incoming_text))
 
-    incoming_text = Body or ""
-    incoming_normalized = _normalize_text(incoming_text)
 
+@_stage_handler("ADMIN_ADDING_JOB")
+async def _on_admin_adding_job(
+    db: AsyncSession, state: UserState, form: TwilioWebhookForm, text: str
+) -> bytes:
+    incoming_text = form.body or ""
     try:
-        # 1) Carrega (ou cria) o usuário a partir do número de telefone.
-        stmt = select(User).where(User.phone_number == From)
-        user: User | None = db.scalars(stmt).first()
-
-        if user is None:
-            user = User(
-                phone_number=From,
-                user_type=UserType.WORKER,
-                full_name="",
-                conversation_stage="CHOOSING_TYPE",
-            )
-            db.add(user)
-            db.commit()
-            db.refresh(user)
+        parts = [p.strip() for p in incoming_text.split(",")]
+        if len(parts) != 2:
+            raise ValueError("invalid_parts")
+
+        title = parts[0]
+        payment_offer = float(parts[1])
+
+        if not title:
+            raise ValueError("empty_title")
+
+        # Validação básica de dados: precisa ser estritamente > 0
+        if payment_offer <= 0:
+            raise ValueError("invalid_payment_offer")
+
+    except Exception:
+        return replies.ADMIN_INVALID_FORMAT.body
+
+    lat = state.latitude if state.latitude is not None else -23.2237
+    lon = state.longitude if state.longitude is not None else -45.9009
+
+    job = JobOpportunity(
+        title=title,
+        description="Vaga criada via WhatsApp (modo admin).",
+        payment_offer=payment_offer,
+        latitude=lat,
+        longitude=lon,
+        contractor_id=state.id,
+        status=JobStatus.OPEN,
+    )
+
+    db.add(job)
+    # O aviso aos trabalhadores próximos vai para o outbox no mesmo commit
+    # da vaga; o consumidor em segundo plano faz os envios.
+    await db.flush()
+    enqueue_event(
+        db,
+        "job_created",
+        {
+            "job_id": job.id,
+            "title": job.title,
+            "payment_offer": job.payment_offer,
+            "latitude": job.latitude,
+            "longitude": job.longitude,
+        },
+    )
+    await _save_user_state(db, state, conversation_stage="MAIN_MENU")
+    get_outbox_consumer().wake()
+
+    return replies.JOB_CREATED.render(title=title)
+
+
+@_stage_handler("NEW")
+async def _on_new(db: AsyncSession, state: UserState, form: TwilioWebhookForm, text: str) -> bytes:
+    # Usuário existente mas ainda não configurado.
+    await _save_user_state(db, state, conversation_stage="CHOOSING_TYPE")
+    return replies.WELCOME_BACK.body
+
+
+@_stage_handler("CHOOSING_TYPE")
+async def _on_choosing_type(
+    db: AsyncSession, state: UserState, form: TwilioWebhookForm, text: str
+) -> bytes:
+    user_type = _USER_TYPE_INTENTS.match(text)
+
+    if user_type == "worker":
+        await _save_user_state(
+            db,
+            state,
+            user_type=UserType.WORKER,
+            conversation_stage="ASKING_NAME",
+        )
 
-            welcome_msg = (
-                "Olá! Bem-vindo ao Contech Bot. "
-                "Você busca OPORTUNIDADES ou quer CONTRATAR?"
-            )
-            xml = _build_twilio_response(welcome_msg)
-            return Response(content=xml, media_type="application/xml")
-
-        # 2) Atualização de geolocalização (se vier Latitude/Longitude do WhatsApp).
-        if Latitude is not None and Longitude is not None:
-            user.latitude = Latitude
-            user.longitude = Longitude
-            db.commit()
-            db.refresh(user)
-
-            msg = "Localização recebida! Agora digite VAGAS para ver obras ao seu redor."
-            xml = _build_twilio_response(msg)
-            return Response(content=xml, media_type="application/xml")
-
-        # ------------------------------------------------------------------
-        # Backdoor blindado: só ativa se for /admin E número for o ADMIN_NUMBER
-        # ------------------------------------------------------------------
-        if incoming_text.strip() == "/admin" and From == ADMIN_NUMBER:
-            user.user_type = UserType.CONTRACTOR
-            user.conversation_stage = "ADMIN_ADDING_JOB"
-            db.commit()
-            db.refresh(user)
-
-            msg = (
-                "🛠️ Modo Admin: Para criar uma nova vaga, digite o Cargo e o Valor "
-                "separados por vírgula. Ex: Encanador, 150.00"
-            )
-            xml = _build_twilio_response(msg)
-            return Response(content=xml, media_type="application/xml")
+        return replies.ASK_WORKER_NAME.body
 
-        # Estágio ADMIN_ADDING_JOB
-        if (user.conversation_stage or "").strip() == "ADMIN_ADDING_JOB":
-            try:
-                parts = [p.strip() for p in incoming_text.split(",")]
-                if len(parts) != 2:
-                    raise ValueError("invalid_parts")
-
-                title = parts[0]
-                payment_offer = float(parts[1])
-
-                if not title:
-                    raise ValueError("empty_title")
-
-                # Validação básica de dados: precisa ser estritamente > 0
-                if payment_offer <= 0:
-                    raise ValueError("invalid_payment_offer")
-
-            except Exception:
-                msg = "Formato inválido. Tente novamente: Cargo, Valor"
-                xml = _build_twilio_response(msg)
-                return Response(content=xml, media_type="application/xml")
-
-            lat = user.latitude if user.latitude is not None else -23.2237
-            lon = user.longitude if user.longitude is not None else -45.9009
-
-            job = JobOpportunity(
-                title=title,
-                description="Vaga criada via WhatsApp (modo admin).",
-                payment_offer=payment_offer,
-                latitude=lat,
-                longitude=lon,
-                contractor_id=user.id,
-                status=JobStatus.OPEN,
-            )
+    if user_type == "contractor":
+        await _save_user_state(
+            db,
+            state,
+            user_type=UserType.CONTRACTOR,
+            conversation_stage="ASKING_NAME",
+        )
 
-            db.add(job)
-            user.conversation_stage = "MAIN_MENU"
-            db.commit()
-            db.refresh(user)
+        return replies.ASK_CONTRACTOR_NAME.body
+
+    return replies.CHOOSING_TYPE_NOT_UNDERSTOOD.body
+
+
+@_stage_handler("ASKING_NAME")
+async def _on_asking_name(
+    db: AsyncSession, state: UserState, form: TwilioWebhookForm, text: str
+) -> bytes:
+    name = (form.body or "").strip()
+
+    if not name:
+        return replies.NAME_REQUIRED.body
+
+    await _save_user_state(
+        db,
+        state,
+        full_name=name,
+        conversation_stage="MAIN_MENU",
+    )
+
+    if state.user_type == UserType.CONTRACTOR:
+        return replies.CONTRACTOR_REGISTRATION_DONE.body
+    return replies.REGISTRATION_DONE.body
+
+
+@_stage_handler("MAIN_MENU")
+async def _on_main_menu(
+    db: AsyncSession, state: UserState, form: TwilioWebhookForm, text: str
+) -> bytes:
+    command = _MENU_INTENTS.match(text)
+    if command is None:
+        word, _, argument = text.partition(" ")
+        command = _MENU_ARGUMENT_INTENTS.match(word) if argument else None
+    handler = _MENU_COMMANDS.get(command) if command is not None else None
+
+    if handler is None:
+        if state.user_type == UserType.CONTRACTOR:
+            return replies.CONTRACTOR_MENU_UNKNOWN.body
+        return replies.MAIN_MENU_UNKNOWN.body
+
+    set_branch(f"MAIN_MENU:{command}")
+    return await handler(db, state, form, text)
+
+
+@_menu_command("vagas")
+async def _on_vagas(db: AsyncSession, state: UserState, form: TwilioWebhookForm, text: str) -> bytes:
+    from_number = form.from_number
+    if state.latitude is None or state.longitude is None:
+        return replies.LOCATION_REQUIRED.body
+
+    lat, lon = state.latitude, state.longitude
+
+    # Cache por célula: um acerto responde sem banco e sem conta geográfica
+    # (ver app.core.reply_cache); numa falha, a busca roda a partir do
+    # centro da célula para que a resposta sirva a todos dela.
+    reply_cache = get_vagas_reply_cache() if get_settings().VAGAS_REPLY_CACHE_ENABLED else None
+    if reply_cache is not None:
+        key = reply_cache.key_for(lat, lon, VAGAS_RADIUS_KM)
+        cached = reply_cache.get(key)
+        if cached is not None:
+            if cached.remaining:
+                get_vagas_cursors().set(from_number, NearestCursor.restore(cached.remaining))
+            else:
+                get_vagas_cursors().pop(from_number)
+            return cached.body
+        generation = reply_cache.generation
+        lat, lon = reply_cache.center_of(key)
+
+    matches = await _open_jobs_near(db, lat, lon)
+
+    if not matches:
+        get_vagas_cursors().pop(from_number)
+        body = replies.NO_JOBS_NEARBY.body
+        remaining: tuple = ()
+    else:
+        cursor = NearestCursor(matches)
+        body = _render_vagas_page(from_number, cursor, header=replies.VAGAS_HEADER)
+        remaining = cursor.snapshot()
+
+    if reply_cache is not None:
+        reply_cache.set(key, VagasReply(body=body, remaining=remaining), generation)
+    return body
+
+
+async def _open_jobs_near(db: AsyncSession, lat: float, lon: float) -> list[tuple[Any, float]]:
+    """
+    Vagas OPEN dentro de VAGAS_RADIUS_KM do ponto, como pares (vaga, km).
+    """
+    if get_settings().JOB_INDEX_ENABLED:
+        # Caminho quente: responde a partir do índice espacial em
+        # memória (carregado do banco só na primeira vez ou quando
+        # expira; uma recarga por processo, as demais esperam).
+        job_index = get_open_job_index()
+        await job_index.refresh(db)
+        with GEO_FILTER_SECONDS.labels("vagas_index").time():
+            return job_index.query(lat, lon, VAGAS_RADIUS_KM)
 
-            msg = (
-                f"✅ Vaga de {title} cadastrada com sucesso! "
-                "Ela já aparece para os trabalhadores próximos."
-            )
-            xml = _build_twilio_response(msg)
-            return Response(content=xml, media_type="application/xml")
-
-        # 3) Máquina de estados baseada em conversation_stage.
-        stage = user.conversation_stage or "NEW"
-
-        # Estágio inicial: usuário existente mas ainda não configurado.
-        if stage == "NEW":
-            user.conversation_stage = "CHOOSING_TYPE"
-            db.commit()
-            db.refresh(user)
-            msg = "Olá novamente! Você busca OPORTUNIDADES ou quer CONTRATAR?"
-            xml = _build_twilio_response(msg)
-            return Response(content=xml, media_type="application/xml")
-
-        # Estágio CHOOSING_TYPE
-        if stage == "CHOOSING_TYPE":
-            if any(
-                keyword in incoming_normalized
-                for keyword in (
-                    "oportunidade",
-                    "oportunidades",
-                    "trabalhar",
-                    "vaga",
-                    "vagas",
-                )
-            ):
-                user.user_type = UserType.WORKER
-                user.conversation_stage = "ASKING_NAME"
-                db.commit()
-                db.refresh(user)
-
-                msg = "Perfeito! Qual seu nome completo?"
-                xml = _build_twilio_response(msg)
-                return Response(content=xml, media_type="application/xml")
-
-            if any(
-                keyword in incoming_normalized
-                for keyword in ("contratar", "obra", "obra nova", "contratante")
-            ):
-                user.user_type = UserType.CONTRACTOR
-                user.conversation_stage = "ASKING_NAME"
-                db.commit()
-                db.refresh(user)
-
-                msg = "Ótimo! Qual o nome completo do responsável pela contratação?"
-                xml = _build_twilio_response(msg)
-                return Response(content=xml, media_type="application/xml")
-
-            msg = (
-                "Não entendi. Responda OPORTUNIDADES se você busca trabalho "
-                "ou CONTRATAR se você quer encontrar profissionais."
-            )
-            xml = _build_twilio_response(msg)
-            return Response(content=xml, media_type="application/xml")
-
-        # Estágio ASKING_NAME
-        if stage == "ASKING_NAME":
-            name = incoming_text.strip()
-
-            if not name:
-                msg = "Por favor, envie seu nome completo para continuar o cadastro."
-                xml = _build_twilio_response(msg)
-                return Response(content=xml, media_type="application/xml")
-
-            user.full_name = name
-            user.conversation_stage = "MAIN_MENU"
-            db.commit()
-            db.refresh(user)
-
-            msg = "Cadastro concluído! Digite VAGAS para ver obras próximas."
-            xml = _build_twilio_response(msg)
-            return Response(content=xml, media_type="application/xml")
-
-        # Estágio MAIN_MENU
-        if stage == "MAIN_MENU":
-            if incoming_normalized == "vagas":
-                if user.latitude is None or user.longitude is None:
-                    msg = (
-                        "Para encontrar obras próximas, preciso saber onde você está. "
-                        "Por favor, clique no clipe (anexo) e me envie sua Localização."
-                    )
-                    xml = _build_twilio_response(msg)
-                    return Response(content=xml, media_type="application/xml")
-
-                jobs_stmt = select(JobOpportunity).where(
-                    JobOpportunity.status == JobStatus.OPEN
-                )
-                jobs = db.scalars(jobs_stmt).all()
+    # Poda espacial no banco com o backend configurado (R*Tree, PostGIS ou
+    # grade + bounding box); o Haversine exato roda só sobre os candidatos.
+    # Só as colunas de JobRow, sem objetos ORM; são elas que ficam no cursor.
+    jobs = job_rows(await db.execute(get_nearby_search().candidates_stmt(lat, lon, VAGAS_RADIUS_KM)))
 
-                nearby_jobs = find_nearby_jobs(
-                    user_lat=user.latitude,
-                    user_lon=user.longitude,
-                    jobs=jobs,
-                    radius_km=10.0,
-                )
+    with GEO_FILTER_SECONDS.labels("vagas_sql").time():
+        return exact_matches(jobs, lat, lon, VAGAS_RADIUS_KM)
 
-                if not nearby_jobs:
-                    msg = (
-                        "Não encontramos vagas próximas no momento. "
-                        "Tente novamente mais tarde."
-                    )
-                else:
-                    lines: list[str] = ["Encontrei as seguintes vagas próximas a você:"]
-                    for job in nearby_jobs:
-                        lines.append(f"- {job.title} (R$ {job.payment_offer:.2f})")
-                    msg = "\n".join(lines)
-
-                xml = _build_twilio_response(msg)
-                return Response(content=xml, media_type="application/xml")
-
-            msg = (
-                "Opção não reconhecida. No momento, você pode digitar VAGAS "
-                "para ver oportunidades próximas."
-            )
-            xml = _build_twilio_response(msg)
-            return Response(content=xml, media_type="application/xml")
 
-        # Fallback para estágios desconhecidos
-        user.conversation_stage = "CHOOSING_TYPE"
-        db.commit()
-        db.refresh(user)
+@_menu_command("mais")
+async def _on_mais(db: AsyncSession, state: UserState, form: TwilioWebhookForm, text: str) -> bytes:
+    cursor = get_vagas_cursors().get(form.from_number)
+    if cursor is None:
+        return replies.NO_MORE_JOBS.body
 
-        msg = (
-            "Houve um problema ao entender seu estágio de conversa. "
-            "Vamos recomeçar. Você busca OPORTUNIDADES ou quer CONTRATAR?"
-        )
-        xml = _build_twilio_response(msg)
-        return Response(content=xml, media_type="application/xml")
+    return _render_vagas_page(form.from_number, cursor, header=replies.VAGAS_MORE_HEADER)
 
-    except HTTPException:
-        raise
-    except Exception as exc:  # pragma: no cover - defensive guard
-        print("Erro ao processar webhook do WhatsApp:", repr(exc))
-        raise HTTPException(
-            status_code=500,
-            detail="Erro interno ao processar a mensagem do WhatsApp.",
-        ) from exc
+
+@_menu_command("trabalhadores")
+async def _on_trabalhadores(
+    db: AsyncSession, state: UserState, form: TwilioWebhookForm, text: str
+) -> bytes:
+    # Só construtoras buscam trabalhadores.
+    if state.user_type != UserType.CONTRACTOR:
+        return replies.MAIN_MENU_UNKNOWN.body
+
+    if state.latitude is None or state.longitude is None:
+        return replies.WORKERS_LOCATION_REQUIRED.body
+
+    return await _render_nearby_workers(db, state.latitude, state.longitude)
+
+
+@_menu_command("contatar")
+async def _on_contatar(db: AsyncSession, state: UserState, form: TwilioWebhookForm, text: str) -> bytes:
+    if state.user_type != UserType.CONTRACTOR:
+        return replies.MAIN_MENU_UNKNOWN.body
+
+    # Sem envio de mensagens ativas o pedido seria descartado pelo outbox
+    # (ver handle_worker_contact); não dizemos que o contato foi passado.
+    if not get_settings().NOTIFY_ENABLED:
+        return replies.WORKER_CONTACT_UNAVAILABLE.body
+
+    if state.latitude is None or state.longitude is None:
+        return replies.WORKERS_LOCATION_REQUIRED.body
+
+    # Refaz a busca do TRABALHADORES (mesma ordem) e pega a posição pedida.
+    argument = text.partition(" ")[2]
+    workers = await _nearest_workers(db, state.latitude, state.longitude)
+    if not argument.isdigit() or not 1 <= int(argument) <= len(workers):
+        return replies.WORKER_CONTACT_UNKNOWN.body
+    worker, _distance = workers[int(argument) - 1]
+
+    # O pedido vai para o outbox; o notifier envia ao trabalhador o nome e o
+    # telefone da construtora. O telefone do trabalhador não sai do bot.
+    enqueue_event(db, "worker_contact", {"contractor_id": state.id, "worker_phone": worker.phone_number})
+    await db.commit()
+    get_outbox_consumer().wake()
+
+    return replies.WORKER_CONTACT_SENT.render(name=worker.full_name)
+
+
+@router.post("/webhook")
+async def whatsapp_webhook(
+    request: Request,
+    db: AsyncSession = Depends(get_async_db),
+) -> Response:
+    """
+    WhatsApp webhook endpoint (Twilio).
+
+    Args:
+        request: Request do FastAPI; traz em `request.state` o form do Twilio
+            (From, Body, Latitude, Longitude, MessageSid) já validado pelo middleware.
+        db: Sessão assíncrona de banco de dados injetada pelo FastAPI.
+
+    Returns:
+        XML com a resposta para o usuário, no formato esperado pelo Twilio.
+    """
+    settings = get_settings()
+
+    # Comentário (pt-BR):
+    # A assinatura do Twilio já foi validada pelo TwilioSignatureMiddleware
+    # antes do roteamento; aqui só reaproveitamos o form que ele parseou.
+    raw_form = getattr(request.state, TWILIO_FORM_STATE_KEY, None)
+    if raw_form is None:
+        raise HTTPException(status_code=403, detail="Forbidden")
+
+    try:
+        form = TwilioWebhookForm.model_validate(raw_form)
+    except ValidationError as exc:
+        raise HTTPException(status_code=422, detail=exc.errors(include_url=False)) from exc
+
+    # ------------------------------------------------------------------
+    # Idempotência: o Twilio reenvia o webhook (mesmo MessageSid) quando a
+    # resposta demora. Uma reentrega devolve o TwiML original sem rodar a
+    # máquina de estados de novo (e sem tocar no banco, se estiver em memória).
+    # ------------------------------------------------------------------
+    message_sid = form.message_sid
+    idempotency = get_idempotency_store()
+
+    if message_sid:
+        body = idempotency.get(message_sid)
+        if body is not None:
+            set_branch("duplicate")
+            return _twiml_response(body)
+
+        pending = idempotency.pending(message_sid)
+        if pending is not None:
+            set_branch("duplicate")
+            body = await pending
+            if body is None:
+                raise HTTPException(
+                    status_code=500,
+                    detail="Erro interno ao processar a mensagem do WhatsApp.",
+                )
+            return _twiml_response(body)
+
+        # Marcado como "em andamento" antes de qualquer await, para que
+        # duplicatas simultâneas esperem por esta requisição.
+        idempotency.begin(message_sid)
+
+    # Comentário (pt-BR):
+    # Se a resposta não chegar ao `finish` por qualquer motivo (erro, ou
+    # cancelamento: cliente desconectou, worker desligando; CancelledError
+    # não é Exception), o SID é abandonado no `finally`. Sem isso, as
+    # duplicatas esperariam para sempre pelo Future "em andamento".
+    finished = False
+    try:
+        if message_sid and settings.IDEMPOTENCY_DB_ENABLED:
+            body = await load_processed_response(db, message_sid)
+            if body is not None:
+                set_branch("duplicate")
+                idempotency.finish(message_sid, body)
+                finished = True
+                return _twiml_response(body)
+
+        try:
+            body = await _process_message(db, form)
+        except HTTPException:
+            raise
+        except Exception as exc:  # pragma: no cover - defensive guard
+            print("Erro ao processar webhook do WhatsApp:", repr(exc))
+            raise HTTPException(
+                status_code=500,
+                detail="Erro interno ao processar a mensagem do WhatsApp.",
+            ) from exc
+
+        if message_sid:
+            # A mensagem já foi gravada: a resposta vale a partir daqui,
+            # mesmo que a cópia em processed_messages falhe.
+            idempotency.finish(message_sid, body)
+            finished = True
+            if settings.IDEMPOTENCY_DB_ENABLED:
+                await record_processed_response(db, message_sid, body)
+    finally:
+        if not finished:
+            idempotency.abandon(message_sid)
+
+    return _twiml_response(body)
@@ -1,4 +1,4 @@
-from pydantic import BaseModel, ConfigDict
+from pydantic import BaseModel, ConfigDict, Field, field_validator
 
 
 # Comentário (pt-BR):
@@ -46,3 +46,41 @@ class WhatsAppSimpleResponse(BaseModel):
     message: str
     """Human-readable message to be logged or inspected in tests."""
 
+
+class TwilioWebhookForm(BaseModel):
+    """
+    Form fields of a Twilio WhatsApp webhook call that the bot reads.
+
+    Comentário (pt-BR):
+    Os nomes dos campos no payload seguem o Twilio (From, Body, ...); aqui
+    usamos aliases para expor nomes em snake_case. O form chega como strings
+    (já validado pelo TwilioSignatureMiddleware), por isso latitude/longitude
+    aceitam conversão de string para float.
+    """
+
+    model_config = ConfigDict(
+        strict=True,
+        extra="ignore",
+        populate_by_name=True,
+    )
+
+    from_number: str = Field(alias="From")
+    """Sender address, e.g. "whatsapp:+5512999999999"."""
+
+    body: str | None = Field(default=None, alias="Body")
+    """Text body of the message (absent for pure location messages)."""
+
+    latitude: float | None = Field(default=None, alias="Latitude", strict=False)
+    """Latitude of a shared WhatsApp location, if any."""
+
+    longitude: float | None = Field(default=None, alias="Longitude", strict=False)
+    """Longitude of a shared WhatsApp location, if any."""
+
+    message_sid: str | None = Field(default=None, alias="MessageSid")
+    """Twilio's unique id for the message; repeated on webhook retries."""
+
+    @field_validator("latitude", "longitude", mode="before")
+    @classmethod
+    def _blank_as_none(cls, value: object) -> object:
+        # Campo enviado vazio conta como ausente.
+        return None if value == "" else value
@@ -0,0 +1,47 @@
+import asyncio
+import signal
+
+from app.core.database import engine
+from app.core.notifications import get_job_notifier
+from app.core.outbox import get_outbox_consumer
+from app.core.schema import ensure_schema
+from app.core.sweeper import get_job_sweeper
+
+
+# Comentário (pt-BR):
+# Consumidor do outbox como processo separado:
+#   python -m app.worker
+# Use com OUTBOX_CONSUMER_ENABLED=0 nos processos web, para que os efeitos
+# colaterais (avisos de vaga etc.) rodem só aqui. O import de
+# app.core.notifications registra os handlers do outbox.
+# O sweeper de vagas antigas sempre roda aqui; com JOB_SWEEPER_ENABLED=0
+# nos processos web, ele fica só neste processo.
+
+
+async def main() -> None:
+    """Run the outbox consumer and the job sweeper until SIGINT/SIGTERM."""
+
+    ensure_schema(engine)
+
+    notifier = get_job_notifier()
+    consumer = get_outbox_consumer()
+    sweeper = get_job_sweeper()
+    await notifier.start()
+    consumer.start()
+    sweeper.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    print("Consumidor do outbox rodando. Ctrl+C para sair.")
+    await stop.wait()
+
+    await sweeper.stop()
+    await consumer.stop()
+    await notifier.stop()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,143 @@
+"""
+Concurrency benchmark: sync Session vs AsyncSession inside `async def` handlers.
+
+Comentário (pt-BR):
+Simula o que o webhook faz por mensagem (buscar o usuário pelo telefone) com
+N requisições em paralelo no mesmo event loop, e compara:
+
+- sync:  `SessionLocal()` chamado direto dentro da coroutine (como o router
+         fazia antes). Cada round-trip bloqueia o event loop inteiro.
+- async: `AsyncSession` (aiosqlite/asyncpg). O loop fica livre durante o I/O.
+
+Para o SQLite local, o round-trip de rede de um Postgres real é emulado com
+`--latency-ms`: cada consulta chama uma função SQL que dorme esse tempo.
+Com `--database-url` apontando para um Postgres, use `--latency-ms 0`.
+
+Uso:
+    python -m benchmarks.bench_async_db
+    python -m benchmarks.bench_async_db --concurrency 1 8 32 --requests 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+from sqlalchemy import create_engine, event, func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from app.core.database import Base, async_database_url
+from app.models.models import User, UserType
+
+
+def _install_sleep_function(engine, latency_ms: float) -> None:  # noqa: ANN001
+    """Register `bench_sleep()` on every new SQLite connection."""
+
+    @event.listens_for(engine, "connect")
+    def _on_connect(dbapi_connection, connection_record) -> None:  # noqa: ANN001
+        def bench_sleep() -> int:
+            time.sleep(latency_ms / 1000.0)
+            return 0
+
+        dbapi_connection.create_function("bench_sleep", 0, bench_sleep)
+
+
+def _lookup_stmt(phone: str, latency_ms: float):  # noqa: ANN202
+    stmt = select(User).where(User.phone_number == phone)
+    if latency_ms > 0:
+        stmt = stmt.where(func.bench_sleep() == 0)
+    return stmt
+
+
+async def _run_sync(session_factory, phones: list[str], concurrency: int, latency_ms: float) -> float:  # noqa: ANN001
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(phone: str) -> None:
+        async with semaphore:
+            db = session_factory()
+            try:
+                db.scalars(_lookup_stmt(phone, latency_ms)).first()
+            finally:
+                db.close()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(phone) for phone in phones))
+    return time.perf_counter() - started
+
+
+async def _run_async(session_factory, phones: list[str], concurrency: int, latency_ms: float) -> float:  # noqa: ANN001
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(phone: str) -> None:
+        async with semaphore:
+            async with session_factory() as db:
+                (await db.scalars(_lookup_stmt(phone, latency_ms))).first()
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(phone) for phone in phones))
+    return time.perf_counter() - started
+
+
+async def main_async(args: argparse.Namespace) -> None:
+    database_url = args.database_url
+    tmp_dir = None
+    if database_url is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(tmp_dir.name, 'bench.db')}"
+
+    is_sqlite = database_url.startswith("sqlite")
+    latency_ms = args.latency_ms if is_sqlite else 0.0
+
+    sync_engine = create_engine(
+        database_url,
+        connect_args={"check_same_thread": False} if is_sqlite else {},
+        pool_size=max(args.concurrency),
+    )
+    async_engine = create_async_engine(async_database_url(database_url), pool_size=max(args.concurrency))
+    if latency_ms > 0:
+        _install_sleep_function(sync_engine, latency_ms)
+        _install_sleep_function(async_engine.sync_engine, latency_ms)
+
+    Base.metadata.create_all(bind=sync_engine)
+    phones = [f"whatsapp:+5500{i:09d}" for i in range(args.requests)]
+    with sessionmaker(bind=sync_engine)() as db:
+        if db.scalars(select(User).limit(1)).first() is None:
+            db.add_all(
+                User(phone_number=phone, user_type=UserType.WORKER, full_name="Bench")
+                for phone in phones
+            )
+            db.commit()
+
+    sync_factory = sessionmaker(bind=sync_engine)
+    async_factory = async_sessionmaker(bind=async_engine, expire_on_commit=False)
+
+    print(f"database={database_url} requests={args.requests} latency_ms={latency_ms}")
+    print(f"{'concurrency':>11} | {'sync req/s':>10} | {'async req/s':>11} | {'speedup':>7}")
+    for concurrency in args.concurrency:
+        sync_elapsed = await _run_sync(sync_factory, phones, concurrency, latency_ms)
+        async_elapsed = await _run_async(async_factory, phones, concurrency, latency_ms)
+        sync_rps = args.requests / sync_elapsed
+        async_rps = args.requests / async_elapsed
+        print(f"{concurrency:>11} | {sync_rps:>10.1f} | {async_rps:>11.1f} | {async_rps / sync_rps:>6.1f}x")
+
+    await async_engine.dispose()
+    sync_engine.dispose()
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Banco alvo (padrão: SQLite temporário).")
+    parser.add_argument("--requests", type=int, default=200, help="Requisições por rodada.")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    parser.add_argument("--latency-ms", type=float, default=5.0, help="Latência emulada por consulta (SQLite).")
+    asyncio.run(main_async(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
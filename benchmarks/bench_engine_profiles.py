@@ -0,0 +1,174 @@
+"""
+Write-throughput benchmark of the database engine profiles.
+
+Comentário (pt-BR):
+Simula vários workers do gunicorn (um processo cada) gravando no mesmo banco
+ao mesmo tempo, com a transação típica de uma mensagem do webhook:
+SELECT do estado do usuário + UPDATE do estágio + INSERT no processed_messages.
+
+Perfis comparados (ver app.core.database.EngineProfile):
+
+- rollback: journal padrão do SQLite (DELETE) com synchronous=FULL; escritores
+            e leitores se bloqueiam e cada commit faz vários fsync.
+- wal:      perfil padrão do app (WAL, synchronous=NORMAL, mmap, cache e
+            busy_timeout).
+
+Com `--database-url` apontando para um PostgreSQL, os dois perfis usam o mesmo
+pool e a comparação mostra só a variação entre rodadas.
+
+Uso:
+    python -m benchmarks.bench_engine_profiles
+    python -m benchmarks.bench_engine_profiles --workers 1 4 8 --transactions 300
+"""
+
+from __future__ import annotations
+
+import argparse
+import multiprocessing
+import os
+import tempfile
+import time
+from dataclasses import replace
+
+from sqlalchemy import create_engine, select, update
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+from app.core.database import Base, EngineProfile, engine_options, install_sqlite_pragmas
+from app.models.models import ProcessedMessage, User, UserType
+
+
+_APP_PROFILE = EngineProfile(
+    sqlite_journal_mode="WAL",
+    sqlite_synchronous="NORMAL",
+    sqlite_mmap_size=256 * 1024 * 1024,
+    sqlite_cache_size=-65536,
+    sqlite_busy_timeout_ms=5000,
+)
+
+PROFILES: dict[str, EngineProfile] = {
+    "rollback": replace(
+        _APP_PROFILE,
+        sqlite_journal_mode="DELETE",
+        sqlite_synchronous="FULL",
+        sqlite_mmap_size=None,
+        sqlite_cache_size=None,
+    ),
+    "wal": _APP_PROFILE,
+}
+
+
+def _make_engine(database_url: str, profile: EngineProfile):  # noqa: ANN202
+    engine = create_engine(database_url, **engine_options(database_url, profile))
+    install_sqlite_pragmas(engine, profile)
+    return engine
+
+
+_start_barrier = None
+
+
+def _init_worker(barrier) -> None:  # noqa: ANN001
+    global _start_barrier
+    _start_barrier = barrier
+
+
+def _worker(args: tuple[str, str, int, int, int]) -> tuple[int, int, float]:
+    """Run `transactions` webhook-like writes; return (ok, errors, elapsed)."""
+
+    database_url, profile_name, worker_id, transactions, users = args
+    engine = _make_engine(database_url, PROFILES[profile_name])
+    engine.connect().close()
+    # Todos os workers começam juntos (o tempo de subir o processo não conta).
+    _start_barrier.wait()
+    started = time.perf_counter()
+    ok = errors = 0
+    for n in range(transactions):
+        phone = f"whatsapp:+5500{(worker_id * transactions + n) % users:09d}"
+        try:
+            with Session(engine) as db:
+                user_id, stage = db.execute(
+                    select(User.id, User.conversation_stage).where(User.phone_number == phone)
+                ).one()
+                db.execute(
+                    update(User)
+                    .where(User.id == user_id)
+                    .values(conversation_stage="MAIN_MENU" if stage != "MAIN_MENU" else "ASKING_NAME")
+                )
+                db.add(
+                    ProcessedMessage(
+                        message_sid=f"SM-{profile_name}-{worker_id}-{n}-{time.monotonic_ns()}",
+                        response_body=b"<Response/>",
+                    )
+                )
+                db.commit()
+            ok += 1
+        except OperationalError:
+            # "database is locked": o webhook devolveria 500 e o Twilio reenviaria.
+            errors += 1
+    elapsed = time.perf_counter() - started
+    engine.dispose()
+    return ok, errors, elapsed
+
+
+def _prepare(database_url: str, users: int) -> None:
+    engine = _make_engine(database_url, PROFILES["wal"])
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    with Session(engine) as db:
+        db.add_all(
+            User(
+                phone_number=f"whatsapp:+5500{i:09d}",
+                user_type=UserType.WORKER,
+                full_name="Bench",
+                conversation_stage="MAIN_MENU",
+            )
+            for i in range(users)
+        )
+        db.commit()
+    engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Banco alvo (padrão: SQLite temporário).")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4, 8])
+    parser.add_argument("--transactions", type=int, default=200, help="Transações por worker.")
+    parser.add_argument("--users", type=int, default=1000)
+    args = parser.parse_args()
+
+    tmp_dir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(tmp_dir.name, 'bench.db')}"
+
+    print(f"database={database_url} transactions/worker={args.transactions}")
+    print(f"{'profile':>8} | {'workers':>7} | {'commits/s':>9} | {'errors':>6}")
+    ctx = multiprocessing.get_context("spawn")
+    for profile_name in PROFILES:
+        for workers in args.workers:
+            if database_url.startswith("sqlite"):
+                # Banco novo por rodada; o journal_mode fica gravado no arquivo.
+                for suffix in ("", "-wal", "-shm"):
+                    path = database_url.removeprefix("sqlite:///") + suffix
+                    if os.path.exists(path):
+                        os.remove(path)
+            _prepare(database_url, args.users)
+            # Garante o journal_mode do perfil no arquivo antes dos workers.
+            _make_engine(database_url, PROFILES[profile_name]).connect().close()
+
+            jobs = [(database_url, profile_name, w, args.transactions, args.users) for w in range(workers)]
+            with ctx.Pool(workers, initializer=_init_worker, initargs=(ctx.Barrier(workers),)) as pool:
+                results = pool.map(_worker, jobs, chunksize=1)
+
+            ok = sum(r[0] for r in results)
+            errors = sum(r[1] for r in results)
+            elapsed = max(r[2] for r in results)
+            print(f"{profile_name:>8} | {workers:>7} | {ok / elapsed:>9.1f} | {errors:>6}")
+
+    if tmp_dir is not None:
+        tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Read-path benchmark: full ORM objects vs column-projected `JobRow` tuples.
+
+Comentário (pt-BR):
+Mede o caminho de VAGAS no banco (índice em memória desligado) com as duas
+formas de materializar as vagas candidatas:
+
+- orm:  `select(JobOpportunity)`: objeto completo por linha, com identity
+        map, rastreamento de mudanças e a descrição.
+- rows: `select(*JOB_ROW_COLUMNS)` copiado para `JobRow` (NamedTuple com 5
+        campos), como faz app.core.nearby hoje.
+
+Dois cenários, sobre uma massa sintética (seed_db) com todas as vagas OPEN:
+
+- vagas: raio de VAGAS em volta do centro da maior região metropolitana
+         (grade + bounding box + Haversine exato), como uma requisição.
+- all:   todas as vagas abertas de uma vez (carga do índice em memória,
+         raios grandes).
+
+Para cada um: tempo mediano (sem tracemalloc), pico de memória alocada
+durante a leitura e o filtro, e quanto continua vivo enquanto o resultado
+é guardado (o cursor do MAIS guarda as vagas por até 10 minutos).
+
+Uso:
+    python -m benchmarks.bench_job_rows
+    python -m benchmarks.bench_job_rows --jobs 100000 --description-chars 1500 --repeat 9
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import os
+import statistics
+import tempfile
+import time
+import tracemalloc
+from collections.abc import Callable
+from typing import Any
+
+from sqlalchemy import Engine, create_engine, select, update
+from sqlalchemy.orm import Session
+
+from app.core.nearby import exact_matches, job_rows
+from app.core.queries import JOB_ROW_COLUMNS, job_is_open, open_jobs_near_stmt
+from app.models.models import JobOpportunity
+from seed_db import METRO_AREAS, SyntheticConfig, seed_synthetic
+
+VAGAS_RADIUS_KM = 10.0
+
+
+def _prepare(engine: Engine, jobs: int, description_chars: int, seed: int) -> None:
+    seed_synthetic(SyntheticConfig(users=2_000, jobs=jobs, seed=seed, open_ratio=1.0), engine)
+    # As descrições sintéticas são curtas; completamos até o tamanho pedido.
+    filler = " " + "x" * max(description_chars - 40, 0)
+    with engine.begin() as conn:
+        conn.execute(update(JobOpportunity).values(description=JobOpportunity.description + filler))
+
+
+def _read_orm(session: Session, stmt: Any, lat: float, lon: float, radius_km: float) -> list[tuple[Any, float]]:
+    jobs = session.scalars(stmt.with_only_columns(JobOpportunity)).all()
+    return exact_matches(jobs, lat, lon, radius_km)
+
+
+def _read_rows(session: Session, stmt: Any, lat: float, lon: float, radius_km: float) -> list[tuple[Any, float]]:
+    return exact_matches(job_rows(session.execute(stmt)), lat, lon, radius_km)
+
+
+def _measure(
+    engine: Engine,
+    read: Callable[..., list[tuple[Any, float]]],
+    stmt: Any,
+    lat: float,
+    lon: float,
+    radius_km: float,
+    repeat: int,
+) -> tuple[int, float, int, int]:
+    timings = []
+    for _ in range(repeat):
+        with Session(engine) as session:
+            started = time.perf_counter()
+            matches = read(session, stmt, lat, lon, radius_km)
+            timings.append(time.perf_counter() - started)
+        del matches
+
+    # Memória: um resultado guardado após a sessão fechar (como no cursor).
+    gc.collect()
+    tracemalloc.start()
+    baseline, _ = tracemalloc.get_traced_memory()
+    with Session(engine) as session:
+        matches = read(session, stmt, lat, lon, radius_km)
+    gc.collect()
+    retained, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return len(matches), statistics.median(timings), peak - baseline, retained - baseline
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=100_000, help="Vagas abertas geradas.")
+    parser.add_argument("--description-chars", type=int, default=500, help="Tamanho das descrições.")
+    parser.add_argument("--repeat", type=int, default=7, help="Rodadas por medição (mediana).")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        _prepare(engine, args.jobs, args.description_chars, args.seed)
+
+        metro = max(METRO_AREAS, key=lambda area: area.weight)
+        scenarios = {
+            "vagas": (
+                open_jobs_near_stmt(metro.latitude, metro.longitude, VAGAS_RADIUS_KM),
+                VAGAS_RADIUS_KM,
+            ),
+            "all": (select(*JOB_ROW_COLUMNS).where(job_is_open()), float("inf")),
+        }
+
+        print(f"jobs={args.jobs} description_chars={args.description_chars} center={metro.name}")
+        print(f"{'scenario':>8} | {'path':>4} | {'matches':>7} | {'median ms':>9} | {'peak MiB':>8} | {'kept MiB':>8}")
+        for name, (stmt, radius_km) in scenarios.items():
+            for path, read in (("orm", _read_orm), ("rows", _read_rows)):
+                count, median, peak, retained = _measure(
+                    engine, read, stmt, metro.latitude, metro.longitude, radius_km, args.repeat
+                )
+                print(
+                    f"{name:>8} | {path:>4} | {count:>7} | {median * 1000:>9.2f} | "
+                    f"{peak / 2**20:>8.2f} | {retained / 2**20:>8.2f}"
+                )
+        engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Startup benchmark: time from process start to the first successful `/health`.
+
+Comentário (pt-BR):
+Sobe o app com uvicorn num subprocesso (um worker, como cada worker do
+gunicorn) e mede quanto tempo leva até o /health responder 200. Duas
+situações:
+
+- cold: banco novo; o startup precisa criar as tabelas (DDL).
+- warm: banco já no schema atual; o startup só confere schema_version.
+
+Também mostra o tempo de `import main` isolado, o maior custo fixo do boot.
+Os números podem ser acompanhados ao longo do tempo (ex.: no CI).
+
+Uso:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --runs 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _time_to_health(env: dict[str, str], timeout: float) -> float:
+    port = _free_port()
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        url = f"http://127.0.0.1:{port}/health"
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except (urllib.error.URLError, ConnectionError):
+                time.sleep(0.01)
+        raise TimeoutError("o app não respondeu ao /health a tempo")
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+
+
+def _time_import(env: dict[str, str]) -> float:
+    code = "import time; t = time.perf_counter(); import main; print(time.perf_counter() - t)"
+    output = subprocess.run([sys.executable, "-c", code], env=env, capture_output=True, text=True, check=True)
+    return float(output.stdout.strip().splitlines()[-1])
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5, help="Repetições de cada medida.")
+    parser.add_argument("--timeout", type=float, default=30.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        env = {
+            **os.environ,
+            "TWILIO_ACCOUNT_SID": os.environ.get("TWILIO_ACCOUNT_SID", "bench-sid"),
+            "TWILIO_AUTH_TOKEN": os.environ.get("TWILIO_AUTH_TOKEN", "bench-token"),
+        }
+
+        imports = []
+        cold = []
+        warm = []
+        for run in range(args.runs):
+            env["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp_dir, f'startup-{run}.db')}"
+            imports.append(_time_import(env))
+            cold.append(_time_to_health(env, args.timeout))
+            warm.append(_time_to_health(env, args.timeout))
+
+    print(f"runs={args.runs}")
+    print(f"{'measure':>14} | {'median ms':>9} | {'min ms':>7} | {'max ms':>7}")
+    for name, values in (("import main", imports), ("cold /health", cold), ("warm /health", warm)):
+        print(
+            f"{name:>14} | {statistics.median(values) * 1000:>9.0f} | "
+            f"{min(values) * 1000:>7.0f} | {max(values) * 1000:>7.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,203 @@
+"""
+In-process load test of the WhatsApp webhook with signed synthetic conversations.
+
+Comentário (pt-BR):
+Dirige o `app` ASGI direto na memória (httpx ASGITransport, sem rede nem
+uvicorn) com milhares de números de telefone sintéticos. Cada conversa
+percorre o fluxo completo, com X-Twilio-Signature válida e MessageSid único:
+
+    first_contact -> choosing_type -> asking_name -> location -> vagas
+
+Em paralelo, o número admin cadastra vagas (/admin + "Cargo, Valor") a cada
+`--admin-every` conversas. No fim imprime a vazão total e a latência
+p50/p95/p99 de cada estágio, para comparar o antes/depois de mudanças no
+router, na camada de banco ou no código geográfico.
+
+O lifespan do app (schema, notifier, outbox, aquecimento) é executado
+manualmente, como o uvicorn faria.
+
+Uso:
+    python -m benchmarks.load_webhook
+    python -m benchmarks.load_webhook --conversations 5000 --concurrency 100
+    python -m benchmarks.load_webhook --database-url postgresql://...
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+
+# Metrópole sintética: centro de São José dos Campos.
+CENTER_LAT, CENTER_LON = -23.2237, -45.9009
+SPREAD_DEG = 0.15
+
+BASE_URL = "http://testserver"
+AUTH_TOKEN = "load-test-token"
+
+
+def _configure_environment(args: argparse.Namespace) -> tempfile.TemporaryDirectory | None:
+    """
+    As configurações são lidas no import de `app`; tudo é definido antes dele.
+    """
+
+    tmp_dir = None
+    database_url = args.database_url
+    if database_url is None:
+        tmp_dir = tempfile.TemporaryDirectory()
+        database_url = f"sqlite:///{os.path.join(tmp_dir.name, 'load.db')}"
+
+    os.environ["DATABASE_URL"] = database_url
+    os.environ["TWILIO_ACCOUNT_SID"] = "ACload"
+    os.environ["TWILIO_AUTH_TOKEN"] = AUTH_TOKEN
+    # Sem envio real de avisos: o notifier fica desligado.
+    os.environ.pop("TWILIO_WHATSAPP_NUMBER", None)
+    return tmp_dir
+
+
+def _percentiles(values: list[float]) -> tuple[float, float, float]:
+    if len(values) == 1:
+        return values[0], values[0], values[0]
+    cuts = statistics.quantiles(values, n=100, method="inclusive")
+    return cuts[49], cuts[94], cuts[98]
+
+
+async def run(args: argparse.Namespace) -> int:
+    import httpx
+    from sqlalchemy.orm import Session
+
+    from app.core.database import engine
+    from app.core.schema import ensure_schema
+    from app.core.security import TwilioSignatureVerifier
+    from app.models.models import JobOpportunity, JobStatus, User, UserType
+    from app.routers.webhook import ADMIN_NUMBER
+    from main import app
+
+    rng = random.Random(args.seed)
+    verifier = TwilioSignatureVerifier(AUTH_TOKEN)
+    sids = itertools.count()
+    latencies: dict[str, list[float]] = defaultdict(list)
+    failures: dict[str, int] = defaultdict(int)
+
+    # Vagas iniciais, para que VAGAS tenha o que responder.
+    ensure_schema(engine)
+    with Session(engine) as db:
+        contractor = User(
+            phone_number="whatsapp:+5512900000000",
+            user_type=UserType.CONTRACTOR,
+            full_name="Construtora Carga",
+            conversation_stage="MAIN_MENU",
+        )
+        db.add(contractor)
+        db.flush()
+        db.add_all(
+            JobOpportunity(
+                title=f"Vaga {i}",
+                description="Carga sintética",
+                payment_offer=round(rng.uniform(80, 400), 2),
+                latitude=CENTER_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG),
+                longitude=CENTER_LON + rng.uniform(-SPREAD_DEG, SPREAD_DEG),
+                contractor_id=contractor.id,
+                status=JobStatus.OPEN,
+            )
+            for i in range(args.jobs)
+        )
+        db.commit()
+
+    async def send(client: httpx.AsyncClient, stage: str, phone: str, **fields: str) -> None:
+        form = {"From": phone, "MessageSid": f"SMload{next(sids):012d}", **fields}
+        signature = verifier.compute_signature(f"{BASE_URL}/webhook", {k: [v] for k, v in form.items()})
+        started = time.perf_counter()
+        response = await client.post("/webhook", data=form, headers={"X-Twilio-Signature": signature})
+        latencies[stage].append(time.perf_counter() - started)
+        if response.status_code != 200:
+            failures[stage] += 1
+
+    async def conversation(client: httpx.AsyncClient, n: int) -> None:
+        phone = f"whatsapp:+5512{n:09d}"
+        lat = CENTER_LAT + rng.uniform(-SPREAD_DEG, SPREAD_DEG)
+        lon = CENTER_LON + rng.uniform(-SPREAD_DEG, SPREAD_DEG)
+        await send(client, "first_contact", phone, Body="oi")
+        await send(client, "choosing_type", phone, Body="oportunidades")
+        await send(client, "asking_name", phone, Body=f"Trabalhador {n}")
+        await send(client, "location", phone, Latitude=f"{lat:.6f}", Longitude=f"{lon:.6f}")
+        await send(client, "vagas", phone, Body="vagas")
+
+    async def admin_creates_job(client: httpx.AsyncClient, n: int) -> None:
+        await send(client, "admin_mode", ADMIN_NUMBER, Body="/admin")
+        await send(client, "admin_create_job", ADMIN_NUMBER, Body=f"Carga {n}, {100 + n % 300}.00")
+
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def limited(coro) -> None:  # noqa: ANN001
+        async with semaphore:
+            await coro
+
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url=BASE_URL) as client:
+            # Cadastro do admin (fora da medição principal).
+            for stage, fields in (
+                ("admin_setup", {"Body": "oi"}),
+                ("admin_setup", {"Body": "contratar"}),
+                ("admin_setup", {"Body": "Admin Carga"}),
+                ("admin_setup", {"Latitude": str(CENTER_LAT), "Longitude": str(CENTER_LON)}),
+            ):
+                await send(client, stage, ADMIN_NUMBER, **fields)
+            latencies.pop("admin_setup", None)
+
+            tasks = [limited(conversation(client, n)) for n in range(args.conversations)]
+            tasks += [
+                limited(admin_creates_job(client, n))
+                for n in range(0, args.conversations, max(args.admin_every, 1))
+            ]
+            rng.shuffle(tasks)
+
+            started = time.perf_counter()
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - started
+
+    total = sum(len(values) for values in latencies.values())
+    print(
+        f"database={os.environ['DATABASE_URL']} conversations={args.conversations} "
+        f"concurrency={args.concurrency} jobs={args.jobs}"
+    )
+    print(f"messages={total} elapsed={elapsed:.2f}s throughput={total / elapsed:.1f} msg/s")
+    print(f"{'stage':>16} | {'count':>6} | {'errors':>6} | {'p50 ms':>7} | {'p95 ms':>7} | {'p99 ms':>7}")
+    for stage, values in latencies.items():
+        p50, p95, p99 = _percentiles(values)
+        print(
+            f"{stage:>16} | {len(values):>6} | {failures[stage]:>6} | "
+            f"{p50 * 1000:>7.2f} | {p95 * 1000:>7.2f} | {p99 * 1000:>7.2f}"
+        )
+
+    return 1 if failures else 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--database-url", default=None, help="Banco alvo (padrão: SQLite temporário).")
+    parser.add_argument("--conversations", type=int, default=1000, help="Números sintéticos.")
+    parser.add_argument("--concurrency", type=int, default=50, help="Conversas simultâneas.")
+    parser.add_argument("--jobs", type=int, default=500, help="Vagas abertas pré-cadastradas.")
+    parser.add_argument("--admin-every", type=int, default=50, help="Uma vaga nova a cada N conversas.")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    tmp_dir = _configure_environment(args)
+    try:
+        sys.exit(asyncio.run(run(args)))
+    finally:
+        if tmp_dir is not None:
+            tmp_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main()
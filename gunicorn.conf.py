@@ -0,0 +1,121 @@
+import gc
+import os
+from pathlib import Path
+
+from app.core.config import get_settings
+
+
+# Comentário (pt-BR):
+# Perfil de produção do gunicorn com workers Uvicorn. O gunicorn carrega
+# este arquivo sozinho quando roda a partir da raiz do projeto:
+#   gunicorn main:app
+#
+# - preload_app: o master importa o app (FastAPI, SQLAlchemy, numpy, scipy,
+#   modelos...) uma vez e os workers herdam essas páginas por
+#   copy-on-write. O DDL (schema e backend espacial, ambos em
+#   ensure_schema) roda uma vez no master, antes do primeiro fork; o
+#   lifespan de cada worker só confere schema_version, escolhe o backend
+#   espacial já instalado (sem DDL) e segue com notifier, outbox, sweeper
+#   e aquecimento.
+# - Antes de cada fork os objetos do master vão para a geração permanente
+#   do GC (`gc.freeze`), para que as coletas nos workers não escrevam nessas
+#   páginas e desfaçam o compartilhamento.
+# - Depois do fork cada worker descarta os pools de conexão herdados do
+#   master (nunca compartilhar um socket do banco entre processos). O
+#   lifespan abre a primeira conexão do pool assíncrono (o que as rotas
+#   usam) antes de o worker aceitar requisições (app.core.warmup).
+# - Workers são reciclados com jitter (max_requests) e param com
+#   graceful_timeout, terminando o que estavam fazendo.
+#
+# Threads: os handlers são todos assíncronos e o UvicornWorker ignora a
+# opção `threads` do gunicorn; a concorrência de cada worker é o event
+# loop, limitado pelo pool do banco (DB_POOL_SIZE + DB_MAX_OVERFLOW). O
+# total de conexões abertas pode chegar a workers × esse valor.
+#
+# Métricas com vários workers: defina PROMETHEUS_MULTIPROC_DIR. O
+# diretório é criado e esvaziado quando o master sobe, e as séries de um worker que
+# saiu são descartadas no `child_exit`.
+
+
+_settings = get_settings()
+
+# Com preload_app o master importa o app (e o prometheus_client) antes de
+# `on_starting`, então o diretório precisa existir já aqui.
+_multiproc_dir = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"]) if os.getenv("PROMETHEUS_MULTIPROC_DIR") else None
+if _multiproc_dir is not None:
+    _multiproc_dir.mkdir(parents=True, exist_ok=True)
+
+
+def _available_cpus() -> int:
+    # Respeita o affinity/cpuset do container quando o SO informa.
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _worker_count() -> int:
+    if _settings.WEB_CONCURRENCY > 0:
+        return _settings.WEB_CONCURRENCY
+    return max(1, min(_available_cpus(), _settings.WEB_MAX_WORKERS))
+
+
+bind = f"0.0.0.0:{os.getenv('PORT', '8000')}"
+worker_class = "uvicorn.workers.UvicornWorker"
+workers = _worker_count()
+preload_app = True
+
+timeout = _settings.WEB_TIMEOUT_SECONDS
+graceful_timeout = _settings.WEB_GRACEFUL_TIMEOUT_SECONDS
+keepalive = _settings.WEB_KEEPALIVE_SECONDS
+max_requests = _settings.WEB_MAX_REQUESTS
+max_requests_jitter = _settings.WEB_MAX_REQUESTS_JITTER
+
+accesslog = "-"
+errorlog = "-"
+
+
+def on_starting(server) -> None:  # noqa: ANN001
+    """Drop Prometheus series left in the multiprocess directory by a previous run."""
+
+    if _multiproc_dir is None:
+        return
+    for path in _multiproc_dir.glob("*.db"):
+        path.unlink(missing_ok=True)
+
+
+def when_ready(server) -> None:  # noqa: ANN001
+    """Apply the schema once in the master, before any worker is forked."""
+
+    from app.core.database import engine
+    from app.core.schema import ensure_schema
+
+    # Sem isto, num banco novo todos os workers rodariam o DDL ao mesmo
+    # tempo no lifespan e disputariam o CREATE TABLE. Assim eles só
+    # conferem schema_version. O master fecha as próprias conexões: nenhum
+    # socket do banco é herdado pelos workers.
+    ensure_schema(engine)
+    engine.dispose()
+
+    per_worker = _settings.DB_POOL_SIZE + _settings.DB_MAX_OVERFLOW
+    server.log.info(
+        "%d worker(s); até %d conexões com o banco (%d por worker).",
+        workers,
+        workers * per_worker,
+        per_worker,
+    )
+
+
+def pre_fork(server, worker) -> None:  # noqa: ANN001
+    gc.freeze()
+
+
+def post_fork(server, worker) -> None:  # noqa: ANN001
+    from app.core.database import dispose_inherited_pools
+
+    dispose_inherited_pools()
+
+
+def child_exit(server, worker) -> None:  # noqa: ANN001
+    from app.core.metrics import mark_process_dead
+
+    mark_process_dead(worker.pid)
@@ -1,8 +1,21 @@
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 
+from app.routers.metrics import router as metrics_router
 from app.routers.webhook import router as webhook_router
-from app.core.config import settings  # noqa: F401  # Import ensures .env is loaded at startup
-from app.core.database import Base, engine
+from app.core.config import settings  # Import also ensures .env is loaded at startup
+from app.core.database import async_engine, engine
+from app.core.metrics import MetricsMiddleware, install_db_metrics
+from app.core.nearby import configure_nearby_search
+from app.core.notifications import get_job_notifier
+from app.core.outbox import get_outbox_consumer
+from app.core.schema import ensure_schema
+from app.core.security import TwilioSignatureMiddleware
+from app.core.sweeper import get_job_sweeper
+from app.core.warmup import open_first_connection, warm_up
 from app.models import models as models_module  # noqa: F401  # Import registers ORM models
 
 
@@ -11,7 +24,53 @@ from app.models import models as models_module  # noqa: F401  # Import registers
 # Aqui criamos a instância principal do app e registramos os routers
 # que expõem as rotas HTTP (por exemplo, o /webhook usado pelo WhatsApp/Twilio).
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    """
+    Application startup/shutdown.
+
+    Comentário (pt-BR):
+    No startup garantimos o schema do banco (o DDL só roda quando a versão
+    gravada em schema_version muda; ver app.core.schema, que também instala
+    o backend espacial da busca de vagas), escolhemos esse backend sem DDL
+    (app.core.nearby), iniciamos o
+    notifier e o consumidor do outbox, abrimos a primeira conexão do pool
+    assíncrono (o das rotas) e disparamos o resto do aquecimento do worker
+    em segundo plano, sem atrasar o primeiro /health. Em produção, você
+    provavelmente usaria migrações (ex.: Alembic).
+    Sem TWILIO_WHATSAPP_NUMBER configurado, o notifier fica desligado e
+    este processo não pega os avisos de vaga do outbox.
+    Com OUTBOX_CONSUMER_ENABLED=0 o consumidor roda à parte (app.worker).
+    O sweeper de vagas antigas roda junto quando JOB_SWEEPER_ENABLED.
+    """
+
+    ensure_schema(engine)
+    configure_nearby_search(engine)
+
+    notifier = get_job_notifier()
+    consumer = get_outbox_consumer()
+    sweeper = get_job_sweeper()
+    await notifier.start()
+    if settings.OUTBOX_CONSUMER_ENABLED:
+        consumer.start()
+    if settings.JOB_SWEEPER_ENABLED:
+        sweeper.start()
+    await open_first_connection()
+    warmup = asyncio.create_task(warm_up())
+
+    yield
+
+    warmup.cancel()
+    await asyncio.gather(warmup, return_exceptions=True)
+    # Dá alguns segundos para os efeitos colaterais em andamento terminarem.
+    await sweeper.stop()
+    await consumer.stop()
+    await notifier.stop()
+
+
 app = FastAPI(
+    lifespan=lifespan,
     title="Contech WhatsApp Bot",
     description=(
         "Backend em FastAPI para um bot de WhatsApp focado na construção civil. "
@@ -20,25 +79,25 @@ app = FastAPI(
     version="0.1.0",
 )
 
+# Comentário (pt-BR):
+# A assinatura do Twilio é validada num middleware ASGI, antes do roteamento,
+# da injeção de dependências e da abertura de sessão de banco.
+app.add_middleware(TwilioSignatureMiddleware, path="/webhook")
 
-@app.on_event("startup")
-def on_startup() -> None:
-    """
-    Application startup hook.
-
-    Comentário (pt-BR):
-    No startup da aplicação criamos automaticamente as tabelas no banco de dados,
-    usando o metadata do SQLAlchemy. Em ambientes de produção, você provavelmente
-    usaria migrações (ex.: Alembic), mas para desenvolvimento este approach é prático.
-    """
-
-    Base.metadata.create_all(bind=engine)
+# Comentário (pt-BR):
+# Métricas Prometheus (GET /metrics). O middleware de métricas é adicionado
+# por último para ficar por fora e medir também a validação da assinatura.
+if settings.METRICS_ENABLED:
+    install_db_metrics(async_engine.sync_engine)
+    app.add_middleware(MetricsMiddleware, path="/webhook")
 
 
 # Comentário (pt-BR):
 # Registramos o router responsável pelas rotas de integração com o WhatsApp/Twilio.
 # Ao usar um prefixo (por exemplo, /webhook), mantemos a organização das rotas.
 app.include_router(webhook_router, prefix="")
+if settings.METRICS_ENABLED:
+    app.include_router(metrics_router)
 
 
 @app.get("/health", tags=["healthcheck"])
@@ -59,8 +118,10 @@ async def healthcheck() -> dict[str, str]:
 # Comentário (pt-BR):
 # Para rodar a aplicação localmente você pode usar uvicorn diretamente:
 #   uvicorn main:app --reload
-# Em produção no Render, é recomendado usar gunicorn com worker Uvicorn:
-#   gunicorn -k uvicorn.workers.UvicornWorker main:app
+# Em produção no Render, use gunicorn com workers Uvicorn; o perfil em
+# gunicorn.conf.py (preload, número de workers, hooks de fork) é carregado
+# automaticamente a partir da raiz do projeto:
+#   gunicorn main:app
 #
 # A variável de ambiente PORT (fornecida pelo Render) é usada abaixo
 # apenas quando rodamos o arquivo diretamente com `python main.py`.
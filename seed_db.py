@@ -1,18 +1,394 @@
 """
-Simple database seeding script for local development.
+Database seeding script: small dev seed or a large synthetic dataset.
 
 Comentário (pt-BR):
-Este script popula o banco SQLite (construction.db) com dados de teste,
-incluindo um usuário do tipo CONSTRUTORA e algumas vagas de trabalho
-em São José dos Campos.
+Sem argumentos, popula o banco com os dados de desenvolvimento de sempre:
+um usuário do tipo CONSTRUTORA e algumas vagas em São José dos Campos.
+
+Com --users/--jobs, gera uma massa sintética do tamanho que quisermos para
+benchmarks (índices espaciais, caches, arquivamento...):
+
+- Usuários e vagas ficam concentrados em regiões metropolitanas reais, com
+  densidade que cai com a distância do centro (núcleo denso, periferia
+  rala), mais uma fração espalhada uniformemente pela área (`--background`).
+- `--bbox` restringe a geração a um retângulo (ex.: só o Vale do Paraíba).
+- A mesma `--seed` gera exatamente os mesmos dados.
+- A gravação é em lotes: `insert()` com executemany, ou `COPY` no
+  PostgreSQL com psycopg2. Milhões de linhas levam segundos a minutos.
+
+Uso:
+    python seed_db.py
+    python seed_db.py --users 1000000 --jobs 200000 --seed 7
+    python seed_db.py --users 50000 --jobs 10000 --bbox -23.6,-46.2,-22.8,-45.2 --truncate
 """
 
 from __future__ import annotations
 
-from sqlalchemy import select
+import argparse
+import csv
+import io
+import time
+from collections.abc import Iterator
+from dataclasses import dataclass, replace
+from datetime import datetime, timedelta
+
+import numpy as np
+from sqlalchemy import Engine, create_engine, delete, insert, select
+
+from app.core.database import (
+    SessionLocal,
+    engine,
+    engine_options,
+    engine_profile,
+    install_sqlite_pragmas,
+    settings,
+)
+from app.core.schema import ensure_schema
+from app.core.utils import grid_cell
+from app.models.models import (
+    ArchivedJobOpportunity,
+    JobOpportunity,
+    JobStatus,
+    OutboxEvent,
+    ProcessedMessage,
+    User,
+    UserType,
+)
+
+
+@dataclass(frozen=True, slots=True)
+class MetroArea:
+    """
+    A metropolitan area used as a density cluster by the generator.
+
+    `weight` is the relative share of rows; `scale_km` is the mean distance
+    from the center (the radial distance is exponentially distributed).
+    """
+
+    name: str
+    latitude: float
+    longitude: float
+    weight: float
+    scale_km: float
+
+
+# Pesos aproximados pela população das regiões metropolitanas (milhões).
+METRO_AREAS: tuple[MetroArea, ...] = (
+    MetroArea("São Paulo", -23.5505, -46.6333, 21.0, 18.0),
+    MetroArea("Rio de Janeiro", -22.9068, -43.1729, 13.0, 15.0),
+    MetroArea("Belo Horizonte", -19.9167, -43.9345, 6.0, 12.0),
+    MetroArea("Brasília", -15.7939, -47.8828, 4.5, 14.0),
+    MetroArea("Porto Alegre", -30.0346, -51.2177, 4.3, 12.0),
+    MetroArea("Recife", -8.0476, -34.8770, 4.0, 10.0),
+    MetroArea("Fortaleza", -3.7319, -38.5267, 4.0, 10.0),
+    MetroArea("Salvador", -12.9777, -38.5016, 3.9, 10.0),
+    MetroArea("Curitiba", -25.4284, -49.2733, 3.7, 11.0),
+    MetroArea("Campinas", -22.9099, -47.0626, 3.3, 10.0),
+    MetroArea("Goiânia", -16.6869, -49.2648, 2.6, 9.0),
+    MetroArea("Manaus", -3.1190, -60.0217, 2.7, 8.0),
+    MetroArea("Belém", -1.4558, -48.4902, 2.5, 8.0),
+    MetroArea("Vale do Paraíba", -23.2237, -45.9009, 2.6, 9.0),
+    MetroArea("Florianópolis", -27.5954, -48.5480, 1.2, 8.0),
+)
+
+# Retângulo padrão: Brasil continental (lat_min, lon_min, lat_max, lon_max).
+BRAZIL_BBOX = (-33.75, -73.99, 5.27, -34.79)
+
+KM_PER_DEG = 111.32
+
+FIRST_NAMES = (
+    "Ana", "Antônio", "Bruno", "Carla", "Carlos", "Daniel", "Eduardo", "Fernanda",
+    "Francisco", "Gabriel", "João", "José", "Juliana", "Luiz", "Marcos", "Maria",
+    "Paulo", "Pedro", "Rafael", "Rodrigo", "Sebastião", "Tiago", "Vanessa", "Vitor",
+)
+LAST_NAMES = (
+    "Almeida", "Alves", "Barbosa", "Cardoso", "Costa", "Ferreira", "Gomes",
+    "Lima", "Martins", "Oliveira", "Pereira", "Ribeiro", "Rocha", "Santos",
+    "Silva", "Souza",
+)
+JOB_TITLES = (
+    "Pedreiro", "Servente", "Eletricista", "Encanador", "Pintor", "Carpinteiro",
+    "Armador", "Gesseiro", "Azulejista", "Mestre de Obras", "Serralheiro",
+    "Vidraceiro", "Soldador", "Marceneiro", "Impermeabilizador",
+)
+JOB_TASKS = (
+    "reboco de parede interna", "assentamento de piso", "instalação elétrica",
+    "reforma de banheiro", "pintura de fachada", "montagem de forma",
+    "laje de cobertura", "muro de divisa", "telhado residencial",
+    "acabamento de apartamento",
+)
+
+
+@dataclass(frozen=True, slots=True)
+class SyntheticConfig:
+    """Parameters of a synthetic dataset."""
+
+    users: int
+    jobs: int
+    seed: int = 42
+    bbox: tuple[float, float, float, float] = BRAZIL_BBOX
+    background: float = 0.05
+    contractor_ratio: float = 0.05
+    without_location_ratio: float = 0.1
+    open_ratio: float = 0.3
+    max_age_days: int = 180
+    batch_size: int = 10_000
+
+
+def sample_points(
+    rng: np.random.Generator,
+    size: int,
+    metros: tuple[MetroArea, ...],
+    bbox: tuple[float, float, float, float],
+    background: float,
+) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Draw `size` coordinates clustered around `metros` inside `bbox`.
+
+    Comentário (pt-BR):
+    Cada ponto escolhe uma metrópole pelo peso e cai a uma distância
+    exponencial do centro, em direção uniforme: muita gente no núcleo,
+    pouca na periferia. A fração `background` é uniforme no retângulo.
+    Pontos que saem do retângulo são sorteados de novo.
+    """
+
+    lat_min, lon_min, lat_max, lon_max = bbox
+    lats = np.empty(size)
+    lons = np.empty(size)
+    if size == 0:
+        return lats, lons
+
+    weights = np.array([metro.weight for metro in metros], dtype=float)
+    if len(metros) == 0:
+        background = 1.0
+    else:
+        weights /= weights.sum()
+    centers_lat = np.array([metro.latitude for metro in metros])
+    centers_lon = np.array([metro.longitude for metro in metros])
+    scales = np.array([metro.scale_km for metro in metros])
+
+    missing = np.arange(size)
+    while missing.size:
+        n = missing.size
+        uniform = rng.random(n) < background
+        lat = rng.uniform(lat_min, lat_max, n)
+        lon = rng.uniform(lon_min, lon_max, n)
+
+        clustered = np.flatnonzero(~uniform)
+        if clustered.size:
+            which = rng.choice(len(metros), size=clustered.size, p=weights)
+            distance_km = rng.exponential(scales[which])
+            angle = rng.uniform(0.0, 2.0 * np.pi, clustered.size)
+            d_lat = distance_km * np.sin(angle) / KM_PER_DEG
+            d_lon = distance_km * np.cos(angle) / (KM_PER_DEG * np.cos(np.radians(centers_lat[which])))
+            lat[clustered] = centers_lat[which] + d_lat
+            lon[clustered] = centers_lon[which] + d_lon
+
+        inside = (lat >= lat_min) & (lat <= lat_max) & (lon >= lon_min) & (lon <= lon_max)
+        lats[missing[inside]] = lat[inside]
+        lons[missing[inside]] = lon[inside]
+        missing = missing[~inside]
+
+    return lats, lons
 
-from app.core.database import SessionLocal, engine
-from app.models.models import Base, JobOpportunity, JobStatus, User, UserType
+
+def metros_in_bbox(bbox: tuple[float, float, float, float]) -> tuple[MetroArea, ...]:
+    """Metro areas whose center lies inside `bbox`."""
+
+    lat_min, lon_min, lat_max, lon_max = bbox
+    return tuple(
+        metro
+        for metro in METRO_AREAS
+        if lat_min <= metro.latitude <= lat_max and lon_min <= metro.longitude <= lon_max
+    )
+
+
+def generate_users(config: SyntheticConfig, rng: np.random.Generator) -> Iterator[list[dict]]:
+    """
+    Yield batches of `users` rows (dicts keyed by column name).
+
+    Comentário (pt-BR):
+    Telefones sintéticos são únicos e determinísticos: whatsapp:+559<n>.
+    Todos terminam no MAIN_MENU, como no cadastro real; a localização é
+    enviada depois, então uma fração fica com latitude/longitude NULL.
+    """
+
+    metros = metros_in_bbox(config.bbox)
+    for start in range(0, config.users, config.batch_size):
+        n = min(config.batch_size, config.users - start)
+        lats, lons = sample_points(rng, n, metros, config.bbox, config.background)
+        contractor = rng.random(n) < config.contractor_ratio
+        located = rng.random(n) >= config.without_location_ratio
+        first = rng.integers(len(FIRST_NAMES), size=n)
+        last = rng.integers(len(LAST_NAMES), size=n)
+
+        yield [
+            {
+                "phone_number": f"whatsapp:+559{start + i:010d}",
+                "user_type": UserType.CONTRACTOR if contractor[i] else UserType.WORKER,
+                "full_name": f"{FIRST_NAMES[first[i]]} {LAST_NAMES[last[i]]}",
+                "latitude": float(lats[i]) if located[i] else None,
+                "longitude": float(lons[i]) if located[i] else None,
+                "conversation_stage": "MAIN_MENU",
+            }
+            for i in range(n)
+        ]
+
+
+def generate_jobs(
+    config: SyntheticConfig,
+    rng: np.random.Generator,
+    contractor_ids: np.ndarray,
+    now: datetime,
+) -> Iterator[list[dict]]:
+    """
+    Yield batches of `jobs` rows owned by random `contractor_ids`.
+
+    Comentário (pt-BR):
+    `grid_cell` é calculado aqui: o insert em massa não passa pelos eventos
+    do ORM que preenchem a coluna. `created_at` é uniforme nos últimos
+    `max_age_days` dias; só `open_ratio` das vagas continua OPEN.
+    """
+
+    metros = metros_in_bbox(config.bbox)
+    closed_statuses = (JobStatus.CLOSED, JobStatus.FILLED)
+    for start in range(0, config.jobs, config.batch_size):
+        n = min(config.batch_size, config.jobs - start)
+        lats, lons = sample_points(rng, n, metros, config.bbox, config.background)
+        owners = rng.choice(contractor_ids, size=n)
+        titles = rng.integers(len(JOB_TITLES), size=n)
+        tasks = rng.integers(len(JOB_TASKS), size=n)
+        payments = np.round(rng.lognormal(mean=5.5, sigma=0.35, size=n), 2)
+        is_open = rng.random(n) < config.open_ratio
+        closed_as = rng.integers(len(closed_statuses), size=n)
+        age_seconds = rng.uniform(0, config.max_age_days * 86400, size=n)
+
+        yield [
+            {
+                "title": JOB_TITLES[titles[i]],
+                "description": f"{JOB_TITLES[titles[i]]} para {JOB_TASKS[tasks[i]]}.",
+                "payment_offer": float(payments[i]),
+                "latitude": float(lats[i]),
+                "longitude": float(lons[i]),
+                "grid_cell": grid_cell(float(lats[i]), float(lons[i])),
+                "contractor_id": int(owners[i]),
+                "status": JobStatus.OPEN if is_open[i] else closed_statuses[closed_as[i]],
+                "created_at": now - timedelta(seconds=float(age_seconds[i])),
+            }
+            for i in range(n)
+        ]
+
+
+# Perfil do app sem statement_timeout: um COPY de milhões de linhas (ou o
+# DELETE do --truncate) passa fácil dos DB_STATEMENT_TIMEOUT_MS pensados
+# para requisições do webhook.
+seed_engine = create_engine(
+    settings.DATABASE_URL,
+    **engine_options(settings.DATABASE_URL, replace(engine_profile, statement_timeout_ms=0)),
+)
+install_sqlite_pragmas(seed_engine, engine_profile)
+
+# Tabelas apagadas pelo --truncate, dependentes antes de users (FK das vagas).
+# schema_version fica: o schema continua o mesmo.
+TRUNCATE_ORDER = (
+    ProcessedMessage.__table__,
+    OutboxEvent.__table__,
+    ArchivedJobOpportunity.__table__,
+    JobOpportunity.__table__,
+    User.__table__,
+)
+
+
+def _copy_rows(target_engine: Engine, table, rows: list[dict]) -> None:
+    """
+    Load `rows` with PostgreSQL COPY (psycopg2 only).
+
+    Enums vão pelo valor e None vira campo vazio sem aspas (NULL no CSV).
+    """
+
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    for row in rows:
+        writer.writerow(
+            "" if value is None else value.value if isinstance(value, (UserType, JobStatus)) else value
+            for value in row.values()
+        )
+    buffer.seek(0)
+
+    raw = target_engine.raw_connection()
+    try:
+        with raw.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+        raw.commit()
+    finally:
+        raw.close()
+
+
+def _write_batches(target_engine: Engine, table, batches: Iterator[list[dict]]) -> int:
+    use_copy = target_engine.dialect.name == "postgresql" and target_engine.driver == "psycopg2"
+    written = 0
+    for rows in batches:
+        if not rows:
+            continue
+        if use_copy:
+            _copy_rows(target_engine, table, rows)
+        else:
+            with target_engine.begin() as conn:
+                conn.execute(insert(table), rows)
+        written += len(rows)
+    return written
+
+
+def seed_synthetic(config: SyntheticConfig, target_engine: Engine = seed_engine, truncate: bool = False) -> None:
+    """
+    Bulk-load a reproducible synthetic dataset of users and jobs.
+
+    Comentário (pt-BR):
+    As vagas são ligadas a construtoras já existentes no banco (inclusive
+    as geradas nesta execução). Sem `truncate`, telefones sintéticos
+    repetidos de uma execução anterior violam a unicidade; com ele, todas
+    as tabelas do app são esvaziadas (TRUNCATE_ORDER), não só usuários e
+    vagas.
+    """
+
+    ensure_schema(target_engine)
+    rng = np.random.default_rng(config.seed)
+
+    if truncate:
+        with target_engine.begin() as conn:
+            for table in TRUNCATE_ORDER:
+                conn.execute(delete(table))
+
+    started = time.perf_counter()
+    users = _write_batches(target_engine, User.__table__, generate_users(config, rng))
+    users_elapsed = time.perf_counter() - started
+    print(f"{users} usuários em {users_elapsed:.1f}s ({users / max(users_elapsed, 1e-9):,.0f}/s)")
+
+    if config.jobs == 0:
+        return
+
+    with target_engine.connect() as conn:
+        contractor_ids = np.array(
+            conn.scalars(
+                select(User.id).where(User.user_type == UserType.CONTRACTOR).order_by(User.id)
+            ).all(),
+            dtype=np.int64,
+        )
+    if contractor_ids.size == 0:
+        raise SystemExit("Nenhuma construtora no banco; aumente --users ou --contractor-ratio.")
+
+    started = time.perf_counter()
+    jobs = _write_batches(
+        target_engine,
+        JobOpportunity.__table__,
+        generate_jobs(config, rng, contractor_ids, datetime.utcnow()),
+    )
+    jobs_elapsed = time.perf_counter() - started
+    print(f"{jobs} vagas em {jobs_elapsed:.1f}s ({jobs / max(jobs_elapsed, 1e-9):,.0f}/s)")
 
 
 def seed_data() -> None:
@@ -21,7 +397,7 @@ def seed_data() -> None:
     """
 
     # Garante que as tabelas existam antes de qualquer operação (Postgres/AWS).
-    Base.metadata.create_all(bind=engine)
+    ensure_schema(engine)
 
     db = SessionLocal()
     try:
@@ -96,5 +472,46 @@ def seed_data() -> None:
         db.close()
 
 
+def _parse_bbox(value: str) -> tuple[float, float, float, float]:
+    parts = tuple(float(part) for part in value.split(","))
+    if len(parts) != 4 or parts[0] >= parts[2] or parts[1] >= parts[3]:
+        raise argparse.ArgumentTypeError("use lat_min,lon_min,lat_max,lon_max")
+    return parts  # type: ignore[return-value]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=0, help="Usuários sintéticos (0 = seed de desenvolvimento).")
+    parser.add_argument("--jobs", type=int, default=0, help="Vagas sintéticas.")
+    parser.add_argument("--seed", type=int, default=42, help="Semente (mesma semente, mesmos dados).")
+    parser.add_argument("--bbox", type=_parse_bbox, default=BRAZIL_BBOX, help="lat_min,lon_min,lat_max,lon_max")
+    parser.add_argument("--background", type=float, default=0.05, help="Fração uniforme fora das metrópoles.")
+    parser.add_argument("--contractor-ratio", type=float, default=0.05)
+    parser.add_argument("--open-ratio", type=float, default=0.3, help="Fração de vagas ainda OPEN.")
+    parser.add_argument("--max-age-days", type=int, default=180, help="Idade máxima de created_at das vagas.")
+    parser.add_argument("--batch-size", type=int, default=10_000)
+    parser.add_argument("--truncate", action="store_true", help="Apaga os dados do app antes de gerar.")
+    args = parser.parse_args()
+
+    if args.users == 0 and args.jobs == 0:
+        seed_data()
+        return
+
+    seed_synthetic(
+        SyntheticConfig(
+            users=args.users,
+            jobs=args.jobs,
+            seed=args.seed,
+            bbox=args.bbox,
+            background=args.background,
+            contractor_ratio=args.contractor_ratio,
+            open_ratio=args.open_ratio,
+            max_age_days=args.max_age_days,
+            batch_size=args.batch_size,
+        ),
+        truncate=args.truncate,
+    )
+
+
 if __name__ == "__main__":
-    seed_data()
+    main()
@@ -0,0 +1,15 @@
+import os
+import tempfile
+
+
+# Comentário (pt-BR):
+# As configurações (app.core.config.settings) são lidas do ambiente no momento
+# do import. Por isso definimos aqui, antes de qualquer import do pacote `app`,
+# um banco SQLite temporário e credenciais do Twilio conhecidas pelos testes.
+# Assim nenhum teste toca o construction.db local ou um banco real.
+
+_TEST_DB_DIR = tempfile.mkdtemp(prefix="contech-tests-")
+
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(_TEST_DB_DIR, 'test.db')}"
+os.environ["TWILIO_ACCOUNT_SID"] = "test-sid"
+os.environ["TWILIO_AUTH_TOKEN"] = "test-token"
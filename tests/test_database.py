@@ -0,0 +1,124 @@
+import asyncio
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.core.database import (
+    EngineProfile,
+    async_engine,
+    dispose_inherited_pools,
+    engine,
+    engine_options,
+    install_sqlite_pragmas,
+)
+from app.core.warmup import open_first_connection
+
+
+# Comentário (pt-BR):
+# Depois do fork (gunicorn `post_fork`), o worker troca os pools herdados
+# por pools novos sem fechar as conexões do processo pai. No lifespan, a
+# primeira conexão do pool assíncrono (o das rotas) já fica aberta.
+# O EngineProfile vira PRAGMAs em toda conexão nova do SQLite e opções de
+# pool/statement_timeout no PostgreSQL, com a chave de cada driver.
+
+
+def test_dispose_inherited_pools_keeps_parent_connections_open() -> None:
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))
+        inherited = conn.connection.dbapi_connection
+    old_pool, old_async_pool = engine.pool, async_engine.sync_engine.pool
+
+    dispose_inherited_pools()
+
+    assert engine.pool is not old_pool
+    assert async_engine.sync_engine.pool is not old_async_pool
+    assert inherited.execute("SELECT 1").fetchone() == (1,)  # não foi fechada
+
+
+def test_first_connection_is_opened_in_the_async_pool() -> None:
+    async def scenario() -> int:
+        await async_engine.dispose()
+        await open_first_connection()
+        checked_in = async_engine.sync_engine.pool.checkedin()
+        await async_engine.dispose()
+        return checked_in
+
+    assert asyncio.run(scenario()) == 1
+
+
+SQLITE_PROFILE = EngineProfile(
+    sqlite_journal_mode="WAL",
+    sqlite_synchronous="NORMAL",
+    sqlite_mmap_size=1_048_576,
+    sqlite_cache_size=-4000,
+    sqlite_busy_timeout_ms=1234,
+)
+
+# Valores como o SQLite devolve (synchronous=NORMAL é 1).
+EXPECTED_PRAGMAS = {
+    "journal_mode": "wal",
+    "synchronous": 1,
+    "mmap_size": 1_048_576,
+    "cache_size": -4000,
+    "busy_timeout": 1234,
+}
+
+
+def test_sqlite_pragmas_apply_to_new_sync_connections(tmp_path: Path) -> None:
+    url = f"sqlite:///{tmp_path / 'sync.db'}"
+    sync_engine = create_engine(url, **engine_options(url, SQLITE_PROFILE))
+    install_sqlite_pragmas(sync_engine, SQLITE_PROFILE)
+
+    with sync_engine.connect() as conn:
+        found = {name: conn.exec_driver_sql(f"PRAGMA {name}").scalar() for name in EXPECTED_PRAGMAS}
+    sync_engine.dispose()
+
+    assert found == EXPECTED_PRAGMAS
+
+
+def test_sqlite_pragmas_apply_to_new_async_connections(tmp_path: Path) -> None:
+    url = f"sqlite+aiosqlite:///{tmp_path / 'async.db'}"
+
+    async def scenario() -> dict[str, object]:
+        pragma_engine = create_async_engine(url, **engine_options(url, SQLITE_PROFILE))
+        install_sqlite_pragmas(pragma_engine.sync_engine, SQLITE_PROFILE)
+        async with pragma_engine.connect() as conn:
+            found = {
+                name: (await conn.exec_driver_sql(f"PRAGMA {name}")).scalar() for name in EXPECTED_PRAGMAS
+            }
+        await pragma_engine.dispose()
+        return found
+
+    assert asyncio.run(scenario()) == EXPECTED_PRAGMAS
+
+
+@pytest.mark.parametrize(
+    ("url", "connect_args"),
+    [
+        ("postgresql://app@db/contech", {"options": "-c statement_timeout=5000"}),
+        ("postgresql+psycopg2://app@db/contech", {"options": "-c statement_timeout=5000"}),
+        ("postgresql+psycopg://app@db/contech", {"options": "-c statement_timeout=5000"}),
+        ("postgresql+asyncpg://app@db/contech", {"server_settings": {"statement_timeout": "5000"}}),
+    ],
+)
+def test_postgres_profile_builds_pool_and_statement_timeout_options(url: str, connect_args: dict) -> None:
+    profile = EngineProfile(
+        pool_size=7,
+        max_overflow=3,
+        pool_timeout_seconds=2.5,
+        pool_recycle_seconds=600,
+        pool_pre_ping=False,
+        statement_timeout_ms=5000,
+    )
+
+    assert engine_options(url, profile) == {
+        "pool_size": 7,
+        "max_overflow": 3,
+        "pool_timeout": 2.5,
+        "pool_recycle": 600,
+        "pool_pre_ping": False,
+        "connect_args": connect_args,
+    }
+    assert "connect_args" not in engine_options(url, EngineProfile(statement_timeout_ms=0))
@@ -1,6 +1,18 @@
 import unittest
 
-from app.core.utils import haversine
+import random
+from types import SimpleNamespace
+
+from app.core.queries import JobRow
+from app.core.utils import (
+    bounding_box,
+    find_nearby_indices,
+    find_nearby_jobs,
+    grid_cell,
+    grid_cells_covering,
+    haversine,
+    haversine_many,
+)
 
 
 class TestGeoUtils(unittest.TestCase):
@@ -34,6 +46,72 @@ class TestGeoUtils(unittest.TestCase):
         self.assertGreater(distance_km, 8.0)
         self.assertLess(distance_km, 18.0)
 
+    def test_grid_cells_cover_every_point_in_radius(self) -> None:
+        """
+        Todo ponto dentro do raio deve cair na bounding box e em uma das
+        células retornadas por `grid_cells_covering` (pré-filtro sem falsos
+        negativos).
+        """
+
+        rng = random.Random(42)
+        center_lat, center_lon, radius_km = -23.2237, -45.9009, 10.0
+
+        min_lat, max_lat, min_lon, max_lon = bounding_box(center_lat, center_lon, radius_km)
+        cells = set(grid_cells_covering(center_lat, center_lon, radius_km))
+
+        for _ in range(2000):
+            lat = center_lat + rng.uniform(-0.2, 0.2)
+            lon = center_lon + rng.uniform(-0.2, 0.2)
+            if haversine(center_lat, center_lon, lat, lon) > radius_km:
+                continue
+
+            self.assertTrue(min_lat <= lat <= max_lat)
+            self.assertTrue(min_lon <= lon <= max_lon)
+            self.assertIn(grid_cell(lat, lon), cells)
+
+    def test_vectorized_matches_scalar(self) -> None:
+        """
+        `haversine_many`/`find_nearby_indices` devem concordar com as versões
+        escalares (`haversine`/`find_nearby_jobs`) ponto a ponto.
+        """
+
+        rng = random.Random(7)
+        user_lat, user_lon = -23.2237, -45.9009
+        jobs = [
+            SimpleNamespace(
+                latitude=user_lat + rng.uniform(-0.3, 0.3),
+                longitude=user_lon + rng.uniform(-0.3, 0.3),
+            )
+            for _ in range(1000)
+        ]
+        lats = [job.latitude for job in jobs]
+        lons = [job.longitude for job in jobs]
+
+        distances = haversine_many(user_lat, user_lon, lats, lons)
+        for job, distance in zip(jobs, distances):
+            self.assertAlmostEqual(
+                haversine(user_lat, user_lon, job.latitude, job.longitude),
+                float(distance),
+                places=9,
+            )
+
+        indices, nearby_distances = find_nearby_indices(user_lat, user_lon, lats, lons, 10.0)
+        expected = find_nearby_jobs(user_lat, user_lon, jobs, 10.0)
+
+        self.assertEqual([jobs[i] for i in indices], expected)
+        self.assertTrue(all(d <= 10.0 for d in nearby_distances))
+
+    def test_find_nearby_jobs_accepts_job_rows(self) -> None:
+        """
+        As linhas projetadas (`JobRow`) passam pelo mesmo filtro que os
+        objetos ORM e voltam como `JobRow`.
+        """
+
+        sjc = JobRow(id=1, title="Pedreiro", payment_offer=200.0, latitude=-23.2237, longitude=-45.9009)
+        rio = JobRow(id=2, title="Pintor", payment_offer=150.0, latitude=-22.9068, longitude=-43.1729)
+
+        self.assertEqual(find_nearby_jobs(-23.22, -45.90, [sjc, rio], 10.0), [sjc])
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,126 @@
+import asyncio
+import random
+from pathlib import Path
+
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.core.geo_index import OpenJobIndex, get_open_job_index
+from app.core.utils import find_nearby_jobs
+from app.models.models import JobOpportunity, JobStatus, User, UserType
+
+
+# Comentário (pt-BR):
+# Testes do índice espacial em memória: ele deve responder exatamente o mesmo
+# conjunto que o filtro por Haversine e acompanhar as escritas feitas via ORM.
+# Com o índice vencido, requisições simultâneas fazem uma recarga só.
+
+
+SJC_LAT, SJC_LON = -23.2237, -45.9009
+
+
+def _make_session() -> Session:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    session = Session(engine)
+
+    contractor = User(
+        phone_number="whatsapp:+5512000000000",
+        user_type=UserType.CONTRACTOR,
+        full_name="Construtora Teste",
+    )
+    session.add(contractor)
+    session.commit()
+    session.info["contractor_id"] = contractor.id
+    return session
+
+
+def _job(session: Session, lat: float, lon: float, title: str = "Pedreiro") -> JobOpportunity:
+    return JobOpportunity(
+        title=title,
+        description="Teste",
+        payment_offer=200.0,
+        latitude=lat,
+        longitude=lon,
+        contractor_id=session.info["contractor_id"],
+        status=JobStatus.OPEN,
+    )
+
+
+def test_index_matches_haversine_filter() -> None:
+    session = _make_session()
+    rng = random.Random(3)
+    jobs = [
+        _job(session, SJC_LAT + rng.uniform(-0.3, 0.3), SJC_LON + rng.uniform(-0.3, 0.3))
+        for _ in range(500)
+    ]
+    session.add_all(jobs)
+    session.commit()
+
+    index = get_open_job_index()
+    index.load(session)
+
+    for _ in range(20):
+        lat = SJC_LAT + rng.uniform(-0.2, 0.2)
+        lon = SJC_LON + rng.uniform(-0.2, 0.2)
+        expected = {job.id for job in find_nearby_jobs(lat, lon, jobs, 10.0)}
+        got = {job.id for job, _distance in index.query(lat, lon, 10.0)}
+        assert got == expected
+
+
+def test_index_follows_commits_and_ignores_rollbacks() -> None:
+    session = _make_session()
+    index = get_open_job_index()
+    index.load(session)
+
+    def nearby_ids() -> set[int]:
+        return {job.id for job, _distance in index.query(SJC_LAT, SJC_LON, 10.0)}
+
+    job = _job(session, SJC_LAT + 0.01, SJC_LON)
+    session.add(job)
+    session.commit()
+    assert job.id in nearby_ids()
+
+    discarded = _job(session, SJC_LAT - 0.01, SJC_LON)
+    session.add(discarded)
+    session.flush()
+    session.rollback()
+    assert len(nearby_ids()) == 1
+
+    job.status = JobStatus.FILLED
+    session.commit()
+    assert job.id not in nearby_ids()
+
+
+def test_concurrent_refreshes_of_a_stale_index_reload_once(tmp_path: Path) -> None:
+    index = OpenJobIndex(max_age_seconds=60.0)
+    loads: list[int] = []
+    real_load = index.load
+
+    def counting_load(session: Session) -> None:
+        loads.append(1)
+        real_load(session)
+
+    index.load = counting_load  # type: ignore[method-assign]
+
+    async def scenario() -> None:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'index.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+        async def request() -> None:
+            async with sessions() as db:
+                await index.refresh(db)
+
+        await asyncio.gather(*(request() for _ in range(8)))
+        index.invalidate()  # commit hook / sweeper
+        await asyncio.gather(*(request() for _ in range(8)))
+        await engine.dispose()
+
+    asyncio.run(scenario())
+
+    assert len(loads) == 2
+    assert not index.is_stale()
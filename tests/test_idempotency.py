@@ -0,0 +1,95 @@
+import asyncio
+
+from app.core.idempotency import IdempotencyStore
+
+
+# Comentário (pt-BR):
+# Reenvios do Twilio (mesmo MessageSid) devem receber a resposta original,
+# inclusive quando chegam enquanto a primeira entrega ainda está em andamento.
+
+
+def test_duplicate_waits_for_inflight_delivery() -> None:
+    async def scenario() -> tuple[bytes | None, bytes | None]:
+        store = IdempotencyStore(max_size=10, ttl_seconds=60.0)
+        assert store.pending("SM1") is None
+
+        store.begin("SM1")
+        waiter = asyncio.ensure_future(store.pending("SM1"))
+        await asyncio.sleep(0)
+        store.finish("SM1", b"<Response/>")
+
+        return await waiter, store.get("SM1")
+
+    waited, cached = asyncio.run(scenario())
+    assert waited == b"<Response/>"
+    assert cached == b"<Response/>"
+
+
+def test_abandoned_delivery_is_not_cached() -> None:
+    async def scenario() -> tuple[bytes | None, IdempotencyStore]:
+        store = IdempotencyStore(max_size=10, ttl_seconds=60.0)
+        store.begin("SM1")
+        waiter = asyncio.ensure_future(store.pending("SM1"))
+        store.abandon("SM1")
+        store.abandon(None)
+        return await waiter, store
+
+    waited, store = asyncio.run(scenario())
+    assert waited is None
+    assert store.get("SM1") is None
+    assert store.pending("SM1") is None
+
+
+def test_cancelled_delivery_does_not_block_duplicates(monkeypatch) -> None:  # noqa: ANN001
+    # Comentário (pt-BR):
+    # A primeira entrega é cancelada no meio do processamento (cliente
+    # desconectou). A duplicata que já esperava recebe erro, e a próxima
+    # reentrega é processada normalmente; nenhuma fica pendurada.
+    import httpx
+
+    from app.core.security import TwilioSignatureVerifier
+    from app.routers import webhook
+    from main import app
+
+    started = asyncio.Event()
+    calls: list[str] = []
+
+    async def fake_process_message(db, form) -> bytes:  # noqa: ANN001
+        calls.append(form.message_sid)
+        if len(calls) == 1:
+            started.set()
+            await asyncio.Event().wait()  # nunca termina; só sai cancelada
+        return b"<Response>ok</Response>"
+
+    monkeypatch.setattr(webhook, "_process_message", fake_process_message)
+
+    data = {"From": "whatsapp:+5512900000001", "Body": "oi", "MessageSid": "SMcancelled"}
+    signature = TwilioSignatureVerifier("test-token").compute_signature(
+        "http://testserver/webhook", {name: [value] for name, value in data.items()}
+    )
+
+    async def scenario() -> tuple[int, httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://testserver") as client:
+
+            def post() -> "asyncio.Task[httpx.Response]":
+                return asyncio.ensure_future(
+                    client.post("/webhook", data=data, headers={"X-Twilio-Signature": signature})
+                )
+
+            first = post()
+            await asyncio.wait_for(started.wait(), 5)
+            waiting = post()
+            await asyncio.sleep(0.05)
+
+            first.cancel()
+            await asyncio.gather(first, return_exceptions=True)
+            waited = await asyncio.wait_for(waiting, 5)
+            retried = await asyncio.wait_for(post(), 5)
+            return waited.status_code, retried
+
+    waited_status, retried = asyncio.run(scenario())
+    assert waited_status == 500
+    assert retried.status_code == 200
+    assert retried.content == b"<Response>ok</Response>"
+    assert calls == ["SMcancelled", "SMcancelled"]
@@ -0,0 +1,36 @@
+from app.core.intents import IntentMatcher, fold_text
+
+
+# Comentário (pt-BR):
+# As intenções são reconhecidas sem depender de acentos nem de maiúsculas,
+# e os radicais só casam no início de uma palavra.
+
+
+USER_TYPE = IntentMatcher(
+    {
+        "worker": ("oportunidade", "trabalhar", "vaga"),
+        "contractor": ("contrat", "obra"),
+    }
+)
+
+
+def test_fold_text_strips_accents_case_and_extra_spaces() -> None:
+    assert fold_text("  Contratação   de OBRA ") == "contratacao de obra"
+
+
+def test_stems_match_accented_variants_at_word_start() -> None:
+    assert USER_TYPE.match(fold_text("Quero uma contratação")) == "contractor"
+    assert USER_TYPE.match(fold_text("OPORTUNIDADES")) == "worker"
+    assert USER_TYPE.match(fold_text("moro num sobrado")) is None
+
+
+def test_first_declared_intent_wins_regardless_of_position() -> None:
+    assert USER_TYPE.match(fold_text("contratar vaga")) == "worker"
+
+
+def test_whole_message_commands_are_exact() -> None:
+    menu = IntentMatcher({"vagas": ("vagas", "vaga"), "mais": ("mais",)}, whole_message=True)
+
+    assert menu.match(fold_text(" VAGAS ")) == "vagas"
+    assert menu.match(fold_text("Mais")) == "mais"
+    assert menu.match(fold_text("mais vagas")) is None
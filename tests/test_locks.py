@@ -0,0 +1,46 @@
+import asyncio
+
+from app.core.locks import StripedLock, advisory_lock_key
+
+
+# Comentário (pt-BR):
+# Mensagens do mesmo telefone rodam uma de cada vez; telefones diferentes
+# (em stripes diferentes) não esperam um pelo outro.
+
+
+def test_same_phone_is_serialized() -> None:
+    locks = StripedLock(stripes=64)
+    events: list[str] = []
+
+    async def handle(name: str) -> None:
+        async with locks.lock_for("whatsapp:+5511000000001"):
+            events.append(f"{name}:start")
+            await asyncio.sleep(0.01)
+            events.append(f"{name}:end")
+
+    async def scenario() -> None:
+        await asyncio.gather(handle("a"), handle("b"), handle("c"))
+
+    asyncio.run(scenario())
+    assert events == ["a:start", "a:end", "b:start", "b:end", "c:start", "c:end"]
+
+
+def test_different_stripes_run_in_parallel() -> None:
+    locks = StripedLock(stripes=64)
+    phones = [f"whatsapp:+55110000000{i:02d}" for i in range(20)]
+    first, second = next(
+        (a, b) for a in phones for b in phones if locks.lock_for(a) is not locks.lock_for(b)
+    )
+
+    async def scenario() -> bool:
+        async with locks.lock_for(first):
+            return not locks.lock_for(second).locked()
+
+    assert asyncio.run(scenario())
+
+
+def test_advisory_key_is_stable_signed_64_bit() -> None:
+    key = advisory_lock_key("whatsapp:+5511000000001")
+    assert key == advisory_lock_key("whatsapp:+5511000000001")
+    assert key != advisory_lock_key("whatsapp:+5511000000002")
+    assert -(2**63) <= key < 2**63
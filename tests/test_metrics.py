@@ -0,0 +1,57 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from sqlalchemy import create_engine, text
+
+from app.core.metrics import MetricsMiddleware, install_db_metrics, set_branch, track_request
+from app.routers.metrics import router as metrics_router
+
+
+# Comentário (pt-BR):
+# As métricas do webhook são rotuladas pelo ramo marcado com set_branch(), e
+# os statements SQL executados durante a requisição são somados a ela.
+
+
+app = FastAPI()
+app.add_middleware(MetricsMiddleware, path="/webhook")
+app.include_router(metrics_router)
+
+
+@app.post("/webhook")
+async def fake_webhook() -> dict[str, str]:
+    set_branch("MAIN_MENU:test")
+    return {"ok": "yes"}
+
+
+client = TestClient(app)
+
+
+def _sample(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_webhook_latency_is_labeled_by_branch_and_exposed() -> None:
+    before = _sample("contech_webhook_seconds_count", branch="MAIN_MENU:test", status="200")
+
+    assert client.post("/webhook").status_code == 200
+
+    after = _sample("contech_webhook_seconds_count", branch="MAIN_MENU:test", status="200")
+    assert after == before + 1
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert 'contech_webhook_seconds_count{branch="MAIN_MENU:test",status="200"}' in response.text
+
+
+def test_db_statements_are_counted_per_request() -> None:
+    engine = create_engine("sqlite://")
+    install_db_metrics(engine)
+
+    with engine.connect() as conn:
+        conn.execute(text("SELECT 1"))  # fora de uma requisição: não conta
+        with track_request() as metrics:
+            conn.execute(text("SELECT 1"))
+            conn.execute(text("SELECT 2"))
+
+    assert metrics.db_statements == 2
+    assert metrics.db_seconds > 0
@@ -0,0 +1,129 @@
+import os
+import random
+
+import pytest
+from sqlalchemy import create_engine, delete, event, select, update
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.core.nearby import NearbySearch, PostgisNearbySearch, SqliteRTreeNearbySearch, select_nearby_search
+from app.core.queries import JobRow
+from app.core.schema import ensure_schema
+from app.core.utils import haversine
+from app.models.models import JobOpportunity, JobStatus, User, UserType
+
+
+# Comentário (pt-BR):
+# Suíte compartilhada: todo backend espacial precisa devolver exatamente o
+# mesmo resultado que o Haversine por força bruta sobre as vagas OPEN,
+# inclusive depois de vagas serem encerradas, movidas ou apagadas.
+# O PostGIS só roda com TEST_POSTGIS_URL apontando para um banco de teste
+# descartável (as tabelas são apagadas).
+
+
+CENTER = (-23.2237, -45.9009)
+RADIUS_KM = 10.0
+
+BACKENDS = [
+    pytest.param((NearbySearch, "sqlite"), id="python"),
+    pytest.param((SqliteRTreeNearbySearch, "sqlite"), id="rtree"),
+    pytest.param(
+        (PostgisNearbySearch, os.getenv("TEST_POSTGIS_URL")),
+        id="postgis",
+        marks=pytest.mark.skipif(not os.getenv("TEST_POSTGIS_URL"), reason="TEST_POSTGIS_URL não definido"),
+    ),
+]
+
+
+@pytest.fixture(params=BACKENDS)
+def backend_session(request, tmp_path):  # noqa: ANN001, ANN201
+    backend_class, url = request.param
+    engine = create_engine(f"sqlite:///{tmp_path / 'nearby.db'}" if url == "sqlite" else url)
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+
+    rng = random.Random(11)
+    with Session(engine) as db:
+        contractor = User(phone_number="whatsapp:+5512000000001", user_type=UserType.CONTRACTOR, full_name="C")
+        db.add(contractor)
+        db.flush()
+        db.add_all(
+            JobOpportunity(
+                title=f"Vaga {i}",
+                description="Teste",
+                payment_offer=100.0,
+                latitude=CENTER[0] + rng.uniform(-0.15, 0.15),
+                longitude=CENTER[1] + rng.uniform(-0.15, 0.15),
+                contractor_id=contractor.id,
+                status=JobStatus.OPEN if i % 4 else JobStatus.CLOSED,
+            )
+            for i in range(400)
+        )
+        db.commit()
+
+    backend = backend_class()
+    backend.install(engine)
+    with Session(engine) as db:
+        yield backend, db
+    engine.dispose()
+
+
+def _brute_force(db: Session) -> dict[int, float]:
+    jobs = db.scalars(select(JobOpportunity).where(JobOpportunity.status == JobStatus.OPEN)).all()
+    distances = {job.id: haversine(*CENTER, job.latitude, job.longitude) for job in jobs}
+    return {job_id: distance for job_id, distance in distances.items() if distance <= RADIUS_KM}
+
+
+def _search(backend: NearbySearch, db: Session) -> dict[int, float]:
+    return {job.id: distance for job, distance in backend.search(db, *CENTER, RADIUS_KM)}
+
+
+def test_backend_matches_brute_force(backend_session) -> None:  # noqa: ANN001
+    backend, db = backend_session
+
+    expected = _brute_force(db)
+    found = _search(backend, db)
+    matches = backend.search(db, *CENTER, RADIUS_KM)
+
+    assert 0 < len(expected) < 300
+    assert found.keys() == expected.keys()
+    assert all(found[job_id] == pytest.approx(expected[job_id]) for job_id in expected)
+    assert all(type(job) is JobRow for job, _distance in matches)  # sem objetos ORM
+
+
+def test_backend_follows_writes(backend_session) -> None:  # noqa: ANN001
+    backend, db = backend_session
+    inside = sorted(_brute_force(db))
+
+    db.execute(update(JobOpportunity).where(JobOpportunity.id == inside[0]).values(status=JobStatus.FILLED))
+    db.execute(delete(JobOpportunity).where(JobOpportunity.id == inside[1]))
+    moved = db.get(JobOpportunity, inside[2])
+    moved.latitude, moved.longitude = 0.0, 0.0
+    db.add(
+        JobOpportunity(
+            title="Nova",
+            description="Teste",
+            payment_offer=100.0,
+            latitude=CENTER[0] + 0.001,
+            longitude=CENTER[1],
+            contractor_id=moved.contractor_id,
+            status=JobStatus.OPEN,
+        )
+    )
+    db.commit()
+
+    assert _search(backend, db).keys() == _brute_force(db).keys()
+
+
+def test_backend_ddl_runs_with_the_schema_and_workers_only_select(tmp_path) -> None:  # noqa: ANN001
+    engine = create_engine(f"sqlite:///{tmp_path / 'boot.db'}")
+    Base.metadata.create_all(engine)
+    assert select_nearby_search(engine).name == "python"  # rtree ainda não instalado
+
+    assert ensure_schema(engine) is True
+    statements: list[str] = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, sql, *args: statements.append(sql))
+
+    assert ensure_schema(engine) is False
+    assert select_nearby_search(engine).name == "rtree"
+    assert not [sql for sql in statements if sql.lstrip().upper().startswith(("CREATE", "ALTER", "INSERT"))]
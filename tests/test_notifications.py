@@ -0,0 +1,162 @@
+import asyncio
+from urllib.parse import parse_qs
+
+import httpx
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+from app.core.database import Base, SessionLocal, engine
+from app.core.notifications import JobAlert, JobNotifier, get_job_notifier, handle_worker_contact
+from app.core.rate_limit import TokenBucket
+from app.core.twilio_rest import TwilioMessagingClient
+from app.models.models import User, UserType
+
+
+# Comentário (pt-BR):
+# O fan-out de avisos é testado contra um "Twilio falso" (app ASGI local):
+# só os trabalhadores dentro do raio recebem, erros 429/5xx são repetidos e
+# o progresso da vaga termina com todos os envios contados. O CONTATAR das
+# construtoras passa pelo mesmo notifier.
+
+
+SJC_LAT, SJC_LON = -23.2237, -45.9009
+
+
+class FakeTwilio:
+    """Records sent messages; fails the first attempts for some numbers."""
+
+    def __init__(self, failures: dict[str, list[int]]) -> None:
+        self.failures = failures
+        self.sent: list[dict[str, str]] = []
+        self.app = Starlette(
+            routes=[Route("/2010-04-01/Accounts/{sid}/Messages.json", self.messages, methods=["POST"])]
+        )
+
+    async def messages(self, request: Request) -> JSONResponse:
+        form = {k: v[0] for k, v in parse_qs((await request.body()).decode()).items()}
+        pending = self.failures.get(form["To"])
+        if pending:
+            return JSONResponse({"message": "erro"}, status_code=pending.pop(0))
+        self.sent.append(form)
+        return JSONResponse({"sid": f"SM{len(self.sent)}"}, status_code=201)
+
+
+def _user(phone: str, lat: float | None, lon: float | None, user_type: UserType = UserType.WORKER) -> User:
+    return User(
+        phone_number=phone,
+        user_type=user_type,
+        full_name="Teste",
+        latitude=lat,
+        longitude=lon,
+        conversation_stage="MAIN_MENU",
+    )
+
+
+def test_fan_out_notifies_nearby_workers_with_retries() -> None:
+    fake = FakeTwilio(
+        failures={
+            "whatsapp:+5512000000001": [429, 503],  # temporário: repetido
+            "whatsapp:+5512000000002": [400],  # definitivo: falha
+        }
+    )
+
+    async def scenario() -> JobNotifier:
+        engine = create_async_engine("sqlite+aiosqlite://", poolclass=StaticPool)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as db:
+            db.add_all(
+                [_user(f"whatsapp:+551200000000{i}", SJC_LAT + i * 0.01, SJC_LON) for i in range(5)]
+                + [
+                    _user("whatsapp:+5511000000000", -23.55, -46.63),  # São Paulo: longe
+                    _user("whatsapp:+5512999999999", SJC_LAT, SJC_LON, UserType.CONTRACTOR),
+                    _user("whatsapp:+5512888888888", None, None),  # sem localização
+                ]
+            )
+            await db.commit()
+
+        notifier = JobNotifier(
+            radius_km=10.0,
+            concurrency=3,
+            rate_per_second=1000.0,
+            burst=10,
+            max_attempts=3,
+            backoff_seconds=0.001,
+            queue_max=2,
+            session_factory=sessions,
+        )
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app)) as http:
+            client = TwilioMessagingClient(
+                http,
+                account_sid="AC123",
+                auth_token="token",
+                from_number="+14155238886",
+                base_url="http://twilio.test",
+            )
+            await notifier.start(client)
+            await notifier.fan_out(JobAlert(7, "Pedreiro", 180.0, SJC_LAT, SJC_LON))
+            await notifier.stop()
+        await engine.dispose()
+        return notifier
+
+    notifier = asyncio.run(scenario())
+
+    assert sorted(message["To"] for message in fake.sent) == [
+        f"whatsapp:+551200000000{i}" for i in (0, 1, 3, 4)
+    ]
+    assert {message["From"] for message in fake.sent} == {"whatsapp:+14155238886"}
+    assert "Pedreiro (R$ 180.00)" in fake.sent[0]["Body"]
+
+    progress = notifier.progress(7)
+    assert progress is not None and progress.done
+    assert (progress.total, progress.sent, progress.failed) == (5, 4, 1)
+
+
+def test_token_bucket_allows_burst_then_refills() -> None:
+    now = [0.0]
+    bucket = TokenBucket(rate=2.0, capacity=3, clock=lambda: now[0])
+
+    assert [bucket.try_acquire() for _ in range(4)] == [True, True, True, False]
+    now[0] += 0.5
+    assert bucket.try_acquire()
+    assert not bucket.try_acquire()
+
+
+def test_worker_contact_relays_the_contractor_to_the_worker() -> None:
+    Base.metadata.create_all(engine)
+    with SessionLocal() as db:
+        contractor = _user("whatsapp:+5512777777777", SJC_LAT, SJC_LON, UserType.CONTRACTOR)
+        contractor.full_name = "Obra Centro"
+        db.add(contractor)
+        db.commit()
+        contractor_id = contractor.id
+
+    fake = FakeTwilio(failures={})
+
+    async def scenario() -> None:
+        notifier = get_job_notifier()
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=fake.app)) as http:
+            client = TwilioMessagingClient(
+                http,
+                account_sid="AC123",
+                auth_token="token",
+                from_number="+14155238886",
+                base_url="http://twilio.test",
+            )
+            await notifier.start(client)
+            try:
+                await handle_worker_contact(
+                    {"contractor_id": contractor_id, "worker_phone": "whatsapp:+5512000000001"}
+                )
+            finally:
+                await notifier.stop()
+
+    asyncio.run(scenario())
+
+    assert [message["To"] for message in fake.sent] == ["whatsapp:+5512000000001"]
+    assert "Obra Centro (+5512777777777)" in fake.sent[0]["Body"]
@@ -0,0 +1,209 @@
+import asyncio
+from pathlib import Path
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+
+from app.core.database import Base
+from app.core.outbox import OutboxConsumer, enqueue_event, outbox_handler
+from app.models.models import OutboxEvent, OutboxStatus
+
+
+# Comentário (pt-BR):
+# O consumidor do outbox deve executar cada evento com o handler do tópico,
+# repetir os que falham e desistir (FAILED) depois do limite de tentativas.
+
+
+def _engine(tmp_path: Path) -> AsyncEngine:
+    # Arquivo (e não ":memory:" com uma conexão só): os eventos de um lote
+    # terminam em sessões concorrentes, cada uma com a sua conexão.
+    return create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'outbox.db'}")
+
+
+def test_consumer_runs_retries_and_gives_up(tmp_path: Path) -> None:
+    calls: list[tuple[str, int]] = []
+    flaky_failures = [RuntimeError("fora do ar")]
+
+    @outbox_handler("test.ok")
+    async def ok(payload: dict) -> None:
+        calls.append(("ok", payload["n"]))
+
+    @outbox_handler("test.flaky")
+    async def flaky(payload: dict) -> None:
+        if flaky_failures:
+            raise flaky_failures.pop()
+        calls.append(("flaky", payload["n"]))
+
+    @outbox_handler("test.broken")
+    async def broken(payload: dict) -> None:
+        raise ValueError("sempre falha")
+
+    async def scenario() -> list[OutboxEvent]:
+        engine = _engine(tmp_path)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+
+        async with sessions() as db:
+            enqueue_event(db, "test.ok", {"n": 1})
+            enqueue_event(db, "test.flaky", {"n": 2})
+            enqueue_event(db, "test.broken", {"n": 3})
+            enqueue_event(db, "test.missing", {"n": 4})
+            await db.commit()
+
+        consumer = OutboxConsumer(
+            batch_size=10,
+            poll_seconds=0.01,
+            lease_seconds=60,
+            max_attempts=2,
+            retry_seconds=0,
+            session_factory=sessions,
+        )
+        assert await consumer.run_once() == 4
+        assert await consumer.run_once() == 3  # flaky, broken e missing de novo
+        assert await consumer.run_once() == 0
+
+        async with sessions() as db:
+            events = (await db.scalars(select(OutboxEvent).order_by(OutboxEvent.id))).all()
+        await engine.dispose()
+        return list(events)
+
+    events = asyncio.run(scenario())
+
+    assert sorted(calls) == [("flaky", 2), ("ok", 1)]
+    assert [event.status for event in events] == [
+        OutboxStatus.DONE,
+        OutboxStatus.DONE,
+        OutboxStatus.FAILED,
+        OutboxStatus.FAILED,
+    ]
+    assert [event.attempts for event in events] == [1, 2, 2, 2]
+    assert "sempre falha" in (events[2].last_error or "")
+
+
+def test_claimed_events_are_not_claimed_twice(tmp_path: Path) -> None:
+    async def scenario() -> tuple[int, int]:
+        engine = _engine(tmp_path)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as db:
+            for n in range(5):
+                enqueue_event(db, "test.noop", {"n": n})
+            await db.commit()
+
+        consumer = OutboxConsumer(
+            batch_size=3,
+            poll_seconds=0.01,
+            lease_seconds=60,
+            max_attempts=3,
+            retry_seconds=0,
+            session_factory=sessions,
+        )
+        first = await consumer._claim()
+        second = await consumer._claim()
+        await engine.dispose()
+        return len(first), len({row.id for row in first} | {row.id for row in second})
+
+    assert asyncio.run(scenario()) == (3, 5)
+
+
+def test_long_event_keeps_its_lease_and_does_not_block_others(tmp_path: Path) -> None:
+    # Comentário (pt-BR):
+    # Um evento que roda por mais que a concessão não pode ser pego de novo
+    # por outro consumidor, e os eventos rápidos não esperam por ele.
+    calls: list[str] = []
+    release = asyncio.Event()
+
+    @outbox_handler("test.slow")
+    async def slow(payload: dict) -> None:
+        calls.append("slow")
+        await release.wait()
+
+    @outbox_handler("test.fast")
+    async def fast(payload: dict) -> None:
+        calls.append("fast")
+
+    async def scenario() -> tuple[int, list[OutboxEvent]]:
+        engine = _engine(tmp_path)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as db:
+            enqueue_event(db, "test.slow", {})
+            for _ in range(4):
+                enqueue_event(db, "test.fast", {})
+            await db.commit()
+
+        def consumer() -> OutboxConsumer:
+            return OutboxConsumer(
+                batch_size=2,
+                poll_seconds=0.01,
+                lease_seconds=0.3,
+                max_attempts=3,
+                retry_seconds=0,
+                session_factory=sessions,
+            )
+
+        first = consumer()
+        first.start()
+        await asyncio.sleep(1.0)  # mais de três concessões
+        stolen = len(await consumer()._claim())
+        release.set()
+        await first.stop()
+
+        async with sessions() as db:
+            events = (await db.scalars(select(OutboxEvent).order_by(OutboxEvent.id))).all()
+        await engine.dispose()
+        return stolen, list(events)
+
+    stolen, events = asyncio.run(scenario())
+
+    assert stolen == 0
+    assert sorted(calls) == ["fast"] * 4 + ["slow"]
+    assert [event.status for event in events] == [OutboxStatus.DONE] * 5
+    assert [event.attempts for event in events] == [1] * 5
+
+
+def test_topics_not_ready_stay_pending(tmp_path: Path) -> None:
+    # Comentário (pt-BR):
+    # Um processo que não consegue rodar o tópico (ex.: notifier parado)
+    # não pega os eventos dele; eles continuam pendentes, sem tentativa gasta.
+    ready = [False]
+    calls: list[int] = []
+
+    @outbox_handler("test.gated", ready=lambda: ready[0])
+    async def gated(payload: dict) -> None:
+        calls.append(payload["n"])
+
+    async def scenario() -> tuple[int, int, list[OutboxEvent]]:
+        engine = _engine(tmp_path)
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as db:
+            enqueue_event(db, "test.gated", {"n": 1})
+            await db.commit()
+
+        consumer = OutboxConsumer(
+            batch_size=10,
+            poll_seconds=0.01,
+            lease_seconds=60,
+            max_attempts=3,
+            retry_seconds=0,
+            session_factory=sessions,
+        )
+        while_unready = await consumer.run_once()
+        ready[0] = True
+        once_ready = await consumer.run_once()
+
+        async with sessions() as db:
+            events = (await db.scalars(select(OutboxEvent))).all()
+        await engine.dispose()
+        return while_unready, once_ready, list(events)
+
+    while_unready, once_ready, events = asyncio.run(scenario())
+
+    assert (while_unready, once_ready) == (0, 1)
+    assert calls == [1]
+    assert [(event.status, event.attempts) for event in events] == [(OutboxStatus.DONE, 1)]
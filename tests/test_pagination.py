@@ -0,0 +1,31 @@
+import random
+
+from app.core.pagination import NearestCursor
+
+
+# Comentário (pt-BR):
+# O cursor de "MAIS" deve devolver as vagas da mais próxima para a mais
+# distante, página por página, sem repetir nem perder nenhuma.
+
+
+def test_cursor_pages_follow_distance_order() -> None:
+    rng = random.Random(11)
+    matches = [(f"vaga-{i}", rng.uniform(0.0, 10.0)) for i in range(53)]
+
+    cursor = NearestCursor(matches)
+    pages = []
+    while cursor.remaining:
+        pages.append(cursor.next_page(5))
+
+    assert [len(page) for page in pages] == [5] * 10 + [3]
+    flattened = [match for page in pages for match in page]
+    assert flattened == sorted(matches, key=lambda match: match[1])
+
+
+def test_cursor_ties_do_not_compare_items() -> None:
+    # Itens não comparáveis (ex.: objetos ORM) com a mesma distância.
+    matches = [(object(), 1.0), (object(), 1.0), (object(), 0.5)]
+
+    cursor = NearestCursor(matches)
+
+    assert [distance for _item, distance in cursor.next_page(3)] == [0.5, 1.0, 1.0]
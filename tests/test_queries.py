@@ -0,0 +1,73 @@
+import random
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.core.queries import workers_near_stmt
+from app.core.utils import haversine
+from app.models.models import User, UserType
+
+
+# Comentário (pt-BR):
+# A busca de TRABALHADORES corta o resultado no banco (ordem aproximada +
+# LIMIT). Os mais próximos pelo Haversine exato não podem ficar de fora.
+
+
+SJC_LAT, SJC_LON = -23.2237, -45.9009
+
+
+def test_limited_worker_search_keeps_nearest() -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(5)
+
+    with Session(engine) as session:
+        session.add_all(
+            User(
+                phone_number=f"whatsapp:+5512{i:09d}",
+                user_type=UserType.WORKER if i % 5 else UserType.CONTRACTOR,
+                full_name=f"Pessoa {i}",
+                latitude=SJC_LAT + rng.uniform(-0.2, 0.2),
+                longitude=SJC_LON + rng.uniform(-0.2, 0.2),
+                conversation_stage="MAIN_MENU",
+            )
+            for i in range(2000)
+        )
+        session.commit()
+
+        everyone = session.execute(workers_near_stmt(SJC_LAT, SJC_LON, 10.0)).all()
+        limited = session.execute(workers_near_stmt(SJC_LAT, SJC_LON, 10.0, limit=20)).all()
+
+    def distance(row) -> float:  # noqa: ANN001
+        return haversine(SJC_LAT, SJC_LON, row.latitude, row.longitude)
+
+    expected = sorted((row for row in everyone if distance(row) <= 10.0), key=distance)[:10]
+    assert len(limited) == 20
+    assert {row.phone_number for row in expected} <= {row.phone_number for row in limited}
+    assert all(int(row.phone_number[-9:]) % 5 for row in limited)
+
+
+def test_worker_search_skips_half_registered_users() -> None:
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(bind=engine)
+
+    with Session(engine) as session:
+        session.add_all(
+            User(
+                phone_number=f"whatsapp:+551200000000{i}",
+                user_type=UserType.WORKER,
+                full_name=name,
+                latitude=SJC_LAT,
+                longitude=SJC_LON,
+                conversation_stage=stage,
+            )
+            for i, (name, stage) in enumerate(
+                [("Ana", "MAIN_MENU"), ("", "MAIN_MENU"), ("", "ASKING_NAME"), ("Bia", "CHOOSING_TYPE")]
+            )
+        )
+        session.commit()
+
+        found = session.execute(workers_near_stmt(SJC_LAT, SJC_LON, 10.0)).all()
+
+    assert [row.full_name for row in found] == ["Ana"]
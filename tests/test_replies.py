@@ -0,0 +1,33 @@
+from twilio.twiml.messaging_response import MessagingResponse
+
+from app.core import replies
+from app.core.replies import ReplyTemplate, render_twiml
+
+
+# Comentário (pt-BR):
+# O TwiML pré-renderizado precisa ser byte a byte igual ao que o
+# MessagingResponse do Twilio geraria para o mesmo texto.
+
+
+def _expected(message: str) -> bytes:
+    response = MessagingResponse()
+    response.message(message)
+    return str(response).encode("utf-8")
+
+
+def test_static_replies_match_messaging_response() -> None:
+    templates = [v for v in vars(replies).values() if isinstance(v, ReplyTemplate)]
+    static = [template for template in templates if template.body is not None]
+
+    assert static
+    for template in static:
+        assert template.render() == _expected(template.text)
+
+
+def test_dynamic_reply_escapes_values() -> None:
+    title = 'Pedreiro & Ajudante <urgente> "já"'
+
+    rendered = replies.JOB_CREATED.render(title=title)
+
+    assert rendered == _expected(replies.JOB_CREATED.text.format(title=title))
+    assert render_twiml("a < b\nc & d") == _expected("a < b\nc & d")
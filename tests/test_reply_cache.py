@@ -0,0 +1,87 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.core.reply_cache import VagasReply, VagasReplyCache, get_vagas_reply_cache
+from app.models.models import JobOpportunity, JobStatus, User, UserType
+
+
+# Comentário (pt-BR):
+# Respostas de VAGAS são compartilhadas por célula e somem quando uma vaga
+# é gravada perto da célula (dentro do raio da busca).
+
+
+SJC = (-23.2237, -45.9009)
+RIO = (-22.9068, -43.1729)
+
+
+def _reply() -> VagasReply:
+    return VagasReply(body=b"<Response/>", remaining=())
+
+
+def test_nearby_locations_share_a_cell_and_count_hits() -> None:
+    cache = VagasReplyCache(cell_deg=0.0025, max_size=100, ttl_seconds=60)
+    key = cache.key_for(*SJC, 10.0)
+    lat, lon = cache.center_of(key)
+    assert cache.key_for(lat, lon, 10.0) == key
+
+    assert cache.get(key) is None
+    cache.set(key, _reply(), cache.generation)
+    assert cache.get(cache.key_for(SJC[0] + 0.0001, SJC[1] + 0.0001, 10.0)) is not None
+    assert (cache.hits, cache.misses) == (1, 1)
+
+
+def test_invalidate_near_only_drops_cells_within_reach() -> None:
+    cache = VagasReplyCache(cell_deg=0.0025, max_size=100, ttl_seconds=60)
+    near = cache.key_for(*SJC, 10.0)
+    far = cache.key_for(*RIO, 10.0)
+    cache.set(near, _reply(), cache.generation)
+    cache.set(far, _reply(), cache.generation)
+
+    assert cache.invalidate_near(SJC[0] + 0.05, SJC[1]) == 1  # ~5,5 km
+
+    assert cache.get(near) is None
+    assert cache.get(far) is not None
+
+
+def test_reply_computed_before_an_invalidation_is_not_stored() -> None:
+    cache = VagasReplyCache(cell_deg=0.0025, max_size=100, ttl_seconds=60)
+    key = cache.key_for(*SJC, 10.0)
+    generation = cache.generation
+
+    cache.invalidate_near(*RIO)
+    cache.set(key, _reply(), generation)
+
+    assert cache.get(key) is None
+
+
+def test_committed_job_invalidates_cached_cells(tmp_path) -> None:  # noqa: ANN001
+    engine = create_engine(f"sqlite:///{tmp_path / 'cache.db'}")
+    Base.metadata.create_all(engine)
+    cache = get_vagas_reply_cache()
+    key = cache.key_for(*SJC, 10.0)
+    cache.set(key, _reply(), cache.generation)
+
+    with Session(engine) as db:
+        contractor = User(
+            phone_number="whatsapp:+5512000000001",
+            user_type=UserType.CONTRACTOR,
+            full_name="Construtora",
+        )
+        db.add(contractor)
+        db.flush()
+        db.add(
+            JobOpportunity(
+                title="Pedreiro",
+                description="Reboco",
+                payment_offer=200.0,
+                latitude=SJC[0] + 0.01,
+                longitude=SJC[1],
+                contractor_id=contractor.id,
+                status=JobStatus.OPEN,
+            )
+        )
+        assert cache.get(key) is not None  # nada muda antes do commit
+        db.commit()
+
+    assert cache.get(key) is None
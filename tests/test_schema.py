@@ -0,0 +1,26 @@
+from sqlalchemy import create_engine, inspect
+
+from app.core.database import Base
+from app.core.schema import ensure_schema, schema_fingerprint
+
+
+# Comentário (pt-BR):
+# O DDL só deve rodar no primeiro boot (ou quando os modelos mudam); nos
+# boots seguintes basta um SELECT na tabela schema_version.
+
+
+def test_ddl_runs_once_per_schema_version(tmp_path) -> None:  # noqa: ANN001
+    engine = create_engine(f"sqlite:///{tmp_path / 'schema.db'}")
+
+    assert ensure_schema(engine) is True
+    tables = set(inspect(engine).get_table_names())
+    assert set(Base.metadata.tables) <= tables
+    assert "schema_version" in tables
+
+    assert ensure_schema(engine) is False
+
+
+def test_fingerprint_is_stable_per_dialect() -> None:
+    engine = create_engine("sqlite://")
+    assert schema_fingerprint(engine.dialect) == schema_fingerprint(engine.dialect)
+    assert len(schema_fingerprint(engine.dialect)) == 64
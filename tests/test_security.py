@@ -0,0 +1,69 @@
+from fastapi import FastAPI, Request
+from fastapi.testclient import TestClient
+from twilio.request_validator import RequestValidator
+
+from app.core.security import TWILIO_FORM_STATE_KEY, TwilioSignatureMiddleware
+
+
+# Comentário (pt-BR):
+# Testes do middleware de assinatura do Twilio. As assinaturas são geradas
+# com a biblioteca oficial do Twilio, para garantir compatibilidade.
+
+
+URL = "http://testserver/webhook"
+
+calls: list[dict[str, str]] = []
+
+app = FastAPI()
+app.add_middleware(TwilioSignatureMiddleware, path="/webhook")
+
+
+@app.post("/webhook")
+async def fake_webhook(request: Request) -> dict[str, object]:
+    form = getattr(request.state, TWILIO_FORM_STATE_KEY)
+    calls.append(form)
+    # O corpo original continua disponível para o app (reentregue uma vez).
+    return {"form": form, "body": (await request.body()).decode("utf-8")}
+
+
+client = TestClient(app)
+
+
+def _sign(data: dict[str, str], url: str = URL) -> str:
+    return RequestValidator("test-token").compute_signature(url, data)
+
+
+def test_valid_signature_reaches_route_with_parsed_form() -> None:
+    data = {"From": "whatsapp:+5512999999999", "Body": "Olá, VAGAS & mais", "Latitude": "-23.2"}
+
+    response = client.post("/webhook", data=data, headers={"X-Twilio-Signature": _sign(data)})
+
+    assert response.status_code == 200
+    assert response.json()["form"] == data
+    assert "Body=Ol%C3%A1" in response.json()["body"]
+
+
+def test_signature_with_explicit_default_port_is_accepted() -> None:
+    data = {"From": "whatsapp:+5512999999999", "Body": "vagas"}
+    signature = _sign(data, url="http://testserver:80/webhook")
+
+    response = client.post("/webhook", data=data, headers={"X-Twilio-Signature": signature})
+
+    assert response.status_code == 200
+
+
+def test_missing_or_forged_signature_is_rejected_before_routing() -> None:
+    calls.clear()
+    data = {"From": "whatsapp:+5512999999999", "Body": "vagas"}
+
+    missing = client.post("/webhook", data=data)
+    forged = client.post(
+        "/webhook",
+        data={**data, "Body": "outra coisa"},
+        headers={"X-Twilio-Signature": _sign(data)},
+    )
+
+    assert missing.status_code == 403
+    assert forged.status_code == 403
+    assert forged.json() == {"detail": "Forbidden"}
+    assert calls == []
@@ -0,0 +1,97 @@
+from datetime import datetime
+
+import numpy as np
+from sqlalchemy import create_engine, func, insert, select
+
+from app.core.utils import grid_cell
+from app.models.models import (
+    ArchivedJobOpportunity,
+    JobOpportunity,
+    JobStatus,
+    OutboxEvent,
+    ProcessedMessage,
+    User,
+    UserType,
+)
+from app.routers.webhook import _STAGE_HANDLERS
+from seed_db import METRO_AREAS, TRUNCATE_ORDER, SyntheticConfig, sample_points, seed_synthetic
+
+
+# Comentário (pt-BR):
+# O gerador sintético precisa ser reprodutível pela semente, respeitar o
+# retângulo pedido e preencher grid_cell (o insert em massa não passa pelos
+# eventos do ORM).
+
+
+def test_sample_points_is_reproducible_and_inside_bbox() -> None:
+    bbox = (-23.6, -46.2, -22.8, -45.2)
+
+    first = sample_points(np.random.default_rng(7), 2000, METRO_AREAS, bbox, background=0.1)
+    second = sample_points(np.random.default_rng(7), 2000, METRO_AREAS, bbox, background=0.1)
+
+    np.testing.assert_array_equal(first[0], second[0])
+    np.testing.assert_array_equal(first[1], second[1])
+    lats, lons = first
+    assert ((lats >= bbox[0]) & (lats <= bbox[2])).all()
+    assert ((lons >= bbox[1]) & (lons <= bbox[3])).all()
+
+
+def test_seed_synthetic_bulk_loads_users_and_jobs(tmp_path) -> None:  # noqa: ANN001
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    config = SyntheticConfig(users=500, jobs=300, seed=3, contractor_ratio=0.2, batch_size=128)
+
+    seed_synthetic(config, target_engine=engine)
+
+    with engine.connect() as conn:
+        assert conn.scalar(select(func.count()).select_from(User)) == 500
+        assert conn.scalar(
+            select(func.count()).select_from(User).where(User.user_type == UserType.CONTRACTOR)
+        ) > 0
+        jobs = conn.execute(
+            select(JobOpportunity.latitude, JobOpportunity.longitude, JobOpportunity.grid_cell)
+        ).all()
+        stages = set(conn.scalars(select(User.conversation_stage).distinct()))
+
+    assert len(jobs) == 300
+    # Todo usuário semeado cai num estágio que a máquina de estados conhece.
+    assert stages == {"MAIN_MENU"} and stages <= _STAGE_HANDLERS.keys()
+    assert all(row.grid_cell == grid_cell(row.latitude, row.longitude) for row in jobs)
+
+
+def test_truncate_empties_every_app_table(tmp_path) -> None:  # noqa: ANN001
+    engine = create_engine(f"sqlite:///{tmp_path / 'seed.db'}")
+    config = SyntheticConfig(users=200, jobs=100, seed=3, contractor_ratio=0.2, open_ratio=0.0)
+    seed_synthetic(config, target_engine=engine)
+    with engine.begin() as conn:
+        conn.execute(insert(OutboxEvent), [{"topic": "job_created", "payload": {}, "status": "PENDING"}])
+        conn.execute(insert(ProcessedMessage), [{"message_sid": "SM1", "response_body": b"<Response/>"}])
+        conn.execute(
+            insert(ArchivedJobOpportunity),
+            [
+                {
+                    "id": 10_000,
+                    "title": "Antiga",
+                    "description": "Teste",
+                    "payment_offer": 100.0,
+                    "latitude": -23.2,
+                    "longitude": -45.9,
+                    "grid_cell": 0,
+                    "contractor_id": 1,
+                    "status": JobStatus.FILLED,
+                    "created_at": datetime(2026, 1, 1),
+                    "archived_at": datetime(2026, 2, 1),
+                }
+            ],
+        )
+
+    seed_synthetic(config, target_engine=engine, truncate=True)
+
+    with engine.connect() as conn:
+        counts = {table.name: conn.scalar(select(func.count()).select_from(table)) for table in TRUNCATE_ORDER}
+    assert counts == {
+        "processed_messages": 0,
+        "outbox_events": 0,
+        "job_opportunities_archive": 0,
+        "job_opportunities": 100,
+        "users": 200,
+    }
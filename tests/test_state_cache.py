@@ -0,0 +1,191 @@
+import asyncio
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+from typing import Any
+
+import pytest
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from app.core import replies
+from app.core.database import Base
+from app.core.state_cache import StaleUserStateError, UserState, get_user_state_cache, user_state_stmt
+from app.models.models import User, UserType
+from app.routers import webhook
+from app.schemas.whatsapp import TwilioWebhookForm
+
+
+# Comentário (pt-BR):
+# Cache do estado de conversa: write-through depois do commit, entrada
+# removida quando o commit falha, e o compare-and-set do estágio que manda
+# reprocessar a mensagem quando o estado em cache estava velho. Também a
+# corrida de duas primeiras mensagens do mesmo número (primeiro contato).
+
+
+PHONE = "whatsapp:+5512911110000"
+
+
+def _run(tmp_path: Path, scenario: Callable[[async_sessionmaker[AsyncSession]], Awaitable[Any]]) -> Any:
+    async def main() -> Any:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'state.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sessions = async_sessionmaker(engine, expire_on_commit=False)
+        async with sessions() as db:
+            db.add(
+                User(
+                    phone_number=PHONE,
+                    user_type=UserType.WORKER,
+                    full_name="",
+                    conversation_stage="CHOOSING_TYPE",
+                )
+            )
+            await db.commit()
+        get_user_state_cache().pop(PHONE)
+        try:
+            return await scenario(sessions)
+        finally:
+            get_user_state_cache().pop(PHONE)
+            await engine.dispose()
+
+    return asyncio.run(main())
+
+
+async def _load(db: AsyncSession) -> UserState:
+    return UserState(*(await db.execute(user_state_stmt(PHONE))).one())
+
+
+async def _stored_stage(sessions: async_sessionmaker[AsyncSession]) -> str:
+    async with sessions() as db:
+        return await db.scalar(select(User.conversation_stage).where(User.phone_number == PHONE))
+
+
+def test_commit_writes_the_new_stage_through_to_the_cache(tmp_path: Path) -> None:
+    async def scenario(sessions: async_sessionmaker[AsyncSession]) -> tuple[UserState, UserState | None, str]:
+        async with sessions() as db:
+            saved = await webhook._save_user_state(db, await _load(db), conversation_stage="ASKING_NAME")
+        return saved, get_user_state_cache().get(PHONE), await _stored_stage(sessions)
+
+    saved, cached, stored = _run(tmp_path, scenario)
+
+    assert saved.conversation_stage == stored == "ASKING_NAME"
+    assert cached == saved
+
+
+def test_failed_commit_evicts_the_entry_and_rolls_back(tmp_path: Path) -> None:
+    async def scenario(sessions: async_sessionmaker[AsyncSession]) -> tuple[UserState | None, str]:
+        async with sessions() as db:
+            state = await _load(db)
+            get_user_state_cache().set(PHONE, state)
+
+            async def failing_commit() -> None:
+                raise RuntimeError("banco caiu")
+
+            db.commit = failing_commit  # type: ignore[method-assign]
+            with pytest.raises(RuntimeError):
+                await webhook._save_user_state(db, state, conversation_stage="ASKING_NAME")
+        return get_user_state_cache().get(PHONE), await _stored_stage(sessions)
+
+    cached, stored = _run(tmp_path, scenario)
+
+    assert cached is None
+    assert stored == "CHOOSING_TYPE"
+
+
+def test_stale_cached_stage_is_reloaded_and_processed_again(tmp_path: Path) -> None:
+    form = TwilioWebhookForm(From=PHONE, Body="Quero trabalhar")
+
+    async def scenario(sessions: async_sessionmaker[AsyncSession]) -> tuple[bytes, UserState | None]:
+        async with sessions() as db:
+            get_user_state_cache().set(PHONE, await _load(db))
+            await db.commit()
+            # Outro processo concluiu o cadastro; o cache ainda diz CHOOSING_TYPE.
+            await db.execute(
+                update(User)
+                .where(User.phone_number == PHONE)
+                .values(conversation_stage="MAIN_MENU", full_name="Ana")
+            )
+            await db.commit()
+
+            body = await webhook._process_message(db, form)
+        return body, get_user_state_cache().get(PHONE)
+
+    body, cached = _run(tmp_path, scenario)
+
+    # Com o estado relido, "Quero trabalhar" é tratado no MAIN_MENU.
+    assert body == replies.MAIN_MENU_UNKNOWN.body
+    assert cached is not None and cached.conversation_stage == "MAIN_MENU"
+
+
+def test_stale_state_retries_are_capped(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    calls: list[int] = []
+
+    async def always_stale(db: AsyncSession, form: TwilioWebhookForm) -> bytes:
+        calls.append(1)
+        raise StaleUserStateError(form.from_number)
+
+    monkeypatch.setattr(webhook, "_handle_message", always_stale)
+    form = TwilioWebhookForm(From=PHONE, Body="vagas")
+
+    async def scenario(sessions: async_sessionmaker[AsyncSession]) -> None:
+        async with sessions() as db:
+            with pytest.raises(StaleUserStateError):
+                await webhook._process_message(db, form)
+
+    _run(tmp_path, scenario)
+
+    assert len(calls) == webhook.MAX_STATE_ATTEMPTS
+
+
+def test_losing_first_contact_insert_continues_as_existing_user(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # A mensagem perdedora viu o número ausente (SELECT antes do INSERT do
+    # vencedor): o primeiro SELECT do estado não acha ninguém.
+    real_stmt = webhook.user_state_stmt
+    selects: list[str] = []
+
+    def first_select_misses(phone_number: str) -> Any:
+        selects.append(phone_number)
+        return real_stmt("whatsapp:+0" if len(selects) == 1 else phone_number)
+
+    monkeypatch.setattr(webhook, "user_state_stmt", first_select_misses)
+    form = TwilioWebhookForm(From=PHONE, Body="Quero trabalhar")
+
+    async def scenario(sessions: async_sessionmaker[AsyncSession]) -> tuple[Any, bytes]:
+        async with sessions() as db:
+            # O mesmo INSERT ... ON CONFLICT DO NOTHING RETURNING de um
+            # número que já existe não devolve linha nenhuma.
+            conflict = await webhook._insert_first_contact(db, PHONE)
+        async with sessions() as db:
+            body = await webhook._handle_message(db, form)
+        return conflict, body
+
+    conflict, body = _run(tmp_path, scenario)
+
+    assert conflict is None
+    # Segue como usuário existente (estágio CHOOSING_TYPE do vencedor),
+    # sem WELCOME e sem 500.
+    assert body == replies.ASK_WORKER_NAME.body
+    assert len(selects) == 2
+
+
+def test_first_contact_without_on_conflict_falls_back_on_integrity_error(
+    tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    # Bancos sem ON CONFLICT recebem um INSERT comum; a corrida vira
+    # IntegrityError, que é desfeito e tratado como "outro request criou".
+    real_stmt = webhook.insert_user_state_stmt
+    monkeypatch.setattr(
+        webhook, "insert_user_state_stmt", lambda dialect_name, phone_number: real_stmt("other", phone_number)
+    )
+
+    async def scenario(sessions: async_sessionmaker[AsyncSession]) -> tuple[Any, UserState]:
+        async with sessions() as db:
+            row = await webhook._insert_first_contact(db, PHONE)
+            return row, await _load(db)  # sessão continua utilizável
+
+    row, state = _run(tmp_path, scenario)
+
+    assert row is None
+    assert state.conversation_stage == "CHOOSING_TYPE"
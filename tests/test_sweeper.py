@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from app.core.sweeper import JobSweeper
+from app.models.models import ArchivedJobOpportunity, JobOpportunity, JobStatus, User, UserType
+
+
+# Comentário (pt-BR):
+# Vagas OPEN antigas são encerradas e toda vaga fora de OPEN sai da tabela
+# principal para o arquivo, em lotes, preservando id e dados.
+
+
+NOW = datetime(2026, 6, 1, 12, 0, 0)
+
+
+def _seed(path) -> None:  # noqa: ANN001
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    with Session(engine) as db:
+        contractor = User(
+            phone_number="whatsapp:+5512000000001",
+            user_type=UserType.CONTRACTOR,
+            full_name="Construtora",
+        )
+        db.add(contractor)
+        db.flush()
+        for i, (age_days, status) in enumerate(
+            [(1, JobStatus.OPEN), (45, JobStatus.OPEN), (60, JobStatus.OPEN), (2, JobStatus.FILLED)]
+        ):
+            db.add(
+                JobOpportunity(
+                    title=f"Vaga {i}",
+                    description="Teste",
+                    payment_offer=100.0 + i,
+                    latitude=-23.2,
+                    longitude=-45.9,
+                    contractor_id=contractor.id,
+                    status=status,
+                    created_at=NOW - timedelta(days=age_days),
+                )
+            )
+        db.commit()
+    engine.dispose()
+
+
+def test_sweep_closes_stale_jobs_and_archives_non_open_ones(tmp_path) -> None:  # noqa: ANN001
+    path = tmp_path / "sweep.db"
+    _seed(path)
+    async_engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    sweeper = JobSweeper(
+        max_age_days=30,
+        interval_seconds=3600,
+        batch_size=2,
+        session_factory=async_sessionmaker(async_engine, expire_on_commit=False),
+    )
+
+    async def scenario() -> tuple:
+        result = await sweeper.run_once(now=NOW)
+        async with async_sessionmaker(async_engine)() as db:
+            live = (await db.scalars(select(JobOpportunity.title))).all()
+            archived = (
+                await db.execute(select(ArchivedJobOpportunity.title, ArchivedJobOpportunity.status))
+            ).all()
+        await async_engine.dispose()
+        return result, live, archived
+
+    result, live, archived = asyncio.run(scenario())
+
+    assert (result.closed, result.archived) == (2, 3)
+    assert live == ["Vaga 0"]
+    assert sorted(archived) == [
+        ("Vaga 1", JobStatus.CLOSED),
+        ("Vaga 2", JobStatus.CLOSED),
+        ("Vaga 3", JobStatus.FILLED),
+    ]
@@ -1,40 +1,174 @@
+import itertools
+from collections.abc import Iterator
+
+import pytest
 from fastapi.testclient import TestClient
 
+from app.core import config, replies
+from app.core.database import SessionLocal
+from app.core.security import TwilioSignatureVerifier
+from app.models.models import JobOpportunity, JobStatus, User, UserType
 from main import app
 
 
 # Comentário (pt-BR):
-# Estes testes são apenas um "smoke test" simples para garantir que
-# a rota /webhook está registrada e responde algo, mesmo em modo inicial.
+# Testes de ponta a ponta da rota /webhook: requisições assinadas como o
+# Twilio faz (TwilioSignatureMiddleware), passando pelo router de verdade
+# e pelo banco SQLite temporário dos testes (conftest). Cada teste usa
+# telefones e coordenadas próprios, porque o banco é compartilhado.
+
+
+URL = "http://testserver/webhook"
+
+_verifier = TwilioSignatureVerifier("test-token")
+_message_sids = itertools.count(1)
 
 
-client = TestClient(app)
+@pytest.fixture(scope="module")
+def client() -> Iterator[TestClient]:
+    # Com o `with`, o lifespan roda (schema, backend espacial, outbox...).
+    with TestClient(app) as client:
+        yield client
+
+
+def _post(  # noqa: ANN202
+    client: TestClient,
+    phone: str,
+    body: str = "",
+    message_sid: str | None = None,
+    **extra: str,
+):
+    data = {
+        "From": phone,
+        "Body": body,
+        "MessageSid": message_sid or f"SMtest{next(_message_sids)}",
+        **extra,
+    }
+    signature = _verifier.compute_signature(URL, {name: [value] for name, value in data.items()})
+    return client.post("/webhook", data=data, headers={"X-Twilio-Signature": signature})
+
 
+def _register(client: TestClient, phone: str, choice: str, name: str, lat: float, lon: float) -> None:
+    _post(client, phone, "Olá")
+    _post(client, phone, choice)
+    _post(client, phone, name)
+    _post(client, phone, Latitude=str(lat), Longitude=str(lon))
 
-def test_healthcheck() -> None:
+
+def test_healthcheck(client: TestClient) -> None:
     response = client.get("/health")
     assert response.status_code == 200
     assert response.json() == {"status": "ok"}
 
 
-def test_webhook_basic_flow(monkeypatch) -> None:
-    # Comentário (pt-BR):
-    # Como nossa rota /webhook exige variáveis de ambiente do Twilio,
-    # usamos monkeypatch para simular estas variáveis durante o teste.
+def test_unsigned_request_is_rejected(client: TestClient) -> None:
+    response = client.post("/webhook", data={"From": "whatsapp:+5511999999999", "Body": "Olá"})
 
-    monkeypatch.setenv("TWILIO_ACCOUNT_SID", "test-sid")
-    monkeypatch.setenv("TWILIO_AUTH_TOKEN", "test-token")
+    assert response.status_code == 403
 
-    form_data = {
-        "From": "whatsapp:+5511999999999",
-        "Body": "Olá, quero encontrar um pedreiro.",
-    }
 
-    response = client.post("/webhook", data=form_data)
+def test_first_contact_welcomes_and_registers(client: TestClient) -> None:
+    phone = "whatsapp:+5511900000001"
 
-    assert response.status_code == 200
-    # A resposta deve ser XML do Twilio (MessagingResponse)
-    assert response.headers["content-type"].startswith("application/xml")
-    text = response.text
-    assert "<Response>" in text and "</Response>" in text
+    first = _post(client, phone, "Olá, quero encontrar um pedreiro.")
+
+    assert first.status_code == 200
+    assert first.headers["content-type"].startswith("application/xml")
+    assert first.content == replies.WELCOME.body
+    assert _post(client, phone, "Quero trabalhar").content == replies.ASK_WORKER_NAME.body
+    assert _post(client, phone, "João da Silva").content == replies.REGISTRATION_DONE.body
+    with SessionLocal() as db:
+        user = db.query(User).filter_by(phone_number=phone).one()
+    assert user.user_type == UserType.WORKER
+    assert (user.full_name, user.conversation_stage) == ("João da Silva", "MAIN_MENU")
+
+
+def test_vagas_then_mais_pages_through_nearby_jobs(client: TestClient) -> None:
+    lat, lon = -10.0, -50.0
+    with SessionLocal() as db:
+        contractor = User(
+            phone_number="whatsapp:+5511900000100",
+            user_type=UserType.CONTRACTOR,
+            full_name="Construtora",
+            conversation_stage="MAIN_MENU",
+        )
+        db.add(contractor)
+        db.flush()
+        db.add_all(
+            JobOpportunity(
+                title=f"Vaga {i}",
+                description="Teste",
+                payment_offer=100.0 + i,
+                latitude=lat + i * 0.005,
+                longitude=lon,
+                contractor_id=contractor.id,
+                status=JobStatus.OPEN,
+            )
+            for i in range(7)
+        )
+        db.commit()
+
+    phone = "whatsapp:+5511900000002"
+    _register(client, phone, "oportunidade", "Maria", lat, lon)
+
+    first = _post(client, phone, "VAGAS").content.decode("utf-8")
+    more = _post(client, phone, "mais").content.decode("utf-8")
+    done = _post(client, phone, "MAIS")
+
+    assert replies.VAGAS_HEADER in first
+    assert [f"Vaga {i} " in first for i in range(7)] == [True] * 5 + [False] * 2
+    assert replies.VAGAS_FOOTER.format(remaining=2) in first
+    assert replies.VAGAS_MORE_HEADER in more
+    assert "Vaga 5 " in more and "Vaga 6 " in more and "MAIS" not in more
+    assert done.content == replies.NO_MORE_JOBS.body
+
+
+def test_trabalhadores_lists_registered_workers_without_phones(client: TestClient) -> None:
+    lat, lon = -12.0, -52.0
+    worker = "whatsapp:+5511900000201"
+    half_registered = "whatsapp:+5511900000202"
+    _register(client, worker, "quero trabalhar", "Carlos Pedreiro", lat + 0.01, lon)
+    _post(client, half_registered, "Olá")
+    _post(client, half_registered, "quero trabalhar")  # parou no ASKING_NAME
+    with SessionLocal() as db:
+        db.query(User).filter_by(phone_number=half_registered).update({"latitude": lat, "longitude": lon})
+        db.commit()
+
+    contractor = "whatsapp:+5511900000203"
+    _register(client, contractor, "quero contratar", "Obra Sul", lat, lon)
+
+    listing = _post(client, contractor, "TRABALHADORES").content.decode("utf-8")
+    contact = _post(client, contractor, "contatar 1")
+
+    assert replies.WORKERS_HEADER in listing
+    assert "1. Carlos Pedreiro - 1.1 km" in listing
+    assert "+5511900000201" not in listing and "+5511900000202" not in listing
+    assert contact.content == replies.WORKER_CONTACT_SENT.render(name="Carlos Pedreiro")
+
+
+def test_contatar_is_not_offered_when_notifications_are_disabled(
+    client: TestClient, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(config, "settings", config.settings.model_copy(update={"NOTIFY_ENABLED": False}))
+    lat, lon = -16.0, -56.0
+    _register(client, "whatsapp:+5511900000301", "quero trabalhar", "Paulo", lat, lon)
+    contractor = "whatsapp:+5511900000302"
+    _register(client, contractor, "quero contratar", "Obra Norte", lat, lon)
+
+    listing = _post(client, contractor, "TRABALHADORES").content.decode("utf-8")
+    contact = _post(client, contractor, "contatar 1")
+
+    assert "1. Paulo - 0.0 km" in listing and "CONTATAR" not in listing
+    assert contact.content == replies.WORKER_CONTACT_UNAVAILABLE.body
+
+
+def test_duplicate_message_sid_returns_identical_bytes(client: TestClient) -> None:
+    phone = "whatsapp:+5511900000003"
+    _register(client, phone, "oportunidade", "Ana", -14.0, -54.0)
+
+    first = _post(client, phone, "VAGAS", message_sid="SMduplicate1")
+    retry = _post(client, phone, "VAGAS", message_sid="SMduplicate1")
+    again = _post(client, phone, "oportunidade", message_sid="SMduplicate1")
 
+    assert first.status_code == retry.status_code == again.status_code == 200
+    assert retry.content == first.content == again.content == replies.NO_JOBS_NEARBY.body